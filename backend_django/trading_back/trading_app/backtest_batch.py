@@ -0,0 +1,100 @@
+"""
+Batch backtests for many Hermes AI Trading Bots
+Loads the bars of every symbol any bot watches once, over the union of all
+backtest windows, and backtests each bot on a slice of that matrix. Bots
+with the same watchlist, strategy flags and window share one scoring pass,
+so only the cheap position bookkeeping runs per bot. Results are written
+back to the bots with a single bulk_update.
+"""
+
+import contextlib
+import io
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+
+from trading_app.auto_trading_engine import AutoTradingEngine
+from trading_app.backtest_hermes_vectorized import VectorizedHermesBacktester, load_market_matrix
+from trading_app.backtest_sweep import TOGGLE_PARAMS
+from trading_app.models import AutoTradingBot
+
+
+# Bot fields a backtest updates (the same ones run_backtest_for_bot sets)
+RESULT_FIELDS = ['current_capital', 'total_profit_loss', 'total_trades', 'winning_trades', 'losing_trades']
+
+
+def bot_window(bot, start_date=None, end_date=None):
+    """
+    Backtest window of a bot: from start_date (default: the day it was
+    created, at least a week back) to end_date (default: today)
+    """
+    end_date = end_date or datetime.now().date()
+    start_date = start_date or min(bot.created_at.date(), end_date - timedelta(days=7))
+    return start_date, end_date
+
+
+def run_batch(bots, start_date=None, end_date=None, backtester_class=VectorizedHermesBacktester,
+              dry_run=False, log=print):
+    """
+    Backtest every bot against shared market matrices and bulk_update their
+    results. Returns {bot id: results dict} for the bots that could be run.
+    """
+    bots = list(bots)
+    if not bots:
+        return {}
+
+    windows = {bot.id: bot_window(bot, start_date, end_date) for bot in bots}
+    symbols = sorted({symbol for bot in bots for symbol in AutoTradingEngine.RISK_CONFIG[bot.risk_level]['stocks']})
+    batch_start = min(start for start, _ in windows.values())
+    batch_end = max(end for _, end in windows.values())
+
+    # Weekday calendar of the whole batch; every bot window is a contiguous slice of it
+    all_dates = VectorizedHermesBacktester(bots[0], batch_start, batch_end).get_trading_dates()
+    log(f"Loading {len(symbols)} symbols x {len(all_dates)} days for {len(bots)} bots...")
+    market = load_market_matrix(symbols, all_dates, batch_start, batch_end)
+    if market is None:
+        log("ERROR: No stock data available for batch backtest")
+        return {}
+
+    markets = {}
+    scores = {}
+    results = {}
+    for done, bot in enumerate(bots, start=1):
+        if done % 500 == 0:
+            log(f"  {done}/{len(bots)} bots...")
+        start, end = windows[bot.id]
+        config = AutoTradingEngine.RISK_CONFIG[bot.risk_level]
+        backtester = backtester_class(bot, start, end)
+
+        market_key = (bot.risk_level, start, end)
+        if market_key not in markets:
+            markets[market_key] = market.select(config['stocks'], start, end)
+        bot_market = markets[market_key]
+        if bot_market is None:
+            log(f"  ✗ {bot.name} (ID: {bot.id}): no stock data between {start} and {end}")
+            continue
+
+        # Signals only depend on the data, the watchlist and the strategy flags
+        score_key = market_key + tuple(bool(getattr(bot, flag)) for flag in TOGGLE_PARAMS)
+        if score_key not in scores:
+            scores[score_key] = backtester.score_market(bot_market)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            bot_results = backtester.run_backtest(market=bot_market, scores=scores[score_key])
+        if not bot_results:
+            continue
+        results[bot.id] = bot_results
+
+        bot.current_capital = Decimal(str(bot_results['final_value']))
+        bot.total_profit_loss = Decimal(str(bot_results['total_return']))
+        bot.total_trades = bot_results['total_trades']
+        bot.winning_trades = bot_results['winning_trades']
+        bot.losing_trades = bot_results['losing_trades']
+
+    updated = [bot for bot in bots if bot.id in results]
+    if updated and not dry_run:
+        AutoTradingBot.objects.bulk_update(updated, RESULT_FIELDS, batch_size=settings.BACKTEST_BULK_BATCH_SIZE)
+    log(f"{'Backtested' if dry_run else 'Updated'} {len(updated)} of {len(bots)} bots "
+        f"({len(scores)} distinct signal sets)")
+    return results
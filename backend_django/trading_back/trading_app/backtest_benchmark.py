@@ -0,0 +1,153 @@
+"""
+Backtest scale benchmarks
+Times the Hermes engines and backtest_clean_energy on synthetic universes of
+increasing size, reports throughput in bars per second and peak traced
+memory, and compares both against a stored JSON baseline so slowdowns and
+memory growth fail loudly.
+"""
+
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import tempfile
+import time
+import tracemalloc
+from decimal import Decimal
+
+import pandas as pd
+from django.test import override_settings
+
+from trading_app.auto_trading_engine import AutoTradingEngine
+from trading_app.backtest_clean_energy import run_backtest as run_clean_energy_backtest
+from trading_app.backtest_runs import ENGINES
+from trading_app.backtest_sweep import SweepBot
+from trading_app.market_data.providers import create_provider, get_provider, set_provider
+from trading_app.market_data.bar_store import bar_store
+from trading_app.market_data.synthetic import trading_days, write_universe
+
+
+BENCHMARK_ENGINES = sorted(ENGINES) + ['clean_energy']
+# Peak memory may grow by this many MB beyond the relative tolerance (small cases are noisy)
+MEMORY_SLACK_MB = 1.0
+
+
+def case_name(engine, n_symbols, years):
+    return f"{engine}/{n_symbols}x{years:g}y"
+
+
+def run_case(engine, data_dir, symbols, start_date, end_date):
+    """Run one backtest over symbols with its output discarded"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        if engine == 'clean_energy':
+            universe_csv = os.path.join(data_dir, f"universe_{len(symbols)}.csv")
+            # Single process so the traced peak memory covers the whole run
+            return run_clean_energy_backtest(universe_csv, data_dir, str(start_date), str(end_date), workers=1)
+
+        config = dict(AutoTradingEngine.RISK_CONFIG['MEDIUM'], stocks=symbols)
+        bot = SweepBot('MEDIUM', Decimal('10000'))
+        return ENGINES[engine](bot, start_date, end_date, config=config).run_backtest()
+
+
+def measure(engine, data_dir, symbols, start_date, end_date, repeat=3):
+    """Best wall time of repeat runs, and the peak traced memory of one more run (MB)"""
+    if engine != 'clean_energy':
+        # Load the bars into the bar store up front so only the backtest is timed
+        bar_store.prefetch(symbols, start_date, end_date)
+
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run_case(engine, data_dir, symbols, start_date, end_date)
+        timings.append(time.perf_counter() - started)
+
+    # Tracing slows everything down, so memory gets its own run
+    tracemalloc.start()
+    try:
+        run_case(engine, data_dir, symbols, start_date, end_date)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return min(timings), peak / (1024 * 1024)
+
+
+def run_benchmarks(engines, symbol_counts, year_counts, repeat=3, seed=0, log=print):
+    """
+    Generate one synthetic universe large enough for the whole grid and run
+    every engine x universe size x period case on a slice of it.
+    Returns {case name: {symbols, years, bars, seconds, bars_per_sec, peak_mb}}.
+    """
+    work_dir = tempfile.mkdtemp(prefix='backtest_benchmark_')
+    data_dir = os.path.join(work_dir, 'prices')
+    previous_provider = get_provider()
+    previous_cwd = os.getcwd()
+    results = {}
+    try:
+        log(f"Generating {max(symbol_counts)} symbols x {max(year_counts)} years of synthetic bars...")
+        symbols = write_universe(data_dir, max(symbol_counts), max(year_counts), seed=seed, fmt='csv')
+        for n_symbols in symbol_counts:
+            pd.DataFrame({'symbol': symbols[:n_symbols]}).to_csv(
+                os.path.join(data_dir, f"universe_{n_symbols}.csv"), index=False
+            )
+
+        set_provider(create_provider('replay', data_dir=data_dir))
+        # backtest_clean_energy writes its report relative to the working directory
+        os.chdir(work_dir)
+        with override_settings(BAR_STORE_DIR=os.path.join(work_dir, 'bars')):
+            for engine in engines:
+                for n_symbols in symbol_counts:
+                    for years in year_counts:
+                        dates = trading_days(years)
+                        start_date, end_date = dates[0].date(), dates[-1].date()
+                        seconds, peak_mb = measure(engine, data_dir, symbols[:n_symbols], start_date, end_date, repeat)
+                        bars = n_symbols * len(dates)
+                        name = case_name(engine, n_symbols, years)
+                        results[name] = {
+                            'symbols': n_symbols,
+                            'years': years,
+                            'bars': bars,
+                            'seconds': round(seconds, 4),
+                            'bars_per_sec': round(bars / seconds, 1),
+                            'peak_mb': round(peak_mb, 2),
+                        }
+                        log(f"  {name:28s} {seconds:9.3f}s {bars / seconds:14,.0f} bars/s {peak_mb:9.1f} MB")
+    finally:
+        os.chdir(previous_cwd)
+        set_provider(previous_provider)
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return results
+
+
+def load_baseline(path):
+    with open(path) as f:
+        return json.load(f)['cases']
+
+
+def save_baseline(path, results):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump({
+            'machine': f"{platform.machine()} {platform.processor() or platform.system()}, {os.cpu_count()} CPUs",
+            'python': platform.python_version(),
+            'cases': results,
+        }, f, indent=2, sort_keys=True)
+
+
+def find_regressions(results, baseline, tolerance):
+    """
+    Cases whose throughput fell or whose peak memory grew by more than
+    tolerance (0.25 = 25%) relative to the baseline. Cases missing from the
+    baseline are not compared.
+    """
+    regressions = []
+    for name, result in results.items():
+        expected = baseline.get(name)
+        if not expected:
+            continue
+        if result['bars_per_sec'] < expected['bars_per_sec'] * (1 - tolerance):
+            regressions.append(f"{name}: {result['bars_per_sec']:,.0f} bars/s vs baseline {expected['bars_per_sec']:,.0f}")
+        if result['peak_mb'] > expected['peak_mb'] * (1 + tolerance) + MEMORY_SLACK_MB:
+            regressions.append(f"{name}: peak {result['peak_mb']:.1f} MB vs baseline {expected['peak_mb']:.1f} MB")
+    return regressions
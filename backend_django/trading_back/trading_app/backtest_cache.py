@@ -0,0 +1,133 @@
+"""
+Backtest result cache
+Stores finished backtest results on disk keyed by everything that can change
+them: engine, strategy flags, risk config, buy threshold, capital, date
+window and a fingerprint of the bars (and index events) inside that window.
+When the bar store re-fetches or extends bars, or the index event files
+change, the fingerprint changes, so stale results are never served. The directory is bounded in size with least-recently-used
+eviction.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import threading
+from decimal import Decimal
+
+import pandas as pd
+from django.conf import settings
+
+from trading_app.market_data.bar_store import bar_store
+
+
+STRATEGY_FLAGS = ('use_pivot', 'use_prediction', 'use_screener', 'use_index_rebalancing')
+
+
+def bars_fingerprint(symbols, start_date, end_date, store=None):
+    """Hash of the bars each symbol has inside [start_date, end_date]"""
+    store = store or bar_store
+    store.prefetch(symbols, start_date, end_date)
+    digest = hashlib.sha256()
+    for symbol in symbols:
+        bars = store.get_bars(symbol, start_date, end_date)
+        digest.update(symbol.encode())
+        digest.update(pd.util.hash_pandas_object(bars, index=False).values.tobytes())
+    return digest.hexdigest()
+
+
+def backtest_key(backtester):
+    """Cache key of a HermesBotBacktester (or subclass) before it runs"""
+    config = backtester.config
+    symbols = list(getattr(backtester, 'symbols', config['stocks']))
+    payload = {
+        'engine': type(backtester).__name__,
+        'flags': {flag: bool(getattr(backtester.bot, flag)) for flag in STRATEGY_FLAGS},
+        'config': {name: str(value) for name, value in sorted(config.items()) if name != 'stocks'},
+        'watchlist': list(config['stocks']),
+        'symbols': symbols,
+        'buy_threshold': backtester.buy_threshold,
+        'initial_capital': str(Decimal(str(backtester.bot.initial_capital)).normalize()),
+        'start_date': backtester.start_date.isoformat(),
+        'end_date': backtester.end_date.isoformat(),
+        'bars': bars_fingerprint(symbols, backtester.start_date, backtester.end_date),
+        'index_events': backtester.index_events.fingerprint(symbols, backtester.start_date, backtester.end_date)
+        if backtester.index_events is not None else None,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+class BacktestResultCache:
+    """Pickled backtest results in one file per key, evicted least-recently-used by total size"""
+
+    def __init__(self, root=None, max_bytes=None):
+        self._root = root
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    @property
+    def root(self):
+        return str(self._root or settings.BACKTEST_CACHE_DIR)
+
+    @property
+    def max_bytes(self):
+        return self._max_bytes or settings.BACKTEST_CACHE_MAX_BYTES
+
+    def path_for(self, key):
+        return os.path.join(self.root, f"{key}.pkl")
+
+    def get(self, key):
+        """Return the cached results for key, or None"""
+        path = self.path_for(key)
+        try:
+            with open(path, 'rb') as f:
+                results = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Discarding unreadable backtest cache entry {key}: {e}")
+            self.delete(key)
+            return None
+        # The modification time doubles as the last-used time for eviction
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return results
+
+    def put(self, key, results):
+        """Store results for key and evict the least recently used entries over the size bound"""
+        os.makedirs(self.root, exist_ok=True)
+        path = self.path_for(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(results, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def delete(self, key):
+        try:
+            os.remove(self.path_for(key))
+        except FileNotFoundError:
+            pass
+
+    def evict(self):
+        with self._lock:
+            entries = []
+            for entry in os.scandir(self.root):
+                if entry.name.endswith('.pkl'):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+
+
+# Shared cache used by run_backtest_for_bot
+backtest_cache = BacktestResultCache()
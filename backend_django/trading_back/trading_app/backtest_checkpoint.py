@@ -0,0 +1,74 @@
+"""
+Backtest checkpoints
+A long backtest periodically pickles its trading state (cash, positions,
+counters, trade journal and equity curve so far, and the index of the last
+finished day) to one file per run. The file is named after the backtest
+cache key, so only a run with the same engine, settings, window and bars
+can resume from it. Checkpoints are written at most once per
+BACKTEST_CHECKPOINT_INTERVAL seconds, which keeps their cost to a small
+fraction of the run however many days it covers.
+"""
+
+import os
+import pickle
+import threading
+import time
+
+from django.conf import settings
+
+
+CHECKPOINT_VERSION = 1
+
+
+class BacktestCheckpointer:
+    """Saves and restores the state of one backtest run"""
+
+    def __init__(self, key, root=None, interval=None):
+        self.key = key
+        self._root = root
+        self.interval = settings.BACKTEST_CHECKPOINT_INTERVAL if interval is None else interval
+        self._last_saved = time.monotonic()
+        self.saves = 0
+
+    @property
+    def root(self):
+        return str(self._root or settings.BACKTEST_CHECKPOINT_DIR)
+
+    @property
+    def path(self):
+        return os.path.join(self.root, f"{self.key}.ckpt")
+
+    def due(self):
+        """True once the checkpoint interval has passed since the last save"""
+        return time.monotonic() - self._last_saved >= self.interval
+
+    def load(self):
+        """Return the saved state, or None when there is no usable checkpoint"""
+        try:
+            with open(self.path, 'rb') as f:
+                state = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Discarding unreadable backtest checkpoint {self.key[:12]}: {e}")
+            self.clear()
+            return None
+        if state.get('version') != CHECKPOINT_VERSION:
+            return None
+        return state
+
+    def save(self, state):
+        """Atomically replace the checkpoint file with state"""
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump({'version': CHECKPOINT_VERSION, **state}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.path)
+        self._last_saved = time.monotonic()
+        self.saves += 1
+
+    def clear(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
@@ -1,63 +1,73 @@
-import os, pandas as pd
-from .ml_models.pivot import PivotStrategy
-from .ml_models.nextday_prediction import NextDayPredictor
+import os, numpy as np, pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from .ml_models.vectorized import PIVOT_SIGNALS, PREDICTION_DOWN, pivot_signal_codes, prediction_codes, py_round
 
-def run_backtest(universe_csv, price_dir, start_date, end_date, use_predictor=True):
-    piv = PivotStrategy()
-    pred = NextDayPredictor()
+ENTRY_SIGNALS = np.flatnonzero(np.isin(PIVOT_SIGNALS, ['BUY', 'STRONG_BUY', 'HOLD_BULLISH']))
+TRADE_COLUMNS = ['symbol', 'trade_date', 'entry', 'exit', 'ret_pct', 'outcome']
+
+
+def symbol_trades(symbol, price_dir, start_date, end_date, use_predictor=True):
+    """Trades for one symbol: day i's signal enters at day i+1's open and exits at TP/SL/EOD"""
+    fpath = os.path.join(price_dir, f"{symbol}.csv")
+    if not os.path.exists(fpath):
+        return None
+    df = pd.read_csv(fpath, parse_dates=['date'])
+    df = df[(df['date'] >= start_date) & (df['date'] <= end_date)].sort_values('date').reset_index(drop=True)
+    if len(df) < 2:
+        return None
+
+    o, hi, lo, cl = (df[col].values for col in ('open', 'high', 'low', 'close'))
+
+    # Signal day i (all but the last row) trades on day i+1
+    signal = pivot_signal_codes(hi[:-1], lo[:-1], cl[:-1])
+    take = np.isin(signal, ENTRY_SIGNALS)
+    if use_predictor:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            prediction, _ = prediction_codes(o[:-1], hi[:-1], lo[:-1], cl[:-1])
+        take &= prediction != PREDICTION_DOWN
+
+    day = np.flatnonzero(take) + 1
+    entry = o[day].astype('float64')
+    tp = entry * 1.04
+    sl = entry * 0.97
+    h_n, l_n, c_n = (a[day].astype('float64') for a in (hi, lo, cl))
+
+    hit_tp = h_n >= tp
+    hit_sl = ~hit_tp & (l_n <= sl)
+    exit_px = np.where(hit_tp, tp, np.where(hit_sl, sl, c_n))
+    outcome = np.where(hit_tp, 'TP', np.where(hit_sl, 'SL', 'EOD'))
+    ret = (exit_px - entry) / entry
+
+    return pd.DataFrame({
+        'symbol': symbol,
+        'trade_date': df['date'].values[day].astype('datetime64[D]').astype(str),
+        'entry': py_round(entry, 4),
+        'exit': py_round(exit_px, 4),
+        'ret_pct': py_round(ret * 100, 3),
+        'outcome': outcome,
+    }, columns=TRADE_COLUMNS)
+
+
+def _symbol_trades(args):
+    return symbol_trades(*args)
+
+
+def run_backtest(universe_csv, price_dir, start_date, end_date, use_predictor=True, workers=None):
     uni = pd.read_csv(universe_csv)
-    results = []
-
-    for _, row in uni.iterrows():
-        symbol = row['symbol']
-        fpath = os.path.join(price_dir, f"{symbol}.csv")
-        if not os.path.exists(fpath): 
-            continue
-        df = pd.read_csv(fpath, parse_dates=['date'])
-        df = df[(df['date'] >= start_date) & (df['date'] <= end_date)].sort_values('date').reset_index(drop=True)
-        if len(df) < 2:
-            continue
-
-        # Iterate signals: day i generates trade on day i+1
-        for i in range(len(df)-1):
-            hi, lo, cl = df.loc[i, ['high','low','close']]
-            o_n, h_n, l_n, c_n = df.loc[i+1, ['open','high','low','close']]
-
-            signal = piv.predict(hi, lo, cl)['signal']
-
-            if use_predictor:
-                p = pred.predict(symbol, df.loc[i,'open'], hi, lo, cl, int(df.loc[i,'volume']))
-                if p['prediction'] == 'DOWN':
-                    continue
-
-            if signal in ('BUY','STRONG_BUY','HOLD_BULLISH'):
-                entry = float(o_n)
-                tp = entry * 1.04
-                sl = entry * 0.97
-
-                if float(h_n) >= tp:
-                    exit_px = tp
-                    outcome = 'TP'
-                elif float(l_n) <= sl:
-                    exit_px = sl
-                    outcome = 'SL'
-                else:
-                    exit_px = float(c_n)
-                    outcome = 'EOD'
-
-                ret = (exit_px - entry) / entry
-                results.append({
-                    'symbol': symbol,
-                    'trade_date': str(df.loc[i+1,'date'].date()),
-                    'entry': round(entry, 4),
-                    'exit': round(exit_px, 4),
-                    'ret_pct': round(ret*100, 3),
-                    'outcome': outcome
-                })
-
-    res = pd.DataFrame(results)
-    if res.empty:
+    tasks = [(symbol, price_dir, start_date, end_date, use_predictor) for symbol in uni['symbol']]
+
+    # Symbols are independent, so large universes are spread over a process pool
+    workers = min(workers or os.cpu_count() or 1, len(tasks))
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            frames = list(pool.map(_symbol_trades, tasks, chunksize=max(1, len(tasks) // (workers * 4))))
+    else:
+        frames = [_symbol_trades(task) for task in tasks]
+
+    frames = [f for f in frames if f is not None and not f.empty]
+    if not frames:
         return {'message': 'No trades generated'}
+    res = pd.concat(frames, ignore_index=True)
 
     # Summary
     win_rate = (res['ret_pct'] > 0).mean() * 100
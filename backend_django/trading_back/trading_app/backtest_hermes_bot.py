@@ -9,7 +9,6 @@ import django
 from datetime import datetime, timedelta
 from decimal import Decimal
 import pandas as pd
-import yfinance as yf
 
 # Setup Django
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -20,16 +19,33 @@ from trading_app.models import User, AutoTradingBot
 from trading_app.auto_trading_engine import AutoTradingEngine
 from trading_app.ml_models.pivot import PivotStrategy
 from trading_app.ml_models.nextday_prediction import NextDayPredictor
+from trading_app.ml_models.vectorized import PREDICTIONS
 from trading_app.ml_models.stock_screener import StockScreener
 from trading_app.ml_models.index_rebalancing import IndexRebalancingStrategy
+from trading_app.market_data.bar_store import bar_store
+from trading_app.market_data.index_events import index_event_store
+from trading_app.backtest_cache import backtest_cache, backtest_key
+from trading_app.backtest_checkpoint import BacktestCheckpointer
+from trading_app.trade_journal import EquityCurve, TradeJournal, REASON_END, REASON_STOP_LOSS, REASON_TAKE_PROFIT
+
+
+# Score each index event action adds: (score, points). SHORT counts as a sell signal (the bot is long-only)
+INDEX_ACTION_SCORES = {
+    'BUY': ('buy', 2),
+    'BUY_REBOUND': ('buy', 1),
+    'HOLD': ('hold', 1),
+    'SELL': ('sell', 1),
+    'SHORT': ('sell', 1),
+}
 
 
 class HermesBotBacktester:
     """Backtest the Hermes AI Trading Bot"""
     
-    def __init__(self, bot, start_date=None, end_date=None):
+    def __init__(self, bot, start_date=None, end_date=None, config=None, buy_threshold=2):
         self.bot = bot
-        self.config = AutoTradingEngine.RISK_CONFIG[bot.risk_level]
+        self.config = config or AutoTradingEngine.RISK_CONFIG[bot.risk_level]
+        self.buy_threshold = buy_threshold  # minimum buy score to open a position
         
         # Set default dates (1 week backtest)
         if not end_date:
@@ -45,12 +61,14 @@ class HermesBotBacktester:
         self.predictor = NextDayPredictor()
         self.screener = StockScreener()
         self.index_strategy = IndexRebalancingStrategy()
+        # Point-in-time index additions / deletions (None: strategy disabled)
+        self.index_events = index_event_store.current() if bot.use_index_rebalancing else None
         
         # Trading state
         self.cash = bot.initial_capital
         self.positions = {}  # {stock: {'quantity': int, 'entry_price': Decimal, 'entry_date': date}}
-        self.trades = []
-        self.daily_portfolio_values = []
+        self.trades = TradeJournal()
+        self.daily_portfolio_values = EquityCurve()
         
         # Performance metrics
         self.total_trades = 0
@@ -58,18 +76,17 @@ class HermesBotBacktester:
         self.losing_trades = 0
         self.total_profit_loss = Decimal('0.00')
         
+        # Set by run_cached to checkpoint long runs (None: no checkpoints)
+        self.checkpointer = None
+        
     def get_stock_data(self, symbol, start_date, end_date):
-        """Fetch historical stock data using yfinance"""
+        """Load historical stock data from the local bar store (fetches only missing days)"""
         try:
-            ticker = yf.Ticker(symbol)
-            df = ticker.history(start=start_date, end=end_date + timedelta(days=1))
+            df = bar_store.get_bars(symbol, start_date, end_date)
             if df.empty:
                 return None
             
-            df.reset_index(inplace=True)
-            df['Date'] = pd.to_datetime(df['Date']).dt.date
-            df = df[['Date', 'Open', 'High', 'Low', 'Close', 'Volume']]
-            df.columns = ['date', 'open', 'high', 'low', 'close', 'volume']
+            df['date'] = df['date'].dt.date
             return df
         except Exception as e:
             print(f"Error fetching data for {symbol}: {e}")
@@ -94,7 +111,7 @@ class HermesBotBacktester:
         return max(1, quantity), position_value
     
     def execute_buy(self, symbol, price, date, reason):
-        """Execute a buy order"""
+        """Execute a buy order; reason is a tuple of (strategy, signal) pairs or text"""
         quantity, cost = self.calculate_position_size(price)
         
         if cost > self.cash:
@@ -120,15 +137,7 @@ class HermesBotBacktester:
             }
         
         self.total_trades += 1
-        self.trades.append({
-            'date': date,
-            'symbol': symbol,
-            'action': 'BUY',
-            'quantity': quantity,
-            'price': Decimal(str(price)),
-            'cost': cost,
-            'reason': reason
-        })
+        self.trades.record_buy(date, symbol, quantity, float(price), float(cost), reason)
         
         return True
     
@@ -156,17 +165,8 @@ class HermesBotBacktester:
         
         self.total_profit_loss += profit_loss
         
-        self.trades.append({
-            'date': date,
-            'symbol': symbol,
-            'action': 'SELL',
-            'quantity': quantity,
-            'price': Decimal(str(price)),
-            'proceeds': proceeds,
-            'entry_price': entry_price,
-            'profit_loss': profit_loss,
-            'reason': reason
-        })
+        self.trades.record_sell(date, symbol, quantity, float(price), float(proceeds),
+                                float(entry_price), float(profit_loss), reason)
         
         return True
     
@@ -185,15 +185,27 @@ class HermesBotBacktester:
         stop_loss_pct = self.config['stop_loss'] * 100
         take_profit_pct = self.config['take_profit'] * 100
         
+        # The journal formats the triggered P/L percentage when the trade is read
         if pnl_pct <= -stop_loss_pct:
-            self.execute_sell(symbol, current_price, date, f'Stop Loss triggered ({pnl_pct:.2f}%)')
+            self.execute_sell(symbol, current_price, date, REASON_STOP_LOSS)
             return True
         elif pnl_pct >= take_profit_pct:
-            self.execute_sell(symbol, current_price, date, f'Take Profit triggered ({pnl_pct:.2f}%)')
+            self.execute_sell(symbol, current_price, date, REASON_TAKE_PROFIT)
             return True
         
         return False
     
+    def add_predictions(self, data):
+        """
+        Add next-day prediction columns to a symbol's bars with one
+        predict_batch call. Bars predict would raise on are left invalid and
+        go through predict itself in analyze_stock.
+        """
+        batch = self.predictor.predict_batch(data)
+        data['prediction'] = PREDICTIONS[batch['prediction']].tolist()
+        data['prediction_confidence'] = batch['confidence']
+        data['prediction_valid'] = batch['valid']
+    
     def analyze_stock(self, symbol, data_row, date):
         """Analyze stock using all ML strategies"""
         signals = []
@@ -222,16 +234,21 @@ class HermesBotBacktester:
         # 2. Next-Day Prediction
         if self.bot.use_prediction:
             try:
-                pred_result = self.predictor.predict(
-                    symbol,
-                    float(data_row['open']),
-                    float(data_row['high']),
-                    float(data_row['low']),
-                    float(data_row['close']),
-                    int(data_row['volume'])
-                )
-                prediction = pred_result['prediction']
-                confidence = pred_result['confidence']
+                if data_row.get('prediction_valid', False):
+                    # Precomputed for the whole symbol by add_predictions
+                    prediction = data_row['prediction']
+                    confidence = data_row['prediction_confidence']
+                else:
+                    pred_result = self.predictor.predict(
+                        symbol,
+                        float(data_row['open']),
+                        float(data_row['high']),
+                        float(data_row['low']),
+                        float(data_row['close']),
+                        int(data_row['volume'])
+                    )
+                    prediction = pred_result['prediction']
+                    confidence = pred_result['confidence']
                 signals.append(('PREDICTION', prediction, f"{confidence}% confidence"))
                 
                 if prediction == 'UP' and confidence >= 70:
@@ -247,14 +264,25 @@ class HermesBotBacktester:
                 scores['buy'] += 1
                 signals.append(('SCREENER', 'PASS', 'In watchlist'))
         
-        # 4. Index Rebalancing (simplified - random events for demo)
-        if self.bot.use_index_rebalancing:
-            # In real scenario, this would check for actual index events
-            # For backtest, we'll skip this or use historical events
-            pass
+        # 4. Index Rebalancing: reconstitution events active for the symbol on this day
+        if self.index_events is not None:
+            for event in self.index_events.active(symbol, date):
+                action, rationale = self.index_signal(event, date, float(data_row['close']))
+                signals.append(('INDEX', action, rationale))
+                if action in INDEX_ACTION_SCORES:
+                    side, points = INDEX_ACTION_SCORES[action]
+                    scores[side] += points
         
         return signals, scores
     
+    def index_signal(self, event, date, price):
+        """(action, rationale) of an index event as seen on date"""
+        result = self.index_strategy.analyze_event(
+            event.symbol, event.event_type, event.announcement_date,
+            event.effective_date, price, event.index_name, as_of=date
+        )
+        return result['action'], result['rationale']
+    
     def calculate_portfolio_value(self, current_prices):
         """Calculate total portfolio value"""
         positions_value = Decimal('0.00')
@@ -263,8 +291,7 @@ class HermesBotBacktester:
                 positions_value += Decimal(str(current_prices[symbol])) * position['quantity']
         return self.cash + positions_value
     
-    def run_backtest(self):
-        """Run the backtest"""
+    def print_header(self):
         print(f"\n{'='*80}")
         print(f"HERMES BOT BACKTEST")
         print(f"{'='*80}")
@@ -274,18 +301,103 @@ class HermesBotBacktester:
         print(f"Period: {self.start_date} to {self.end_date}")
         print(f"Watchlist: {', '.join(self.config['stocks'][:5])}...")
         print(f"{'='*80}\n")
-        
-        # Get trading dates (weekdays only)
+    
+    def get_trading_dates(self):
+        """Trading dates (weekdays only)"""
         current_date = self.start_date
         trading_dates = []
         while current_date <= self.end_date:
             if current_date.weekday() < 5:  # Monday = 0, Friday = 4
                 trading_dates.append(current_date)
             current_date += timedelta(days=1)
+        return trading_dates
+    
+    def resume_checkpoint(self, trading_dates):
+        """
+        Restore the state saved by an interrupted run of this backtest.
+        Returns (index of the first day still to run, engine state saved with it).
+        """
+        state = self.checkpointer.load() if self.checkpointer else None
+        if not state or state['engine_class'] != type(self).__name__ or state['days'] != len(trading_dates):
+            return 0, None
+        
+        self.cash = state['cash']
+        self.positions = state['positions']
+        self.trades = state['trades']
+        self.daily_portfolio_values = state['daily_values']
+        self.total_trades = state['total_trades']
+        self.winning_trades = state['winning_trades']
+        self.losing_trades = state['losing_trades']
+        self.total_profit_loss = state['total_profit_loss']
+        day_idx = state['day']
+        print(f"Resuming from checkpoint after day {day_idx + 1}/{len(trading_dates)} "
+              f"({trading_dates[day_idx]}, {len(self.trades)} trades)")
+        return day_idx + 1, state['engine']
+    
+    def save_checkpoint(self, day_idx, trading_dates, engine_state=None):
+        """
+        Checkpoint the state after day_idx once the checkpoint interval has
+        passed. engine_state is a callable returning extra engine-specific
+        state; it is only called when a checkpoint is actually written.
+        """
+        if self.checkpointer is None or not self.checkpointer.due():
+            return
+        self.checkpointer.save({
+            'engine_class': type(self).__name__,
+            'day': day_idx,
+            'days': len(trading_dates),
+            'cash': self.cash,
+            'positions': self.positions,
+            'trades': self.trades,
+            'daily_values': self.daily_portfolio_values,
+            'total_trades': self.total_trades,
+            'winning_trades': self.winning_trades,
+            'losing_trades': self.losing_trades,
+            'total_profit_loss': self.total_profit_loss,
+            'engine': engine_state() if engine_state else None,
+        })
+    
+    def close_all_positions(self, last_prices):
+        """Close all remaining positions at end at the last available price"""
+        print(f"\nClosing remaining positions...")
+        for symbol in list(self.positions.keys()):
+            if symbol in last_prices:
+                final_price = last_prices[symbol]
+                self.execute_sell(symbol, final_price, self.end_date, REASON_END)
+                print(f"  ✓ SELL {symbol} @ ${final_price:.2f} - End of backtest")
+    
+    def finish(self):
+        """Calculate final metrics, print the report and build the results dict"""
+        final_value = self.cash
+        total_return = final_value - self.bot.initial_capital
+        roi = (total_return / self.bot.initial_capital) * 100 if self.bot.initial_capital > 0 else 0
+        win_rate = (self.winning_trades / self.total_trades * 100) if self.total_trades > 0 else 0
+        
+        # Generate report
+        self.generate_report(final_value, total_return, roi, win_rate)
+        
+        return {
+            'final_value': float(final_value),
+            'total_return': float(total_return),
+            'roi': float(roi),
+            'total_trades': self.total_trades,
+            'winning_trades': self.winning_trades,
+            'losing_trades': self.losing_trades,
+            'win_rate': float(win_rate),
+            'trades': self.trades,
+            'daily_values': self.daily_portfolio_values
+        }
+    
+    def run_backtest(self):
+        """Run the backtest"""
+        self.print_header()
+        trading_dates = self.get_trading_dates()
         
         # Fetch data for all stocks in watchlist
         stock_data = {}
         print("Fetching stock data...")
+        # Download every missing range for the watchlist in bulk; the loop below reads from disk
+        bar_store.prefetch(self.config['stocks'], self.start_date, self.end_date)
         for symbol in self.config['stocks']:
             data = self.get_stock_data(symbol, self.start_date, self.end_date)
             if data is not None and not data.empty:
@@ -295,11 +407,16 @@ class HermesBotBacktester:
         if not stock_data:
             print("ERROR: No stock data available for backtest")
             return None
+        if self.bot.use_prediction:
+            for data in stock_data.values():
+                self.add_predictions(data)
         
         # Run backtest day by day
         print(f"\nRunning backtest for {len(trading_dates)} trading days...\n")
+        start_idx, _ = self.resume_checkpoint(trading_dates)
         
-        for day_idx, date in enumerate(trading_dates):
+        for day_idx in range(start_idx, len(trading_dates)):
+            date = trading_dates[day_idx]
             print(f"Day {day_idx + 1}/{len(trading_dates)}: {date}")
             
             # Get current prices for all stocks
@@ -331,58 +448,28 @@ class HermesBotBacktester:
                 max_score = max(scores.values())
                 action = max(scores, key=scores.get) if max_score > 0 else 'hold'
                 
-                if action == 'buy' and scores['buy'] >= 2:
+                if action == 'buy' and scores['buy'] >= self.buy_threshold:
                     signal_strength = 'STRONG' if scores['buy'] >= 3 else 'NORMAL'
-                    reason = f"ML Signals: {', '.join([f'{s[0]}({s[1]})' for s in signals])}"
-                    self.execute_buy(symbol, current_prices[symbol], date, reason)
-                    print(f"  ✓ BUY {symbol} @ ${current_prices[symbol]:.2f} - {reason}")
+                    reason = tuple((s[0], s[1]) for s in signals)
+                    if self.execute_buy(symbol, current_prices[symbol], date, reason):
+                        print(f"  ✓ BUY {symbol} @ ${current_prices[symbol]:.2f} - {self.trades[-1]['reason']}")
                 
                 elif action == 'sell' and symbol in self.positions and scores['sell'] >= 2:
-                    reason = f"ML Signals: {', '.join([f'{s[0]}({s[1]})' for s in signals])}"
-                    self.execute_sell(symbol, current_prices[symbol], date, reason)
-                    print(f"  ✓ SELL {symbol} @ ${current_prices[symbol]:.2f} - {reason}")
+                    reason = tuple((s[0], s[1]) for s in signals)
+                    if self.execute_sell(symbol, current_prices[symbol], date, reason):
+                        print(f"  ✓ SELL {symbol} @ ${current_prices[symbol]:.2f} - {self.trades[-1]['reason']}")
             
             # Calculate portfolio value
             portfolio_value = self.calculate_portfolio_value(current_prices)
-            self.daily_portfolio_values.append({
-                'date': date,
-                'cash': float(self.cash),
-                'positions_value': float(portfolio_value - self.cash),
-                'total_value': float(portfolio_value)
-            })
+            self.daily_portfolio_values.append(date, float(self.cash), float(portfolio_value - self.cash))
+            self.save_checkpoint(day_idx, trading_dates)
         
         # Close all remaining positions at end
-        print(f"\nClosing remaining positions...")
-        final_prices = {}
-        for symbol in list(self.positions.keys()):
-            # Get last available price
-            if symbol in stock_data:
-                last_row = stock_data[symbol].iloc[-1]
-                final_price = float(last_row['close'])
-                final_prices[symbol] = final_price
-                self.execute_sell(symbol, final_price, self.end_date, 'End of backtest')
-                print(f"  ✓ SELL {symbol} @ ${final_price:.2f} - End of backtest")
-        
-        # Calculate final metrics
-        final_value = self.cash
-        total_return = final_value - self.bot.initial_capital
-        roi = (total_return / self.bot.initial_capital) * 100 if self.bot.initial_capital > 0 else 0
-        win_rate = (self.winning_trades / self.total_trades * 100) if self.total_trades > 0 else 0
-        
-        # Generate report
-        self.generate_report(final_value, total_return, roi, win_rate)
+        self.close_all_positions({
+            symbol: float(df.iloc[-1]['close']) for symbol, df in stock_data.items()
+        })
         
-        return {
-            'final_value': float(final_value),
-            'total_return': float(total_return),
-            'roi': float(roi),
-            'total_trades': self.total_trades,
-            'winning_trades': self.winning_trades,
-            'losing_trades': self.losing_trades,
-            'win_rate': float(win_rate),
-            'trades': self.trades,
-            'daily_values': self.daily_portfolio_values
-        }
+        return self.finish()
     
     def generate_report(self, final_value, total_return, roi, win_rate):
         """Generate backtest report"""
@@ -422,8 +509,42 @@ class HermesBotBacktester:
             print(f"{'-'*80}\n")
 
 
-def run_backtest_for_bot(bot_id=None, risk_level='MEDIUM', investment_amount=1000):
-    """Run backtest for a specific bot or create a test bot"""
+def run_cached(backtester, use_cache=True, checkpoint=True, resume=False):
+    """
+    Run a backtester, serving identical runs on unchanged bars from the
+    backtest result cache. With checkpoint the run periodically saves its
+    state; with resume it continues from the last state saved by an
+    interrupted run of the same backtest instead of starting from day one.
+    """
+    results = None
+    cache_key = backtest_key(backtester) if use_cache or checkpoint or resume else None
+    if use_cache:
+        results = backtest_cache.get(cache_key)
+        if results:
+            print(f"\n✓ Using cached backtest results ({cache_key[:12]})")
+    if results is None:
+        if checkpoint or resume:
+            backtester.checkpointer = BacktestCheckpointer(cache_key)
+            if not resume:
+                backtester.checkpointer.clear()
+        results = backtester.run_backtest()
+        if backtester.checkpointer:
+            backtester.checkpointer.clear()
+        if results and use_cache:
+            backtest_cache.put(cache_key, results)
+    return results
+
+
+def run_backtest_for_bot(bot_id=None, risk_level='MEDIUM', investment_amount=1000,
+                         start_date=None, end_date=None, backtester_class=HermesBotBacktester,
+                         use_cache=True, resume=False):
+    """
+    Run backtest for a specific bot or create a test bot.
+    Defaults to the last week; backtester_class selects the engine
+    (e.g. VectorizedHermesBacktester for long periods). Identical runs on
+    unchanged bars are served from the backtest result cache, and resume
+    continues an interrupted run from its last checkpoint.
+    """
     
     # Get or create test user
     test_user, _ = User.objects.get_or_create(
@@ -465,11 +586,11 @@ def run_backtest_for_bot(bot_id=None, risk_level='MEDIUM', investment_amount=100
         print(f"Created test bot: {bot.name} (ID: {bot.id})")
     
     # Run backtest
-    end_date = datetime.now().date()
-    start_date = end_date - timedelta(days=7)
+    end_date = end_date or datetime.now().date()
+    start_date = start_date or end_date - timedelta(days=7)
     
-    backtester = HermesBotBacktester(bot, start_date, end_date)
-    results = backtester.run_backtest()
+    backtester = backtester_class(bot, start_date, end_date)
+    results = run_cached(backtester, use_cache, resume=resume)
     
     # Update bot with results
     if results:
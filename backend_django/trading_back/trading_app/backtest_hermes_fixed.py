@@ -0,0 +1,198 @@
+"""
+Fixed-point backtest engine for Hermes AI Trading Bot
+Same signals and trading rules as VectorizedHermesBacktester, but cash,
+prices, costs and P/L are kept as int64 ticks (1/10000 of a dollar) in the
+hot loop instead of Decimal objects. Prices are rounded half-even to the
+tick once when the matrix is loaded, costs are rounded half-even to the tick
+and stop loss / take profit thresholds are compared exactly as integer
+ratios. Decimal values are only built when the results are reported and
+trades are read from the journal.
+
+Results are not bit-identical to the Decimal engines. Those keep position
+costs at full Decimal precision, while this engine rounds each cost to the
+tick, so every buy moves cash by up to half a tick. The next buy spends a
+fixed share of cash, max_position_size * 0.7, so the drift stays below half
+a tick divided by that share, under 4 ticks for every risk level. On bars
+priced on the tick grid (cents), trades are the same and costs, cash, daily
+values and the final value agree to within FIXED_POINT_TOLERANCE. Finer
+prices are also rounded to the tick, which moves proceeds and P/L by up to
+half a tick per share. A share count or a stop loss / take profit decision
+that lies exactly on a boundary can then flip.
+"""
+
+from decimal import Decimal, ROUND_HALF_EVEN
+
+import numpy as np
+
+from trading_app.backtest_hermes_vectorized import VectorizedHermesBacktester, load_market_matrix
+from trading_app.trade_journal import EquityCurve, REASON_END, REASON_STOP_LOSS, REASON_TAKE_PROFIT
+
+
+TICKS_PER_DOLLAR = 10000
+TICK_EXPONENT = -4
+# Largest difference in any dollar amount from the Decimal engines on tick-grid prices (see above)
+FIXED_POINT_TOLERANCE = Decimal('0.0005')
+
+# Position cost as a share of cash for a NORMAL signal (see calculate_position_size)
+NORMAL_POSITION_MULTIPLIER = Decimal('0.7')
+
+
+def to_ticks(value):
+    """Round a dollar amount half-even to an integer number of ticks"""
+    return int(Decimal(str(value)).scaleb(-TICK_EXPONENT).to_integral_value(ROUND_HALF_EVEN))
+
+
+def from_ticks(ticks):
+    """Exact Decimal dollar amount of an integer number of ticks"""
+    return Decimal(int(ticks)).scaleb(TICK_EXPONENT)
+
+
+def div_round(numerator, denominator):
+    """Integer division rounded half-even, like Decimal quantize"""
+    quotient, remainder = divmod(numerator, denominator)
+    if 2 * remainder > denominator or (2 * remainder == denominator and quotient % 2):
+        quotient += 1
+    return quotient
+
+
+def price_ticks(prices):
+    """Float price matrix to int64 ticks (half-even); cells without a bar become 0"""
+    ticks = np.rint(np.nan_to_num(prices) * TICKS_PER_DOLLAR)
+    return ticks.astype(np.int64)
+
+
+class FixedPointHermesBacktester(VectorizedHermesBacktester):
+    """
+    VectorizedHermesBacktester with integer tick accounting. Trades match the
+    Decimal engines and amounts agree to within FIXED_POINT_TOLERANCE, except
+    where rounding a price to 1/10000 of a dollar moves a share count or a
+    stop loss / take profit decision across its boundary.
+    """
+
+    def run_backtest(self, market=None, scores=None):
+        """
+        Run the backtest, optionally on a MarketMatrix already loaded for the
+        same period and with score_market(market) already computed for it
+        """
+        self.print_header()
+        trading_dates = self.get_trading_dates()
+
+        if market is None:
+            print("Fetching stock data...")
+            market = load_market_matrix(self.symbols, trading_dates, self.start_date, self.end_date)
+        if market is None:
+            print("ERROR: No stock data available for backtest")
+            return None
+        print(f"  ✓ {len(market.symbols)} symbols x {len(trading_dates)} days")
+
+        print(f"\nRunning fixed-point backtest for {len(trading_dates)} trading days...\n")
+        buy_mask, pivot, prediction, prediction_valid, screened, index_actions = scores or self.score_market(market)
+
+        symbols = market.symbols
+        close = price_ticks(market.close)
+        last_close = price_ticks(market.last_close)
+        has_bar_matrix = market.has_bar
+        n_symbols = len(symbols)
+
+        # Risk settings as exact integer ratios
+        position_num, position_den = (self.config['max_position_size'] * NORMAL_POSITION_MULTIPLIER).as_integer_ratio()
+        stop_loss_num, stop_loss_den = Decimal(self.config['stop_loss']).as_integer_ratio()
+        take_profit_num, take_profit_den = Decimal(self.config['take_profit']).as_integer_ratio()
+
+        cash = to_ticks(self.bot.initial_capital)
+        total_profit_loss = 0
+        held = np.zeros(n_symbols, dtype=bool)
+        quantity = np.zeros(n_symbols, dtype=np.int64)
+        entry_price = np.zeros(n_symbols, dtype=np.int64)
+        opened_seq = np.zeros(n_symbols, dtype=np.int64)  # positions dict insertion order
+        seq = 0
+        daily_cash = np.empty(len(trading_dates), dtype=np.int64)
+        daily_positions = np.empty(len(trading_dates), dtype=np.int64)
+
+        # Tick state lives in locals and arrays, so it rides along as the engine part of a checkpoint
+        start_day, saved = self.resume_checkpoint(trading_dates)
+        if saved:
+            cash, total_profit_loss, seq = saved['cash'], saved['total_profit_loss'], saved['seq']
+            held[:], quantity[:], entry_price[:], opened_seq[:] = saved['positions']
+            daily_cash[:start_day], daily_positions[:start_day] = saved['daily']
+
+        def tick_state(day):
+            return {
+                'cash': cash,
+                'total_profit_loss': total_profit_loss,
+                'seq': seq,
+                'positions': (held, quantity, entry_price, opened_seq),
+                'daily': (daily_cash[:day + 1], daily_positions[:day + 1]),
+            }
+
+        def sell(date, col, price, reason):
+            nonlocal cash, total_profit_loss
+            qty = int(quantity[col])
+            entry = int(entry_price[col])
+            proceeds = price * qty
+            profit_loss = (price - entry) * qty
+            cash += proceeds
+            total_profit_loss += profit_loss
+            self.total_trades += 1
+            if profit_loss > 0:
+                self.winning_trades += 1
+            else:
+                self.losing_trades += 1
+            # Tick counts divide to floats whose repr is the exact 4-decimal amount
+            self.trades.record_sell(date, symbols[col], qty, price / TICKS_PER_DOLLAR, proceeds / TICKS_PER_DOLLAR,
+                                    entry / TICKS_PER_DOLLAR, profit_loss / TICKS_PER_DOLLAR, reason)
+            held[col] = False
+            quantity[col] = 0
+
+        for day in range(start_day, len(trading_dates)):
+            date = trading_dates[day]
+            prices = close[day]
+            has_bar = has_bar_matrix[day]
+
+            # Check stop loss / take profit for existing positions:
+            # (price - entry) / entry <= -stop_loss  <=>  (price - entry) * den <= -num * entry
+            open_cols = np.flatnonzero(held & has_bar)
+            if open_cols.size:
+                change = prices[open_cols] - entry_price[open_cols]
+                stopped = change * stop_loss_den <= -stop_loss_num * entry_price[open_cols]
+                profited = change * take_profit_den >= take_profit_num * entry_price[open_cols]
+                hits = stopped | profited
+                for col, stop in sorted(zip(open_cols[hits], stopped[hits]), key=lambda hit: opened_seq[hit[0]]):
+                    sell(date, col, int(prices[col]), REASON_STOP_LOSS if stop else REASON_TAKE_PROFIT)
+
+            # Buy signals for symbols without a position
+            for col in np.flatnonzero(buy_mask[day] & ~held):
+                price = int(prices[col])
+                cost = div_round(cash * position_num, position_den)
+                if cost > cash:
+                    continue
+                qty = max(1, cost // price)
+                cash -= cost
+                self.total_trades += 1
+                self.trades.record_buy(
+                    date, symbols[col], qty, price / TICKS_PER_DOLLAR, cost / TICKS_PER_DOLLAR,
+                    self.build_signals(day, col, pivot, prediction, prediction_valid, screened, index_actions),
+                )
+                held[col] = True
+                quantity[col] = qty
+                entry_price[col] = price
+                seq += 1
+                opened_seq[col] = seq
+
+            daily_cash[day] = cash
+            daily_positions[day] = np.dot(quantity[has_bar], prices[has_bar])
+            self.save_checkpoint(day, trading_dates, lambda: tick_state(day))
+
+        # Close all remaining positions at end at the last available price
+        print(f"\nClosing remaining positions...")
+        for col in sorted(np.flatnonzero(held), key=lambda c: opened_seq[c]):
+            price = int(last_close[col])
+            sell(self.end_date, col, price, REASON_END)
+            print(f"  ✓ SELL {symbols[col]} @ ${from_ticks(price):.2f} - End of backtest")
+
+        self.cash = from_ticks(cash)
+        self.total_profit_loss = from_ticks(total_profit_loss)
+        self.daily_portfolio_values = EquityCurve.from_arrays(
+            trading_dates, daily_cash / TICKS_PER_DOLLAR, daily_positions / TICKS_PER_DOLLAR
+        )
+        return self.finish()
@@ -0,0 +1,274 @@
+"""
+Vectorized backtest engine for Hermes AI Trading Bot
+Aligns every symbol into dense (days x symbols) OHLCV matrices, scores the
+whole matrix at once and only runs the position / stop-loss state machine
+over the sparse set of days and symbols where something can happen.
+Produces the same trades as HermesBotBacktester for the same inputs.
+"""
+
+from bisect import bisect_left, bisect_right
+
+import numpy as np
+
+from trading_app.backtest_hermes_bot import INDEX_ACTION_SCORES, HermesBotBacktester
+from trading_app.market_data.bar_store import bar_store
+from trading_app.ml_models.vectorized import (
+    PIVOT_BUY_SCORE, PIVOT_HOLD_SCORE, PIVOT_SELL_SCORE, PIVOT_SIGNALS,
+    PREDICTION_DOWN, PREDICTION_UP, PREDICTIONS, pivot_signal_codes,
+)
+
+
+# Float P/L within this many percentage points of a stop loss / take profit
+# threshold is re-checked with the exact Decimal rule
+THRESHOLD_TOLERANCE = 1e-6
+
+# Signal names as plain str for the trade journal's interned reasons
+PIVOT_NAMES = PIVOT_SIGNALS.tolist()
+PREDICTION_NAMES = PREDICTIONS.tolist()
+
+
+class MarketMatrix:
+    """OHLCV bars of many symbols aligned on a common trading-day axis"""
+
+    def __init__(self, dates, symbols, open, high, low, close, volume, last_close):
+        self.dates = dates  # list of date, one per row
+        self.symbols = symbols  # list of str, one per column
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+        self.has_bar = ~np.isnan(close)
+        self.last_close = last_close  # close of each symbol's last bar, even after the last trading day
+
+    @property
+    def shape(self):
+        return self.close.shape
+
+    def select(self, symbols, start_date, end_date):
+        """
+        Sub-matrix of symbols over [start_date, end_date], as load_market_matrix
+        would build it for that window: symbols without a bar in it are dropped
+        and last_close is each symbol's last close inside it. None if empty.
+        """
+        lo, hi = bisect_left(self.dates, start_date), bisect_right(self.dates, end_date)
+        column = {symbol: col for col, symbol in enumerate(self.symbols)}
+        cols = [column[symbol] for symbol in symbols if symbol in column]
+        has_bar = self.has_bar[lo:hi][:, cols]
+        cols = [col for col, present in zip(cols, has_bar.any(axis=0)) if present]
+        if not cols:
+            return None
+
+        fields = {name: getattr(self, name)[lo:hi][:, cols] for name in ('open', 'high', 'low', 'close', 'volume')}
+        # Row of each column's last bar in the window
+        last_row = hi - lo - 1 - np.argmax(self.has_bar[lo:hi][::-1][:, cols], axis=0)
+        last_close = fields['close'][last_row, np.arange(len(cols))]
+        return MarketMatrix(self.dates[lo:hi], [self.symbols[col] for col in cols], last_close=last_close, **fields)
+
+
+def load_market_matrix(symbols, dates, start_date, end_date, store=None):
+    """
+    Build a MarketMatrix for symbols over dates from the bar store.
+    Cells without a bar are NaN; symbols without any bar are dropped.
+    """
+    store = store or bar_store
+    store.prefetch(symbols, start_date, end_date)
+
+    day_index = np.array(dates, dtype='datetime64[D]')
+    columns = []
+    for symbol in symbols:
+        bars = store.get_bars(symbol, start_date, end_date)
+        if not bars.empty:
+            columns.append((symbol, bars))
+    if not columns:
+        return None
+
+    shape = (len(dates), len(columns))
+    fields = {name: np.full(shape, np.nan) for name in ('open', 'high', 'low', 'close', 'volume')}
+    last_close = np.empty(len(columns))
+    for col, (symbol, bars) in enumerate(columns):
+        bar_days = bars['date'].values.astype('datetime64[D]')
+        rows = np.searchsorted(day_index, bar_days)
+        matched = rows < len(day_index)
+        matched[matched] = day_index[rows[matched]] == bar_days[matched]
+        for name, values in fields.items():
+            values[rows[matched], col] = bars[name].values[matched]
+        last_close[col] = bars['close'].values[-1]
+
+    return MarketMatrix(dates, [symbol for symbol, _ in columns], last_close=last_close, **fields)
+
+
+class VectorizedHermesBacktester(HermesBotBacktester):
+    """
+    Drop-in replacement for HermesBotBacktester that scores all days and
+    symbols at once. Cash and position bookkeeping still goes through the
+    Decimal execute_buy / execute_sell / check_stop_loss_take_profit methods,
+    but only for the cells that trade or sit next to a stop loss / take profit.
+    """
+
+    def __init__(self, bot, start_date=None, end_date=None, symbols=None, config=None, buy_threshold=2):
+        super().__init__(bot, start_date, end_date, config, buy_threshold)
+        # Universe to trade; the screener still only passes watchlist symbols
+        self.symbols = list(symbols or self.config['stocks'])
+
+    def score_market(self, market):
+        """
+        Return (buy_mask, pivot_codes, prediction_codes, prediction_valid, screened,
+        index_actions) where buy_mask marks the cells analyze_stock would turn into a buy
+        """
+        shape = market.shape
+        buy = np.zeros(shape, dtype=np.int8)
+        sell = np.zeros(shape, dtype=np.int8)
+        hold = np.zeros(shape, dtype=np.int8)
+        pivot = prediction = prediction_valid = screened = index_actions = None
+
+        with np.errstate(invalid='ignore'):
+            if self.bot.use_pivot:
+                pivot = pivot_signal_codes(market.high, market.low, market.close)
+                buy += PIVOT_BUY_SCORE[pivot]
+                sell += PIVOT_SELL_SCORE[pivot]
+                hold += PIVOT_HOLD_SCORE[pivot]
+
+            if self.bot.use_prediction:
+                batch = self.predictor.predict_batch(market.open, market.high, market.low, market.close)
+                prediction, prediction_valid = batch['prediction'], batch['valid']
+                confident = prediction_valid & (batch['confidence'] >= 70)
+                buy += 2 * ((prediction == PREDICTION_UP) & confident)
+                sell += (prediction == PREDICTION_DOWN) & confident
+
+            if self.bot.use_screener:
+                screened = np.isin(market.symbols, self.config['stocks'])
+                buy += screened.astype(np.int8)[np.newaxis, :]
+
+        if self.index_events is not None:
+            index_actions = self.score_index_events(market, {'buy': buy, 'sell': sell, 'hold': hold})
+
+        # max(scores, key=scores.get) prefers 'buy' on ties
+        buy_mask = market.has_bar & (buy > 0) & (buy >= self.buy_threshold) & (buy >= sell) & (buy >= hold)
+        return buy_mask, pivot, prediction, prediction_valid, screened, index_actions
+
+    def score_index_events(self, market, scores):
+        """
+        Add the points of every index event active on a cell with a bar to the
+        {'buy', 'sell', 'hold'} score matrices. Events are few, so only their
+        active days are visited. Returns {(day, col): actions} of those cells.
+        """
+        columns = {symbol.upper(): col for col, symbol in enumerate(market.symbols)}
+        # analyze_event's action only depends on the event type and the day offsets
+        known = {}
+        actions = {}
+        points = {side: ([], [], []) for side in scores}
+        for event in self.index_events.window(market.dates[0], market.dates[-1], market.symbols):
+            col = columns[event.symbol]
+            first = bisect_left(market.dates, event.announcement_date)
+            last = bisect_right(market.dates, event.end_date)
+            for day in (np.flatnonzero(market.has_bar[first:last, col]) + first).tolist():
+                date = market.dates[day]
+                key = (event.event_type, (date - event.announcement_date).days, (event.effective_date - date).days)
+                if key not in known:
+                    known[key], _ = self.index_signal(event, date, float(market.close[day, col]))
+                action = known[key]
+                actions[day, col] = actions.get((day, col), ()) + (action,)
+                if action in INDEX_ACTION_SCORES:
+                    side, score = INDEX_ACTION_SCORES[action]
+                    days, cols, values = points[side]
+                    days.append(day)
+                    cols.append(col)
+                    values.append(score)
+        for side, (days, cols, values) in points.items():
+            np.add.at(scores[side], (days, cols), np.array(values, dtype=scores[side].dtype))
+        return actions
+
+    @staticmethod
+    def build_signals(day, col, pivot, prediction, prediction_valid, screened, index_actions=None):
+        """(strategy, signal) pairs of a buy, formatted by the trade journal when read"""
+        signals = []
+        if pivot is not None:
+            signals.append(('PIVOT', PIVOT_NAMES[pivot[day, col]]))
+        if prediction is not None and prediction_valid[day, col]:
+            signals.append(('PREDICTION', PREDICTION_NAMES[prediction[day, col]]))
+        if screened is not None and screened[col]:
+            signals.append(('SCREENER', 'PASS'))
+        if index_actions:
+            signals.extend(('INDEX', action) for action in index_actions.get((day, col), ()))
+        return tuple(signals)
+
+    def run_backtest(self, market=None, scores=None):
+        """
+        Run the backtest, optionally on a MarketMatrix already loaded for the
+        same period and with score_market(market) already computed for it
+        """
+        self.print_header()
+        trading_dates = self.get_trading_dates()
+
+        if market is None:
+            print("Fetching stock data...")
+            market = load_market_matrix(self.symbols, trading_dates, self.start_date, self.end_date)
+        if market is None:
+            print("ERROR: No stock data available for backtest")
+            return None
+        print(f"  ✓ {len(market.symbols)} symbols x {len(trading_dates)} days")
+
+        print(f"\nRunning vectorized backtest for {len(trading_dates)} trading days...\n")
+        buy_mask, pivot, prediction, prediction_valid, screened, index_actions = scores or self.score_market(market)
+
+        symbols = market.symbols
+        n_symbols = len(symbols)
+        held = np.zeros(n_symbols, dtype=bool)
+        quantity = np.zeros(n_symbols)
+        entry_price = np.ones(n_symbols)
+        opened_seq = np.zeros(n_symbols, dtype=np.int64)  # positions dict insertion order
+        seq = 0
+        stop_loss_pct = float(self.config['stop_loss'] * 100)
+        take_profit_pct = float(self.config['take_profit'] * 100)
+
+        # The position arrays mirror self.positions, so a checkpoint only needs the base state
+        start_day, _ = self.resume_checkpoint(trading_dates)
+        columns = {symbol: col for col, symbol in enumerate(symbols)}
+        for symbol, position in self.positions.items():
+            col = columns[symbol]
+            held[col] = True
+            quantity[col] = position['quantity']
+            entry_price[col] = float(position['entry_price'])
+            seq += 1
+            opened_seq[col] = seq
+
+        for day in range(start_day, len(trading_dates)):
+            date = trading_dates[day]
+            prices = market.close[day]
+            has_bar = market.has_bar[day]
+
+            # Check stop loss / take profit for existing positions
+            open_cols = np.flatnonzero(held & has_bar)
+            if open_cols.size:
+                pnl_pct = (prices[open_cols] - entry_price[open_cols]) / entry_price[open_cols] * 100
+                near = (pnl_pct <= -stop_loss_pct + THRESHOLD_TOLERANCE) | (pnl_pct >= take_profit_pct - THRESHOLD_TOLERANCE)
+                for col in sorted(open_cols[near], key=lambda c: opened_seq[c]):
+                    if self.check_stop_loss_take_profit(symbols[col], float(prices[col]), date):
+                        held[col] = False
+                        quantity[col] = 0
+
+            # Buy signals for symbols without a position
+            for col in np.flatnonzero(buy_mask[day] & ~held):
+                symbol = symbols[col]
+                reason = self.build_signals(day, col, pivot, prediction, prediction_valid, screened, index_actions)
+                if not self.execute_buy(symbol, float(prices[col]), date, reason):
+                    continue
+                position = self.positions[symbol]
+                held[col] = True
+                quantity[col] = position['quantity']
+                entry_price[col] = float(position['entry_price'])
+                seq += 1
+                opened_seq[col] = seq
+
+            # Calculate portfolio value
+            cash = float(self.cash)
+            positions_value = float(np.dot(quantity[has_bar], prices[has_bar]))
+            self.daily_portfolio_values.append(date, cash, positions_value)
+            self.save_checkpoint(day, trading_dates)
+
+        self.close_all_positions({
+            symbols[col]: float(market.last_close[col]) for col in np.flatnonzero(held)
+        })
+
+        return self.finish()
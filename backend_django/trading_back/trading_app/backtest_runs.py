@@ -0,0 +1,295 @@
+"""
+Persisted backtest runs
+Clients queue a BacktestRun and get its id back immediately; the
+run_backtests worker command claims queued runs from the database, executes
+them and stores every trade and daily equity point with bulk inserts. The
+endpoints below report run status and page through the stored trades.
+"""
+
+import itertools
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from .models import AutoTradingBot, BacktestEquityPoint, BacktestRun, BacktestTrade
+from .backtest_hermes_bot import HermesBotBacktester, run_cached
+from .backtest_hermes_vectorized import VectorizedHermesBacktester
+from .backtest_hermes_fixed import FixedPointHermesBacktester
+
+
+ENGINES = {
+    'loop': HermesBotBacktester,
+    'vectorized': VectorizedHermesBacktester,
+    'fixed': FixedPointHermesBacktester,
+}
+
+
+def bulk_insert(model, objects, batch_size=None):
+    """bulk_create an iterable of unsaved objects without materializing all of them at once"""
+    batch_size = batch_size or settings.BACKTEST_BULK_BATCH_SIZE
+    objects = iter(objects)
+    while True:
+        batch = list(itertools.islice(objects, batch_size))
+        if not batch:
+            break
+        model.objects.bulk_create(batch, batch_size=batch_size)
+
+
+def claim_next_run():
+    """
+    Mark the oldest queued run as RUNNING and return it (None when the queue is empty).
+    A run still RUNNING BACKTEST_RUN_TIMEOUT seconds after it started was left by a
+    worker that crashed or was killed; it is claimed again first, with run.resumed
+    set so it continues from its last checkpoint.
+    """
+    stale_before = timezone.now() - timedelta(seconds=settings.BACKTEST_RUN_TIMEOUT)
+    stale = BacktestRun.objects.filter(status='RUNNING', started_at__lt=stale_before).order_by('started_at')
+    queued = BacktestRun.objects.filter(status='QUEUED').order_by('created_at').values_list('id', flat=True)
+    candidates = [(run_id, {'status': 'RUNNING', 'started_at': started_at})
+                  for run_id, started_at in stale.values_list('id', 'started_at')[:10]]
+    candidates += [(run_id, {'status': 'QUEUED'}) for run_id in queued[:10]]
+    for run_id, current in candidates:
+        # Conditional update so concurrent workers never claim the same run
+        claimed = BacktestRun.objects.filter(id=run_id, **current).update(
+            status='RUNNING', started_at=timezone.now()
+        )
+        if claimed:
+            run = BacktestRun.objects.select_related('bot').get(id=run_id)
+            run.resumed = current['status'] == 'RUNNING'
+            return run
+    return None
+
+
+def execute_run(run, use_cache=True, resume=False):
+    """
+    Backtest a claimed run and store its results, trades and equity curve.
+    With resume the backtest continues from the checkpoint of an interrupted attempt.
+    """
+    try:
+        backtester = ENGINES[run.engine](run.bot, run.start_date, run.end_date)
+        results = run_cached(backtester, use_cache, resume=resume)
+        if not results:
+            raise ValueError('No stock data available for backtest')
+
+        with transaction.atomic():
+            # A re-executed run replaces whatever an interrupted attempt stored
+            run.trades.all().delete()
+            run.equity.all().delete()
+            bulk_insert(BacktestTrade, (
+                BacktestTrade(
+                    run=run,
+                    seq=seq,
+                    date=trade['date'],
+                    symbol=trade['symbol'],
+                    action=trade['action'],
+                    quantity=trade['quantity'],
+                    price=trade['price'],
+                    cost=trade.get('cost'),
+                    proceeds=trade.get('proceeds'),
+                    entry_price=trade.get('entry_price'),
+                    profit_loss=trade.get('profit_loss'),
+                    reason=trade['reason'],
+                )
+                for seq, trade in enumerate(results['trades'], start=1)
+            ))
+            bulk_insert(BacktestEquityPoint, (
+                BacktestEquityPoint(
+                    run=run,
+                    date=point['date'],
+                    cash=Decimal(str(round(point['cash'], 2))),
+                    positions_value=Decimal(str(round(point['positions_value'], 2))),
+                    total_value=Decimal(str(round(point['total_value'], 2))),
+                )
+                for point in results['daily_values']
+            ))
+
+            run.final_value = Decimal(str(round(results['final_value'], 2)))
+            run.total_return = Decimal(str(round(results['total_return'], 2)))
+            run.roi = Decimal(str(round(results['roi'], 2)))
+            run.total_trades = results['total_trades']
+            run.winning_trades = results['winning_trades']
+            run.losing_trades = results['losing_trades']
+            run.win_rate = Decimal(str(round(results['win_rate'], 2)))
+            run.status = 'COMPLETED'
+            run.finished_at = timezone.now()
+            run.save()
+    except Exception as e:
+        print(f"Backtest run {run.id} failed: {e}")
+        run.status = 'FAILED'
+        run.error = str(e)
+        run.finished_at = timezone.now()
+        run.save(update_fields=['status', 'error', 'finished_at'])
+    return run
+
+
+def serialize_run(run):
+    return {
+        'run_id': run.id,
+        'bot_id': run.bot_id,
+        'engine': run.engine,
+        'start_date': run.start_date,
+        'end_date': run.end_date,
+        'status': run.status,
+        'final_value': float(run.final_value) if run.final_value is not None else None,
+        'total_return': float(run.total_return) if run.total_return is not None else None,
+        'roi': float(run.roi) if run.roi is not None else None,
+        'total_trades': run.total_trades,
+        'winning_trades': run.winning_trades,
+        'losing_trades': run.losing_trades,
+        'win_rate': float(run.win_rate) if run.win_rate is not None else None,
+        'error': run.error,
+        'created_at': run.created_at,
+        'started_at': run.started_at,
+        'finished_at': run.finished_at,
+    }
+
+
+def parse_date(value, default):
+    return datetime.strptime(value, '%Y-%m-%d').date() if value else default
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def create_backtest_run(request):
+    """
+    Queue a backtest of one of the user's bots
+    Inputs: bot_id, engine (loop|vectorized|fixed), start_date, end_date (YYYY-MM-DD)
+    """
+    try:
+        data = request.data
+        engine = data.get('engine', 'vectorized')
+        if engine not in ENGINES:
+            return Response({
+                'error': f"engine must be one of: {', '.join(sorted(ENGINES))}"
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            bot = AutoTradingBot.objects.get(id=data.get('bot_id'), user=request.user)
+        except (AutoTradingBot.DoesNotExist, ValueError, TypeError):
+            return Response({
+                'error': 'Bot not found'
+            }, status=status.HTTP_404_NOT_FOUND)
+
+        try:
+            end_date = parse_date(data.get('end_date'), datetime.now().date())
+            start_date = parse_date(data.get('start_date'), end_date - timedelta(days=7))
+        except ValueError:
+            return Response({
+                'error': 'Dates must be YYYY-MM-DD'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if start_date > end_date:
+            return Response({
+                'error': 'start_date must not be after end_date'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        run = BacktestRun.objects.create(
+            user=request.user,
+            bot=bot,
+            engine=engine,
+            start_date=start_date,
+            end_date=end_date,
+        )
+        return Response(serialize_run(run), status=status.HTTP_202_ACCEPTED)
+
+    except Exception as e:
+        return Response({
+            'error': str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def list_backtest_runs(request):
+    """List the user's backtest runs, newest first"""
+    runs = BacktestRun.objects.filter(user=request.user).order_by('-created_at')
+    bot_id = request.query_params.get('bot_id')
+    if bot_id:
+        try:
+            runs = runs.filter(bot_id=int(bot_id))
+        except ValueError:
+            return Response({
+                'error': 'bot_id must be an integer'
+            }, status=status.HTTP_400_BAD_REQUEST)
+    runs = [serialize_run(run) for run in runs[:100]]
+    return Response({
+        'runs': runs,
+        'count': len(runs)
+    })
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_backtest_run(request, run_id):
+    """Status and summary of one backtest run"""
+    try:
+        run = BacktestRun.objects.get(id=run_id, user=request.user)
+    except BacktestRun.DoesNotExist:
+        return Response({
+            'error': 'Backtest run not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+    return Response(serialize_run(run))
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def list_backtest_trades(request, run_id):
+    """
+    Page through a run's trades in execution order
+    Query: cursor (next_cursor of the previous page), limit
+    """
+    if not BacktestRun.objects.filter(id=run_id, user=request.user).exists():
+        return Response({
+            'error': 'Backtest run not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+
+    try:
+        cursor = int(request.query_params.get('cursor', 0))
+        limit = int(request.query_params.get('limit', settings.BACKTEST_TRADES_PAGE_SIZE))
+    except ValueError:
+        return Response({
+            'error': 'cursor and limit must be integers'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    limit = min(max(limit, 1), settings.BACKTEST_TRADES_MAX_PAGE_SIZE)
+
+    # Keyset pagination on (run, seq): each page is an index range scan, however deep
+    trades = list(
+        BacktestTrade.objects.filter(run_id=run_id, seq__gt=cursor).order_by('seq').values(
+            'seq', 'date', 'symbol', 'action', 'quantity', 'price', 'cost',
+            'proceeds', 'entry_price', 'profit_loss', 'reason'
+        )[:limit + 1]
+    )
+    has_more = len(trades) > limit
+    trades = trades[:limit]
+    return Response({
+        'trades': trades,
+        'count': len(trades),
+        'next_cursor': trades[-1]['seq'] if has_more else None
+    })
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_backtest_equity(request, run_id):
+    """Daily cash, positions value and total value of a run"""
+    if not BacktestRun.objects.filter(id=run_id, user=request.user).exists():
+        return Response({
+            'error': 'Backtest run not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+
+    points = list(BacktestEquityPoint.objects.filter(run_id=run_id).order_by('date').values_list(
+        'date', 'cash', 'positions_value', 'total_value'
+    ))
+    dates, cash, positions_value, total_value = zip(*points) if points else ((), (), (), ())
+    return Response({
+        'dates': dates,
+        'cash': [float(value) for value in cash],
+        'positions_value': [float(value) for value in positions_value],
+        'total_value': [float(value) for value in total_value],
+    })
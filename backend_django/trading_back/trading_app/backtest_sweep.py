@@ -0,0 +1,181 @@
+"""
+Parameter sweep for Hermes AI Trading Bot backtests
+Runs the vectorized engine over a grid of risk settings, buy thresholds and
+strategy toggles in a process pool. The market data is loaded once in the
+parent and handed to every worker when it starts; results are streamed to a
+JSONL file as they finish and a ranked copy is written at the end.
+"""
+
+import contextlib
+import io
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from decimal import Decimal
+
+import numpy as np
+
+from trading_app.auto_trading_engine import AutoTradingEngine
+from trading_app.backtest_hermes_vectorized import VectorizedHermesBacktester, load_market_matrix
+
+
+# Swept parameters: risk config overrides, the buy score threshold and strategy toggles
+RISK_PARAMS = ('stop_loss', 'take_profit', 'max_position_size')
+TOGGLE_PARAMS = ('use_pivot', 'use_prediction', 'use_screener', 'use_index_rebalancing')
+SWEEP_PARAMS = RISK_PARAMS + ('buy_threshold',) + TOGGLE_PARAMS
+# Accepted spellings of a toggle value
+TOGGLE_VALUES = {'1': True, 'true': True, 'yes': True, 'on': True, '0': False, 'false': False, 'no': False, 'off': False}
+
+
+class SweepBot:
+    """Stand-in for AutoTradingBot so workers never touch the database"""
+
+    def __init__(self, risk_level, initial_capital, use_pivot=True, use_prediction=True,
+                 use_screener=True, use_index_rebalancing=True):
+        self.name = f"Sweep_{risk_level}"
+        self.risk_level = risk_level
+        self.initial_capital = initial_capital
+        self.use_pivot = use_pivot
+        self.use_prediction = use_prediction
+        self.use_screener = use_screener
+        self.use_index_rebalancing = use_index_rebalancing
+
+
+def parse_values(spec, cast=float):
+    """
+    Parse a sweep value spec: "0.05:0.15:0.01" (inclusive start:stop:step)
+    or a comma list "0.05,0.08,0.1". Ranges step in Decimal so 0.1 + 0.2 stays 0.3.
+    Raises ValueError for a malformed spec or one that selects no values.
+    """
+    try:
+        if ':' in spec:
+            start, stop, step = (Decimal(part) for part in spec.split(':'))
+            if step <= 0:
+                raise ValueError("step must be positive")
+            values = []
+            value = start
+            while value <= stop:
+                values.append(cast(value))
+                value += step
+        else:
+            values = [cast(part) for part in spec.split(',') if part.strip()]
+    except (ArithmeticError, ValueError) as e:
+        raise ValueError(f"Invalid sweep values {spec!r}: {e}") from e
+    if not values:
+        raise ValueError(f"Sweep values {spec!r} select nothing")
+    return values
+
+
+def parse_toggle(spec):
+    """Parse a toggle spec such as "1", "0,1" or "true,false" """
+    parts = [part.strip().lower() for part in spec.split(',') if part.strip()]
+    unknown = [part for part in parts if part not in TOGGLE_VALUES]
+    if unknown or not parts:
+        raise ValueError(f"Invalid toggle values {spec!r}: use 1, 0 or 0,1")
+    return [TOGGLE_VALUES[part] for part in parts]
+
+
+def build_grid(values):
+    """Cartesian product of {param: [values]} as a list of {param: value} dicts"""
+    names = [name for name in SWEEP_PARAMS if name in values]
+    return [dict(zip(names, combination)) for combination in itertools.product(*(values[name] for name in names))]
+
+
+def max_drawdown(daily_values):
+    """Largest peak-to-trough drop of the daily total value, in percent"""
+    totals = daily_values.total_value
+    if totals.size == 0:
+        return 0.0
+    peaks = np.maximum.accumulate(totals)
+    return float(((peaks - totals) / peaks).max() * 100)
+
+
+# Per-worker state set once by _init_worker
+_market = None
+_settings = None
+
+
+def _init_worker(market, settings):
+    global _market, _settings
+    _market = market
+    _settings = settings
+
+
+def run_combination(params):
+    """Backtest one parameter combination on the worker's market data"""
+    settings = _settings
+    config = dict(AutoTradingEngine.RISK_CONFIG[settings['risk_level']])
+    for name in RISK_PARAMS:
+        config[name] = Decimal(str(params[name]))
+
+    bot = SweepBot(
+        settings['risk_level'],
+        settings['initial_capital'],
+        **{name: params[name] for name in TOGGLE_PARAMS}
+    )
+    backtester = VectorizedHermesBacktester(
+        bot, settings['start_date'], settings['end_date'],
+        config=config, buy_threshold=params['buy_threshold'],
+    )
+    # The engine reports to stdout; a sweep only keeps the numbers
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = backtester.run_backtest(market=_market)
+
+    return {
+        'params': params,
+        'roi': results['roi'],
+        'final_value': results['final_value'],
+        'total_return': results['total_return'],
+        'total_trades': results['total_trades'],
+        'win_rate': results['win_rate'],
+        'max_drawdown': max_drawdown(results['daily_values']),
+    }
+
+
+def run_sweep(grid, risk_level, initial_capital, start_date, end_date, output_path,
+              workers=None, stdout=None):
+    """
+    Run every combination in grid across a process pool, streaming one JSON
+    line per finished combination to output_path. Returns the results ranked
+    by ROI (best first) and writes them to <output_path>.ranked.jsonl.
+    """
+    log = stdout.write if stdout else print
+    config = AutoTradingEngine.RISK_CONFIG[risk_level]
+    probe = VectorizedHermesBacktester(SweepBot(risk_level, initial_capital), start_date, end_date)
+    trading_dates = probe.get_trading_dates()
+
+    market = load_market_matrix(config['stocks'], trading_dates, start_date, end_date)
+    if market is None:
+        log("ERROR: No stock data available for sweep")
+        return []
+
+    settings = {
+        'risk_level': risk_level,
+        'initial_capital': initial_capital,
+        'start_date': start_date,
+        'end_date': end_date,
+    }
+    workers = workers or os.cpu_count()
+    log(f"Sweeping {len(grid)} combinations over {len(market.symbols)} symbols x "
+        f"{len(trading_dates)} days with {workers} workers")
+
+    results = []
+    with open(output_path, 'w') as output, ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(market, settings)
+    ) as pool:
+        futures = [pool.submit(run_combination, params) for params in grid]
+        for done, future in enumerate(as_completed(futures), start=1):
+            result = future.result()
+            results.append(result)
+            output.write(json.dumps(result) + '\n')
+            output.flush()
+            if done % 50 == 0 or done == len(futures):
+                log(f"  {done}/{len(futures)} combinations done")
+
+    results.sort(key=lambda result: result['roi'], reverse=True)
+    root, _ = os.path.splitext(output_path)
+    with open(f"{root}.ranked.jsonl", 'w') as ranked:
+        for rank, result in enumerate(results, start=1):
+            ranked.write(json.dumps({'rank': rank, **result}) + '\n')
+    return results
@@ -3,9 +3,29 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 from decimal import Decimal
+from django.conf import settings
 from .models import AutoTradingBot
 from .auto_trading_engine import AutoTradingEngine
 from .serializers import AutoTradingBotSerializer
+from .market_data.quotes import get_watchlist_returns
+from .ml_models.monte_carlo import MonteCarloSimulator
+
+
+def simulate_bot(risk_level, investment_amount, duration_weeks, paths=None):
+    """Bootstrap equity paths for a bot configuration (None without price history)"""
+    config = AutoTradingEngine.RISK_CONFIG[risk_level]
+    returns = get_watchlist_returns(config['stocks'])
+    # Each buy commits max_position_size * 70% of the remaining cash, so even a
+    # full watchlist leaves part of the capital in cash
+    exposure = 1 - (1 - float(config['max_position_size']) * 0.7) ** len(config['stocks'])
+    simulator = MonteCarloSimulator(returns * exposure)
+    return simulator.simulate(
+        investment_amount,
+        duration_weeks * 5,
+        config['stop_loss'],
+        config['take_profit'],
+        paths or settings.MONTE_CARLO_PATHS,
+    )
 
 
 @api_view(['POST'])
@@ -28,6 +48,11 @@ def create_herm_bot(request):
                 'error': 'risk_level must be LOW, MEDIUM, or HIGH'
             }, status=status.HTTP_400_BAD_REQUEST)
         
+        if not 1 <= duration_weeks <= settings.HERM_MAX_DURATION_WEEKS:
+            return Response({
+                'error': f'duration_weeks must be between 1 and {settings.HERM_MAX_DURATION_WEEKS}'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
         if investment_amount > user.balance:
             return Response({
                 'error': f'Insufficient balance. Available: ${user.balance}'
@@ -62,6 +87,13 @@ def create_herm_bot(request):
         user.balance -= investment_amount
         user.save()
         
+        # Distribution of outcomes next to the deterministic expected return
+        try:
+            simulation = simulate_bot(risk_level, investment_amount, duration_weeks)
+        except Exception as e:
+            print(f"Simulation failed for {bot.name}: {e}")
+            simulation = None
+        
         return Response({
             'message': 'Herm_trades bot created successfully',
             'bot_id': bot.id,
@@ -77,7 +109,8 @@ def create_herm_bot(request):
                 'stop_loss': f"{config['stop_loss']*100}%",
                 'take_profit': f"{config['take_profit']*100}%",
                 'max_position_size': f"{config['max_position_size']*100}%"
-            }
+            },
+            'simulation': simulation
         }, status=status.HTTP_201_CREATED)
         
     except Exception as e:
@@ -86,6 +119,61 @@ def create_herm_bot(request):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def simulate_herm_bot(request):
+    """
+    Monte Carlo simulation of a Herm_trades bot before creating it
+    Inputs: duration_weeks, risk_level, investment_amount, paths (optional)
+    """
+    try:
+        data = request.data
+        duration_weeks = int(data.get('duration_weeks', 4))
+        risk_level = data.get('risk_level', 'MEDIUM').upper()
+        investment_amount = Decimal(str(data.get('investment_amount', 1000)))
+        paths = min(max(int(data.get('paths', settings.MONTE_CARLO_PATHS)), 100), settings.MONTE_CARLO_MAX_PATHS)
+        
+        if risk_level not in ['LOW', 'MEDIUM', 'HIGH']:
+            return Response({
+                'error': 'risk_level must be LOW, MEDIUM, or HIGH'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        if not 1 <= duration_weeks <= settings.HERM_MAX_DURATION_WEEKS:
+            return Response({
+                'error': f'duration_weeks must be between 1 and {settings.HERM_MAX_DURATION_WEEKS}'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        max_paths = settings.MONTE_CARLO_MAX_CELLS // (duration_weeks * 5 + 1)
+        if paths > max_paths:
+            return Response({
+                'error': f'At most {max_paths} paths for {duration_weeks} weeks'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        simulation = simulate_bot(risk_level, investment_amount, duration_weeks, paths)
+        if simulation is None:
+            return Response({
+                'error': 'No price history available for this watchlist'
+            }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        
+        expected_return_pct, expected_profit = AutoTradingEngine.calculate_expected_return(
+            investment_amount, risk_level, duration_weeks
+        )
+        
+        return Response({
+            'risk_level': risk_level,
+            'investment': float(investment_amount),
+            'duration_weeks': duration_weeks,
+            'expected_return_percentage': float(expected_return_pct),
+            'expected_profit': float(expected_profit),
+            'simulation': simulation
+        })
+        
+    except Exception as e:
+        return Response({
+            'error': str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_herm_bot_status(request, bot_id):
@@ -1,9 +1,19 @@
 """
 Django management command to backtest Hermes AI Trading Bot
 Usage: python manage.py backtest_hermes [--bot-id BOT_ID] [--risk-level RISK] [--investment AMOUNT]
+                                       [--provider yfinance|replay] [--replay-dir DIR]
+                                       [--engine loop|vectorized|fixed] [--start YYYY-MM-DD] [--end YYYY-MM-DD]
+                                       [--no-cache] [--resume]
+       python manage.py backtest_hermes --all-bots [--status ACTIVE,PAUSED] [--engine vectorized|fixed]
+                                       [--start YYYY-MM-DD] [--end YYYY-MM-DD] [--dry-run]
+       python manage.py backtest_hermes --sweep [--stop-loss 0.05:0.15:0.01] [--take-profit 0.1,0.2]
+                                       [--max-position-size ...] [--buy-threshold 2,3]
+                                       [--use-pivot 0,1] [--use-prediction 0,1] [--use-screener 0,1]
+                                       [--use-index-rebalancing 0,1]
+                                       [--workers N] [--sweep-output FILE]
 """
 
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from django.utils import timezone
 from datetime import datetime, timedelta
 from decimal import Decimal
@@ -14,6 +24,13 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
 
 from trading_app.backtest_hermes_bot import run_backtest_for_bot
+from trading_app.backtest_runs import ENGINES
+from trading_app.backtest_batch import run_batch
+from trading_app.backtest_hermes_vectorized import VectorizedHermesBacktester
+from trading_app.models import AutoTradingBot
+from trading_app.backtest_sweep import RISK_PARAMS, TOGGLE_PARAMS, build_grid, parse_toggle, parse_values, run_sweep
+from trading_app.auto_trading_engine import AutoTradingEngine
+from trading_app.market_data.providers import PROVIDERS, create_provider, set_provider
 
 
 class Command(BaseCommand):
@@ -38,11 +55,119 @@ class Command(BaseCommand):
             default=1000,
             help='Investment amount for test bot (if not using --bot-id)',
         )
+        parser.add_argument(
+            '--provider',
+            type=str,
+            choices=sorted(PROVIDERS),
+            help='Market data provider (defaults to MARKET_DATA_PROVIDER)',
+        )
+        parser.add_argument(
+            '--replay-dir',
+            type=str,
+            help='Directory of <SYMBOL>.csv/.parquet files for the replay provider',
+        )
+        parser.add_argument(
+            '--engine',
+            type=str,
+            choices=sorted(ENGINES),
+            default='loop',
+            help='Backtest engine: day-by-day loop, vectorized matrices (same trades, much faster) '
+                 'or vectorized with integer tick accounting (fastest)',
+        )
+        parser.add_argument(
+            '--start',
+            type=str,
+            help='First backtest date (YYYY-MM-DD, default: one week before --end)',
+        )
+        parser.add_argument(
+            '--end',
+            type=str,
+            help='Last backtest date (YYYY-MM-DD, default: today)',
+        )
+        parser.add_argument(
+            '--no-cache',
+            action='store_true',
+            help='Always recompute instead of reusing cached results of an identical run',
+        )
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='Continue an interrupted run of the same backtest from its last checkpoint',
+        )
+
+        # Batch re-evaluation of stored bots (matrix engines only)
+        parser.add_argument(
+            '--all-bots',
+            action='store_true',
+            help='Backtest every stored bot on one shared data load and bulk-update their results '
+                 '(default window: each bot\'s creation date to today; loop engine runs as vectorized)',
+        )
+        parser.add_argument(
+            '--status',
+            type=str,
+            default='ACTIVE',
+            help='Comma list of bot statuses included by --all-bots (default: ACTIVE)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='With --all-bots, backtest without saving the results to the bots',
+        )
+
+        # Parameter sweep (always uses the vectorized engine)
+        parser.add_argument(
+            '--sweep',
+            action='store_true',
+            help='Backtest every combination of the sweep ranges below in a process pool',
+        )
+        for name in RISK_PARAMS:
+            parser.add_argument(
+                f"--{name.replace('_', '-')}",
+                type=str,
+                help=f'Sweep values for {name}: start:stop:step or a comma list (default: risk level value)',
+            )
+        parser.add_argument(
+            '--buy-threshold',
+            type=str,
+            default='2',
+            help='Sweep values for the minimum buy score (default: 2)',
+        )
+        for name in TOGGLE_PARAMS:
+            parser.add_argument(
+                f"--{name.replace('_', '-')}",
+                type=str,
+                default='1',
+                help=f'Sweep values for {name}: 1, 0 or 0,1 (default: 1)',
+            )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            help='Sweep worker processes (default: all cores)',
+        )
+        parser.add_argument(
+            '--sweep-output',
+            type=str,
+            default='hermes_sweep.jsonl',
+            help='JSONL file streamed with sweep results; the ranked copy goes to <name>.ranked.jsonl',
+        )
 
     def handle(self, *args, **options):
         bot_id = options.get('bot_id')
         risk_level = options.get('risk_level')
         investment = options.get('investment')
+        start_date = datetime.strptime(options['start'], '%Y-%m-%d').date() if options.get('start') else None
+        end_date = datetime.strptime(options['end'], '%Y-%m-%d').date() if options.get('end') else None
+
+        if options.get('provider'):
+            provider_options = {}
+            if options['provider'] == 'replay' and options.get('replay_dir'):
+                provider_options['data_dir'] = options['replay_dir']
+            set_provider(create_provider(options['provider'], **provider_options))
+
+        if options['sweep']:
+            return self.handle_sweep(options, risk_level, investment, start_date, end_date)
+        if options['all_bots']:
+            return self.handle_all_bots(options, start_date, end_date)
 
         self.stdout.write(self.style.SUCCESS('\n' + '='*80))
         self.stdout.write(self.style.SUCCESS('HERMES AI TRADING BOT - 1 WEEK BACKTEST'))
@@ -52,7 +177,12 @@ class Command(BaseCommand):
             results = run_backtest_for_bot(
                 bot_id=bot_id,
                 risk_level=risk_level,
-                investment_amount=investment
+                investment_amount=investment,
+                start_date=start_date,
+                end_date=end_date,
+                backtester_class=ENGINES[options['engine']],
+                use_cache=not options['no_cache'],
+                resume=options['resume'],
             )
 
             if results:
@@ -68,3 +198,53 @@ class Command(BaseCommand):
             import traceback
             self.stdout.write(self.style.ERROR(traceback.format_exc()))
 
+    def handle_all_bots(self, options, start_date, end_date):
+        statuses = [status.strip().upper() for status in options['status'].split(',') if status.strip()]
+        bots = AutoTradingBot.objects.filter(status__in=statuses).order_by('id')
+        engine = ENGINES[options['engine']]
+        if not issubclass(engine, VectorizedHermesBacktester):
+            engine = VectorizedHermesBacktester
+
+        self.stdout.write(self.style.SUCCESS(f"\nHERMES BATCH BACKTEST: {', '.join(statuses)} bots ({engine.__name__})"))
+        started = datetime.now()
+        results = run_batch(bots, start_date, end_date, backtester_class=engine,
+                            dry_run=options['dry_run'], log=self.stdout.write)
+        if not results:
+            self.stdout.write(self.style.ERROR('\n✗ Batch backtest failed!'))
+            return
+        elapsed = (datetime.now() - started).total_seconds()
+        self.stdout.write(self.style.SUCCESS(f'\n✓ {len(results)} bots backtested in {elapsed:.1f}s'))
+
+    def handle_sweep(self, options, risk_level, investment, start_date, end_date):
+        config = AutoTradingEngine.RISK_CONFIG[risk_level]
+        end_date = end_date or datetime.now().date()
+        start_date = start_date or end_date - timedelta(days=7)
+
+        values = {}
+        try:
+            for name in RISK_PARAMS:
+                spec = options.get(name)
+                values[name] = parse_values(spec) if spec else [float(config[name])]
+            values['buy_threshold'] = parse_values(options['buy_threshold'], int)
+            for name in TOGGLE_PARAMS:
+                values[name] = parse_toggle(options[name])
+        except ValueError as e:
+            raise CommandError(str(e))
+        grid = build_grid(values)
+
+        self.stdout.write(self.style.SUCCESS(f'\nHERMES PARAMETER SWEEP: {len(grid)} combinations, '
+                                             f'{risk_level} watchlist, {start_date} to {end_date}'))
+        results = run_sweep(
+            grid, risk_level, Decimal(str(investment)), start_date, end_date,
+            options['sweep_output'], workers=options.get('workers'), stdout=self.stdout,
+        )
+        if not results:
+            self.stdout.write(self.style.ERROR('\n✗ Sweep failed!'))
+            return
+
+        self.stdout.write(self.style.SUCCESS('\nTop 10 combinations by ROI:'))
+        for rank, result in enumerate(results[:10], start=1):
+            params = ', '.join(f'{name}={value}' for name, value in result['params'].items())
+            self.stdout.write(f"{rank:3d}. ROI {result['roi']:8.2f}% | trades {result['total_trades']:5d} | "
+                              f"win {result['win_rate']:6.2f}% | DD {result['max_drawdown']:6.2f}% | {params}")
+        self.stdout.write(self.style.SUCCESS(f"\n✓ Results written to {options['sweep_output']}"))
@@ -0,0 +1,104 @@
+"""
+Django management command that benchmarks backtest throughput and memory on synthetic data
+Usage: python manage.py benchmark_backtests [--engines loop,vectorized,fixed,clean_energy]
+                                           [--symbols 10,50] [--years 1,3] [--repeat 3]
+                                           [--baseline FILE] [--update-baseline] [--tolerance 0.25]
+"""
+
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from trading_app.backtest_benchmark import (
+    BENCHMARK_ENGINES, find_regressions, load_baseline, run_benchmarks, save_baseline,
+)
+from trading_app.backtest_sweep import parse_values
+
+
+class Command(BaseCommand):
+    help = 'Time backtest engines over a grid of synthetic universe sizes and periods'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--engines',
+            type=str,
+            default=','.join(BENCHMARK_ENGINES),
+            help=f"Comma list of engines to benchmark ({', '.join(BENCHMARK_ENGINES)})",
+        )
+        parser.add_argument(
+            '--symbols',
+            type=str,
+            default='10,50',
+            help='Universe sizes: comma list or start:stop:step',
+        )
+        parser.add_argument(
+            '--years',
+            type=str,
+            default='1,3',
+            help='Backtest periods in years: comma list or start:stop:step',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=3,
+            help='Timed runs per case (the best one is reported)',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Random seed of the synthetic universe',
+        )
+        parser.add_argument(
+            '--baseline',
+            type=str,
+            default=str(settings.BACKTEST_BENCHMARK_BASELINE),
+            help='Baseline JSON to compare against (defaults to BACKTEST_BENCHMARK_BASELINE)',
+        )
+        parser.add_argument(
+            '--update-baseline',
+            action='store_true',
+            help='Store these results as the new baseline instead of comparing',
+        )
+        parser.add_argument(
+            '--tolerance',
+            type=float,
+            default=0.25,
+            help='Allowed throughput drop / peak memory growth versus the baseline (0.25 = 25%%)',
+        )
+
+    def handle(self, *args, **options):
+        engines = [engine.strip() for engine in options['engines'].split(',') if engine.strip()]
+        unknown = set(engines) - set(BENCHMARK_ENGINES)
+        if unknown:
+            raise CommandError(f"Unknown engines: {', '.join(sorted(unknown))}")
+        try:
+            symbol_counts = parse_values(options['symbols'], int)
+            year_counts = parse_values(options['years'])
+        except ValueError as e:
+            raise CommandError(str(e))
+        baseline_path = options['baseline']
+        # Check before the (long) benchmark runs rather than after
+        if not options['update_baseline'] and not os.path.exists(baseline_path):
+            raise CommandError(f"No baseline at {baseline_path}; run with --update-baseline to store one")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"\nBACKTEST BENCHMARK: {', '.join(engines)} | symbols {symbol_counts} | years {year_counts}"
+        ))
+        results = run_benchmarks(
+            engines, symbol_counts, year_counts,
+            repeat=options['repeat'], seed=options['seed'], log=self.stdout.write,
+        )
+
+        if options['update_baseline']:
+            save_baseline(baseline_path, results)
+            self.stdout.write(self.style.SUCCESS(f"\n✓ Baseline written to {baseline_path}"))
+            return
+
+        regressions = find_regressions(results, load_baseline(baseline_path), options['tolerance'])
+        if regressions:
+            for regression in regressions:
+                self.stdout.write(self.style.ERROR(f"  ✗ {regression}"))
+            raise CommandError(f"{len(regressions)} benchmark regression(s) against {baseline_path}")
+        self.stdout.write(self.style.SUCCESS(f"\n✓ No regressions against {baseline_path}"))
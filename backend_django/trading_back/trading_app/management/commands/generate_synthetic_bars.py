@@ -0,0 +1,64 @@
+"""
+Django management command that writes synthetic OHLCV bars for offline backtests
+Usage: python manage.py generate_synthetic_bars --out DIR [--symbols N] [--years Y]
+                                               [--end YYYY-MM-DD] [--seed N] [--format csv|parquet]
+"""
+
+from datetime import datetime
+
+from django.core.management.base import BaseCommand
+
+from trading_app.market_data.synthetic import write_universe
+
+
+class Command(BaseCommand):
+    help = 'Generate synthetic GBM bars (volatility regimes, gaps, volume) in the replay data layout'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--out',
+            type=str,
+            required=True,
+            help='Directory to write <SYMBOL>.csv/.parquet, fundamentals.csv and universe.csv to',
+        )
+        parser.add_argument(
+            '--symbols',
+            type=int,
+            default=100,
+            help='Number of symbols (S0000, S0001, ...)',
+        )
+        parser.add_argument(
+            '--years',
+            type=float,
+            default=5,
+            help='Years of trading days per symbol',
+        )
+        parser.add_argument(
+            '--end',
+            type=str,
+            help='Last trading day (YYYY-MM-DD, default: 2025-12-31)',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Random seed; the same seed always produces the same bars',
+        )
+        parser.add_argument(
+            '--format',
+            type=str,
+            choices=['csv', 'parquet'],
+            default='parquet',
+            help='File format (backtest_clean_energy reads csv)',
+        )
+
+    def handle(self, *args, **options):
+        end_date = datetime.strptime(options['end'], '%Y-%m-%d').date() if options.get('end') else None
+        symbols = write_universe(
+            options['out'], options['symbols'], options['years'],
+            end_date=end_date, seed=options['seed'], fmt=options['format'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ Wrote {len(symbols)} symbols x {options['years']:g} years to {options['out']}"
+        ))
+        self.stdout.write(f"  Backtest with: --provider replay --replay-dir {options['out']}")
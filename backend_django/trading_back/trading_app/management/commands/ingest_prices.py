@@ -0,0 +1,46 @@
+"""
+Django management command that keeps MarketQuote up to date
+Usage: python manage.py ingest_prices [--interval SECONDS] [--batch-size N] [--once]
+"""
+
+import asyncio
+
+from django.core.management.base import BaseCommand
+
+from trading_app.market_data.price_feed import PriceIngestor
+
+
+class Command(BaseCommand):
+    help = 'Poll prices for every subscribed symbol and publish them for request handlers'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval',
+            type=float,
+            help='Seconds between polling cycles (defaults to PRICE_INGEST_INTERVAL)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            help='Symbols per upstream request (defaults to PRICE_INGEST_BATCH_SIZE)',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Run a single polling cycle and exit',
+        )
+
+    def handle(self, *args, **options):
+        ingestor = PriceIngestor(
+            interval=options.get('interval'),
+            batch_size=options.get('batch_size'),
+            stdout=self.stdout,
+        )
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Price ingestion started (every {ingestor.interval}s, {ingestor.batch_size} symbols per batch)'
+        ))
+        try:
+            asyncio.run(ingestor.run(once=options.get('once')))
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING('\nPrice ingestion stopped'))
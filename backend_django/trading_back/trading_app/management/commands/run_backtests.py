@@ -0,0 +1,57 @@
+"""
+Django management command that executes queued backtest runs
+Usage: python manage.py run_backtests [--interval SECONDS] [--once] [--no-cache]
+"""
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from trading_app.backtest_runs import claim_next_run, execute_run
+
+
+class Command(BaseCommand):
+    help = 'Poll the database for queued backtest runs and execute them outside the web workers'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval',
+            type=float,
+            help='Seconds between polls of an empty queue (defaults to BACKTEST_WORKER_POLL_INTERVAL)',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Execute the runs queued right now and exit',
+        )
+        parser.add_argument(
+            '--no-cache',
+            action='store_true',
+            help='Always recompute instead of reusing cached results of an identical run',
+        )
+
+    def handle(self, *args, **options):
+        interval = options.get('interval') or settings.BACKTEST_WORKER_POLL_INTERVAL
+        self.stdout.write(self.style.SUCCESS(f'Backtest worker started (polling every {interval}s)'))
+        try:
+            while True:
+                run = claim_next_run()
+                if run is None:
+                    if options['once']:
+                        break
+                    time.sleep(interval)
+                    continue
+
+                verb = 'Resuming stalled' if run.resumed else 'Running'
+                self.stdout.write(f'{verb} backtest {run.id}: {run.bot.name} ({run.engine}, '
+                                  f'{run.start_date} to {run.end_date})')
+                execute_run(run, use_cache=not options['no_cache'], resume=run.resumed)
+                if run.status == 'COMPLETED':
+                    self.stdout.write(self.style.SUCCESS(
+                        f'✓ Backtest {run.id} completed: ROI {run.roi}%, {run.total_trades} trades'
+                    ))
+                else:
+                    self.stdout.write(self.style.ERROR(f'✗ Backtest {run.id} failed: {run.error}'))
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING('\nBacktest worker stopped'))
@@ -0,0 +1,307 @@
+"""
+Local OHLCV Bar Store
+Keeps one Parquet file per symbol and interval so history reads are served
+from disk and only the date ranges we have never seen are fetched from the
+market data provider. Bars downloaded while their session was still open are
+provisional and are fetched again (and replaced) once they can have changed.
+"""
+
+import json
+import os
+import threading
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from django.conf import settings
+from pandas.tseries.holiday import (
+    AbstractHolidayCalendar, GoodFriday, Holiday, USLaborDay, USMartinLutherKingJr,
+    USMemorialDay, USPresidentsDay, USThanksgivingDay, nearest_workday, sunday_to_monday,
+)
+
+from .providers import BAR_COLUMNS, empty_bars, get_provider
+
+
+# Parquet schema metadata key holding the covered [start, end] date span
+COVERAGE_KEY = b'hermes.coverage'
+
+
+class ExchangeHolidayCalendar(AbstractHolidayCalendar):
+    """Full-day closures of the US equity exchanges"""
+
+    rules = [
+        Holiday('New Years Day', month=1, day=1, observance=sunday_to_monday),
+        USMartinLutherKingJr,
+        USPresidentsDay,
+        GoodFriday,
+        USMemorialDay,
+        Holiday('Juneteenth', month=6, day=19, start_date='2022-06-19', observance=nearest_workday),
+        Holiday('Independence Day', month=7, day=4, observance=nearest_workday),
+        USLaborDay,
+        USThanksgivingDay,
+        Holiday('Christmas', month=12, day=25, observance=nearest_workday),
+    ]
+
+
+@lru_cache(maxsize=None)
+def _exchange_holidays(year):
+    holidays = ExchangeHolidayCalendar().holidays(date(year, 1, 1), date(year, 12, 31))
+    return frozenset(day.date() for day in holidays)
+
+
+def is_trading_day(day):
+    """Whether the exchanges hold a session on day (weekdays that are not exchange holidays)"""
+    return day.weekday() < 5 and day not in _exchange_holidays(day.year)
+
+
+def as_date(value):
+    """Coerce a date, datetime or ISO string to a date"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return pd.Timestamp(value).date()
+
+
+class BarStore:
+    """
+    Read-through store of historical bars partitioned by symbol and interval.
+
+    Each partition records the calendar span it covers (weekends and holidays
+    included) and when it was last fetched, so a request inside that span never
+    touches the network even when it returns no rows. The last covered day only
+    counts as settled once it was fetched after that day ended or when it has no
+    session (a weekend or exchange holiday); until then it is re-fetched after
+    BAR_STORE_LIVE_TTL seconds. Partitions live under a
+    directory per provider so replayed and live bars never mix.
+    """
+
+    def __init__(self, root=None, provider=None):
+        self._root = root
+        self._provider = provider
+        self._frames = {}  # {(symbol, interval): (mtime_ns, bars, coverage, fetched_at)}
+        self._lock = threading.Lock()
+        self._key_locks = {}
+
+    @property
+    def provider(self):
+        return self._provider or get_provider()
+
+    @property
+    def root(self):
+        return str(self._root or os.path.join(settings.BAR_STORE_DIR, self.provider.name))
+
+    def path_for(self, symbol, interval='1d'):
+        """Parquet file holding the bars of one symbol/interval partition"""
+        return os.path.join(self.root, interval, f"{symbol.upper()}.parquet")
+
+    def _key_lock(self, key):
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _read(self, symbol, interval='1d'):
+        """Return (bars, coverage, fetched_at) as stored, re-reading only when the file changed"""
+        key = (symbol.upper(), interval)
+        path = self.path_for(symbol, interval)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return empty_bars(), None, None
+
+        cached = self._frames.get(key)
+        if cached and cached[0] == mtime:
+            return cached[1], cached[2], cached[3]
+
+        table = pq.read_table(path)
+        metadata = table.schema.metadata or {}
+        coverage = fetched_at = None
+        if COVERAGE_KEY in metadata:
+            span = json.loads(metadata[COVERAGE_KEY])
+            coverage = (date.fromisoformat(span['start']), date.fromisoformat(span['end']))
+            if span.get('fetched_at'):
+                fetched_at = datetime.fromisoformat(span['fetched_at'])
+        bars = table.to_pandas()
+
+        self._frames[key] = (mtime, bars, coverage, fetched_at)
+        return bars, coverage, fetched_at
+
+    @staticmethod
+    def settled_coverage(coverage, fetched_at, now=None):
+        """
+        Coverage minus a provisional last day: the final covered day is only
+        trusted when it was fetched after it ended, when no session trades on
+        it, or when it is today and the fetch is younger than BAR_STORE_LIVE_TTL.
+        """
+        if coverage is None or fetched_at is None or fetched_at.date() > coverage[1]:
+            return coverage
+        if not is_trading_day(coverage[1]):
+            return coverage
+        now = now or datetime.now()
+        live_age = (now - fetched_at).total_seconds()
+        if coverage[1] >= now.date() and live_age < settings.BAR_STORE_LIVE_TTL:
+            return coverage
+        settled_end = coverage[1] - timedelta(days=1)
+        return (coverage[0], settled_end) if settled_end >= coverage[0] else None
+
+    def load(self, symbol, interval='1d'):
+        """Return (bars, coverage) for a partition, with any provisional last day left uncovered"""
+        bars, coverage, fetched_at = self._read(symbol, interval)
+        return bars, self.settled_coverage(coverage, fetched_at)
+
+    def save(self, symbol, interval, bars, coverage, fetched_at=None):
+        """Atomically write a partition together with its coverage span and fetch time"""
+        fetched_at = fetched_at or datetime.now()
+        path = self.path_for(symbol, interval)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        table = pa.Table.from_pandas(bars[BAR_COLUMNS], preserve_index=False)
+        metadata = dict(table.schema.metadata or {})
+        metadata[COVERAGE_KEY] = json.dumps({
+            'start': coverage[0].isoformat(),
+            'end': coverage[1].isoformat(),
+            'fetched_at': fetched_at.isoformat(timespec='seconds'),
+        }).encode()
+        table = table.replace_schema_metadata(metadata)
+
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, path)
+
+        self._frames[(symbol.upper(), interval)] = (os.stat(path).st_mtime_ns, bars, coverage, fetched_at)
+
+    @staticmethod
+    def missing_ranges(coverage, start, end):
+        """
+        Date ranges inside [start, end] that are not covered yet.
+        Gaps between the request and the stored span are included so the
+        coverage of a partition always stays one contiguous span.
+        """
+        end = min(end, date.today())
+        if start > end:
+            return []
+        if coverage is None:
+            return [(start, end)]
+
+        covered_start, covered_end = coverage
+        ranges = []
+        if start < covered_start:
+            ranges.append((start, covered_start - timedelta(days=1)))
+        if end > covered_end:
+            ranges.append((covered_end + timedelta(days=1), end))
+        return ranges
+
+    def fetch(self, symbol, start, end, interval='1d'):
+        """Download bars for [start, end] from the market data provider"""
+        return self.provider.get_history(symbol, start, end, interval)
+
+    def _fill(self, symbol, interval, start, end, fetched=None):
+        """
+        Fetch the missing ranges of a partition and merge them into the file,
+        replacing stored bars with re-fetched ones on the same timestamp.
+        fetched optionally maps (range_start, range_end) to bars already downloaded.
+        """
+        fetched = fetched or {}
+        with self._key_lock((symbol.upper(), interval)):
+            # Another thread may have filled the partition while we waited
+            bars, stored, fetched_at = self._read(symbol, interval)
+            coverage = self.settled_coverage(stored, fetched_at)
+            missing = self.missing_ranges(coverage, start, end)
+            if not missing:
+                return bars, coverage
+
+            frames = [bars]
+            failed = False
+            for range_start, range_end in missing:
+                try:
+                    new_bars = fetched.get((range_start, range_end))
+                    if new_bars is None:
+                        new_bars = self.fetch(symbol, range_start, range_end, interval)
+                except Exception as e:
+                    print(f"Error fetching {symbol} {interval} bars {range_start}..{range_end}: {e}")
+                    failed = True
+                    continue
+                frames.append(new_bars)
+                if coverage is None:
+                    coverage = (range_start, range_end)
+                else:
+                    coverage = (min(coverage[0], range_start), max(coverage[1], range_end))
+
+            if len(frames) == 1:
+                return bars, coverage
+
+            if failed and stored is not None:
+                # Keep the stored span and fetch time so a provisional day that
+                # could not be refreshed is retried next time
+                coverage = (min(coverage[0], stored[0]), max(coverage[1], stored[1]))
+                fetched_at = fetched_at or datetime.now()
+            else:
+                fetched_at = datetime.now()
+
+            bars = pd.concat([f for f in frames if not f.empty] or [empty_bars()], ignore_index=True)
+            bars = (
+                bars.drop_duplicates(subset='date', keep='last')
+                .sort_values('date')
+                .reset_index(drop=True)
+            )
+            self.save(symbol, interval, bars, coverage, fetched_at)
+            return bars, coverage
+
+    def prefetch(self, symbols, start, end, interval='1d'):
+        """
+        Fill the missing ranges of many partitions with one bulk provider call
+        per distinct range (e.g. the same trailing days for a whole watchlist)
+        """
+        start, end = as_date(start), as_date(end)
+        by_range = {}
+        for symbol in symbols:
+            _, coverage = self.load(symbol, interval)
+            for missing in self.missing_ranges(coverage, start, end):
+                by_range.setdefault(missing, []).append(symbol)
+
+        fetched = {}
+        for (range_start, range_end), range_symbols in by_range.items():
+            try:
+                bulk = self.provider.get_bulk_history(range_symbols, range_start, range_end, interval)
+            except Exception as e:
+                # Partitions left unfilled fall back to per-symbol fetches in get_bars
+                print(f"Error bulk fetching {len(range_symbols)} symbols {range_start}..{range_end}: {e}")
+                continue
+            for symbol, bars in bulk.items():
+                fetched.setdefault(symbol, {})[(range_start, range_end)] = bars
+
+        for symbol, symbol_fetched in fetched.items():
+            self._fill(symbol, interval, start, end, symbol_fetched)
+        return len(fetched)
+
+    def get_bars(self, symbol, start, end, interval='1d'):
+        """Return bars with start <= date <= end, fetching only what is not stored yet"""
+        start, end = as_date(start), as_date(end)
+        bars, coverage = self.load(symbol, interval)
+        if self.missing_ranges(coverage, start, end):
+            bars, coverage = self._fill(symbol, interval, start, end)
+
+        lo = bars['date'].searchsorted(pd.Timestamp(start), side='left')
+        hi = bars['date'].searchsorted(pd.Timestamp(end + timedelta(days=1)), side='left')
+        return bars.iloc[lo:hi].reset_index(drop=True)
+
+    def get_period(self, symbol, period, interval='1d'):
+        """Return the bars yfinance would return for history(period=...)"""
+        today = date.today()
+        if period.endswith('mo'):
+            start = (pd.Timestamp(today) - pd.DateOffset(months=int(period[:-2]))).date()
+        elif period.endswith('y'):
+            start = (pd.Timestamp(today) - pd.DateOffset(years=int(period[:-1]))).date()
+        elif period.endswith('d'):
+            # 'Nd' means the last N sessions, so widen the window past weekends/holidays
+            sessions = int(period[:-1])
+            bars = self.get_bars(symbol, today - timedelta(days=sessions * 2 + 7), today, interval)
+            return bars.tail(sessions).reset_index(drop=True)
+        else:
+            raise ValueError(f"Unsupported period: {period}")
+        return self.get_bars(symbol, start, today, interval)
+
+
+# Shared store used by views and backtests
+bar_store = BarStore()
@@ -0,0 +1,194 @@
+"""
+Live Price Broadcaster
+One asyncio fan-out loop per process reads the quotes published by the
+ingest_prices daemon and pushes price ticks, holding P/L changes and unread
+signal counts to connected stream clients. Each loop iteration costs a
+constant number of queries no matter how many tabs are open, and a client
+only receives an event when something it holds actually changed.
+"""
+
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import Count
+
+from ..models import Holding, MarketQuote, Signal
+
+
+class PriceBroadcaster:
+    """Fan-out of price/holding/signal updates to per-connection asyncio queues"""
+
+    def __init__(self):
+        self._clients = {}  # {queue: user_id}
+        self._holdings = {}  # {user_id: [holding dict]}
+        self._prices = {}  # {symbol: last broadcast price}
+        self._unread = {}  # {user_id: last broadcast unread signal count}
+        self._last_quote_at = None
+        self._holdings_loaded_at = None
+        self._task = None
+        self._loop = None
+
+    # Subscriptions
+
+    async def subscribe(self, user_id):
+        """Register a connection and queue its initial snapshot"""
+        queue = asyncio.Queue(maxsize=settings.STREAM_QUEUE_SIZE)
+        self._clients[queue] = user_id
+
+        await sync_to_async(self._load_holdings)([user_id])
+        symbols = {h['stock'] for h in self._holdings.get(user_id, [])}
+        # The snapshot may already hold quotes the next tick has yet to
+        # broadcast; keep it out of self._prices so other clients still get them
+        snapshot = {**self._prices, **await sync_to_async(self._read_prices)(symbols)}
+        unread = await sync_to_async(self._read_unread)([user_id])
+        self._unread[user_id] = unread.get(user_id, 0)
+
+        self._push(queue, 'prices', self._payload(user_id, prices=snapshot))
+        self._push(queue, 'signals', {'unread_count': self._unread[user_id]})
+        self._ensure_running()
+        return queue
+
+    def unsubscribe(self, queue):
+        user_id = self._clients.pop(queue, None)
+        if user_id is not None and user_id not in self._clients.values():
+            self._holdings.pop(user_id, None)
+            self._unread.pop(user_id, None)
+
+    def _ensure_running(self):
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._loop is not loop:
+            self._loop = loop
+            self._task = loop.create_task(self._run())
+
+    @staticmethod
+    def _push(queue, event, data):
+        # Slow consumers lose their oldest events instead of growing memory
+        if queue.full():
+            try:
+                queue.get_nowait()
+            except asyncio.QueueEmpty:
+                pass
+        queue.put_nowait((event, data))
+
+    # Database reads (run in a worker thread)
+
+    def _load_holdings(self, user_ids):
+        rows = Holding.objects.filter(user_id__in=list(user_ids)).values(
+            'id', 'user_id', 'stock', 'quantity', 'buying_price', 'current_price'
+        )
+        grouped = {user_id: [] for user_id in user_ids}
+        for row in rows:
+            grouped[row['user_id']].append({
+                'id': row['id'],
+                'stock': row['stock'].upper(),
+                'quantity': row['quantity'],
+                'buying_price': float(row['buying_price']),
+                'current_price': float(row['current_price']),
+            })
+        self._holdings.update(grouped)
+
+    def _read_prices(self, symbols):
+        rows = MarketQuote.objects.filter(symbol__in=list(symbols)).values_list('symbol', 'price')
+        return {symbol: float(price) for symbol, price in rows}
+
+    def _read_changed_quotes(self):
+        """Quotes published since the last tick whose price differs from what was broadcast"""
+        quotes = MarketQuote.objects.all()
+        if self._last_quote_at is not None:
+            quotes = quotes.filter(updated_at__gt=self._last_quote_at)
+        changed = {}
+        for symbol, price, updated_at in quotes.values_list('symbol', 'price', 'updated_at'):
+            if self._last_quote_at is None or updated_at > self._last_quote_at:
+                self._last_quote_at = updated_at
+            price = float(price)
+            if self._prices.get(symbol) != price:
+                changed[symbol] = price
+        return changed
+
+    def _read_unread(self, user_ids):
+        rows = (
+            Signal.objects.filter(user_id__in=list(user_ids), is_read=False, is_active=True)
+            .values('user_id')
+            .annotate(count=Count('id'))
+        )
+        return {row['user_id']: row['count'] for row in rows}
+
+    # Fan-out loop
+
+    def _payload(self, user_id, symbols=None, prices=None):
+        """Holding rows (optionally only for changed symbols) plus the user's totals"""
+        prices = self._prices if prices is None else prices
+        holdings = []
+        total_invested = 0.0
+        total_value = 0.0
+        for holding in self._holdings.get(user_id, []):
+            price = prices.get(holding['stock'], holding['current_price'])
+            invested = holding['quantity'] * holding['buying_price']
+            value = holding['quantity'] * price
+            total_invested += invested
+            total_value += value
+            if symbols is None or holding['stock'] in symbols:
+                holdings.append({
+                    'id': holding['id'],
+                    'stock': holding['stock'],
+                    'current_price': price,
+                    'current_value': round(value, 2),
+                    'profit_loss': round(value - invested, 2),
+                    'profit_loss_percentage': round((value - invested) / invested * 100, 2) if invested else 0,
+                })
+
+        total_profit_loss = total_value - total_invested
+        return {
+            'prices': {h['stock']: h['current_price'] for h in holdings},
+            'holdings': holdings,
+            'summary': {
+                'total_invested': round(total_invested, 2),
+                'total_current_value': round(total_value, 2),
+                'total_profit_loss': round(total_profit_loss, 2),
+                'total_profit_loss_percentage': round(total_profit_loss / total_invested * 100, 2) if total_invested else 0,
+            },
+        }
+
+    async def _tick(self):
+        loop = asyncio.get_running_loop()
+        users = set(self._clients.values())
+        if not users:
+            return
+
+        if self._holdings_loaded_at is None or loop.time() - self._holdings_loaded_at >= settings.STREAM_HOLDINGS_REFRESH:
+            await sync_to_async(self._load_holdings)(users)
+            self._holdings_loaded_at = loop.time()
+
+        changed = await sync_to_async(self._read_changed_quotes)()
+        self._prices.update(changed)
+        unread = await sync_to_async(self._read_unread)(users)
+
+        payloads = {}
+        for queue, user_id in list(self._clients.items()):
+            held = {h['stock'] for h in self._holdings.get(user_id, [])}
+            symbols = held & changed.keys()
+            if symbols:
+                if user_id not in payloads:
+                    payloads[user_id] = self._payload(user_id, symbols)
+                self._push(queue, 'prices', payloads[user_id])
+
+        for user_id in users:
+            count = unread.get(user_id, 0)
+            if self._unread.get(user_id) != count:
+                self._unread[user_id] = count
+                for queue, client_user in list(self._clients.items()):
+                    if client_user == user_id:
+                        self._push(queue, 'signals', {'unread_count': count})
+
+    async def _run(self):
+        while self._clients:
+            try:
+                await self._tick()
+            except Exception as e:
+                print(f"Price broadcast tick failed: {e}")
+            await asyncio.sleep(settings.STREAM_POLL_INTERVAL)
+
+
+# One fan-out loop shared by every stream connection of this process
+broadcaster = PriceBroadcaster()
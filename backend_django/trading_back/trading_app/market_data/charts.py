@@ -0,0 +1,77 @@
+"""
+Chart Series Helpers
+Slices chart periods out of one daily series, downsamples them to a point
+budget with Largest-Triangle-Three-Buckets and serializes them without
+per-row pandas access.
+"""
+
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+
+def slice_period(bars, period, today=None):
+    """Return the rows of a daily bar frame that history(period=...) would return"""
+    today = pd.Timestamp(today or date.today())
+    if period.endswith('mo'):
+        start = today - pd.DateOffset(months=int(period[:-2]))
+    elif period.endswith('y'):
+        start = today - pd.DateOffset(years=int(period[:-1]))
+    elif period.endswith('d'):
+        return bars.tail(int(period[:-1]))
+    else:
+        raise ValueError(f"Unsupported period: {period}")
+    return bars.iloc[bars['date'].searchsorted(start, side='left'):]
+
+
+def lttb_indices(x, y, n_out):
+    """
+    Indices of the points kept by Largest-Triangle-Three-Buckets downsampling.
+    The first and last points are always kept; each bucket in between keeps the
+    point forming the largest triangle with the previous pick and the average
+    of the next bucket, which preserves peaks and troughs.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype='float64')
+    y = np.asarray(y, dtype='float64')
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+
+    # Average point of every bucket (plus the final point as the last "bucket"), in one pass
+    starts = np.append(edges[:-1], n - 1)
+    counts = np.diff(np.append(starts, n))
+    avg_x = np.add.reduceat(x, starts) / counts
+    avg_y = np.add.reduceat(y, starts) / counts
+
+    picked = np.empty(n_out, dtype=np.int64)
+    picked[0] = 0
+    picked[-1] = n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        bucket_x = x[lo:hi]
+        bucket_y = y[lo:hi]
+        area = np.abs(
+            (x[a] - avg_x[i + 1]) * (bucket_y - y[a]) - (x[a] - bucket_x) * (avg_y[i + 1] - y[a])
+        )
+        a = lo + int(area.argmax())
+        picked[i + 1] = a
+    return picked
+
+
+def downsample(bars, max_points):
+    """Reduce a bar frame to at most max_points rows with LTTB on the close price"""
+    if max_points is None or len(bars) <= max_points:
+        return bars
+    x = bars['date'].values.astype('datetime64[s]').astype('int64')
+    return bars.iloc[lttb_indices(x, bars['close'].values, max_points)]
+
+
+def serialize_series(bars):
+    """Build the [{date, price}] payload with vectorized date formatting"""
+    dates = pd.DatetimeIndex(bars['date']).strftime('%Y-%m-%d %H:%M:%S').tolist()
+    prices = bars['close'].astype('float64').tolist()
+    return [{'date': d, 'price': p} for d, p in zip(dates, prices)]
@@ -0,0 +1,234 @@
+"""
+Index Event Store
+Point-in-time record of index reconstitution events (additions to and
+deletions from the S&P 500, NASDAQ-100, ...) loaded from local files in
+INDEX_EVENTS_DIR. Each event is active from its announcement until
+INDEX_EVENT_TRAILING_DAYS after it takes effect. The active spans are held
+in interval trees, globally and per symbol, so "events active for a symbol
+on a day" and "events overlapping a date window" cost a walk down the tree
+plus the events returned, however long-lived other events are.
+"""
+
+import hashlib
+import os
+import threading
+from bisect import bisect_right
+from collections import namedtuple
+from itertools import takewhile
+from datetime import timedelta
+
+import pandas as pd
+from django.conf import settings
+
+
+EVENT_COLUMNS = ['index_name', 'symbol', 'event_type', 'announcement_date', 'effective_date']
+EVENT_TYPES = ('ADD', 'DELETE')
+EVENT_FILE_EXTENSIONS = ('.csv', '.parquet')
+
+IndexEvent = namedtuple('IndexEvent', EVENT_COLUMNS + ['end_date'])
+
+
+def event_order(event):
+    """Sort key of events: oldest announcement first"""
+    return event.announcement_date, event.effective_date, event.index_name, event.symbol, event.event_type
+
+
+def read_event_file(path):
+    """
+    Read one event file into EVENT_COLUMNS. Without an index_name column the
+    file name is the index (sp500.csv -> SP500). Rows with an unknown event
+    type or unparseable dates are dropped.
+    """
+    frame = pd.read_parquet(path) if path.endswith('.parquet') else pd.read_csv(path)
+    frame = frame.rename(columns=str.lower)
+    if 'index_name' not in frame:
+        frame['index_name'] = os.path.splitext(os.path.basename(path))[0]
+
+    frame = pd.DataFrame({
+        'index_name': frame['index_name'].astype(str).str.strip().str.upper(),
+        'symbol': frame['symbol'].astype(str).str.strip().str.upper(),
+        'event_type': frame['event_type'].astype(str).str.strip().str.upper(),
+        'announcement_date': pd.to_datetime(frame['announcement_date'], errors='coerce'),
+        'effective_date': pd.to_datetime(frame['effective_date'], errors='coerce'),
+    })
+    valid = frame['event_type'].isin(EVENT_TYPES) & frame['announcement_date'].notna() & frame['effective_date'].notna()
+    if not valid.all():
+        print(f"Skipping {int((~valid).sum())} invalid index events in {path}")
+    return frame[valid]
+
+
+class IntervalTree:
+    """
+    Static centered interval tree over the [announcement_date, end_date] spans
+    of events sorted by announcement date. Each node keeps the events spanning
+    its center sorted by start and by end, so a query visits one root-to-leaf
+    path per window edge and only reads events that overlap the window.
+    """
+
+    def __init__(self, events):
+        self.root = self._build(list(events))
+
+    @classmethod
+    def _build(cls, events):
+        if not events:
+            return None
+        # The median announcement: its event spans the center, and at most half
+        # of the events lie entirely on either side of it
+        center = events[len(events) // 2].announcement_date
+        left = [event for event in events if event.end_date < center]
+        right = [event for event in events if event.announcement_date > center]
+        spanning = [event for event in events if event.announcement_date <= center <= event.end_date]
+        return (
+            center,
+            spanning,
+            sorted(spanning, key=lambda event: event.end_date, reverse=True),
+            cls._build(left),
+            cls._build(right),
+        )
+
+    def overlapping(self, first, last):
+        """Events active on any day of [first, last], in no particular order"""
+        found = []
+        nodes = [self.root]
+        while nodes:
+            node = nodes.pop()
+            if node is None:
+                continue
+            center, by_start, by_end, left, right = node
+            if last < center:
+                found.extend(takewhile(lambda event: event.announcement_date <= last, by_start))
+                nodes.append(left)
+            elif first > center:
+                found.extend(takewhile(lambda event: event.end_date >= first, by_end))
+                nodes.append(right)
+            else:
+                found.extend(by_start)
+                nodes.extend((left, right))
+        return found
+
+
+class IndexEvents:
+    """Immutable, queryable set of index events"""
+
+    def __init__(self, events, trailing_days=None):
+        trailing = timedelta(days=settings.INDEX_EVENT_TRAILING_DAYS if trailing_days is None else trailing_days)
+        self.events = sorted(
+            (IndexEvent(*event[:len(EVENT_COLUMNS)], max(event[3], event[4]) + trailing) for event in events),
+            key=event_order,
+        )
+        self._tree = IntervalTree(self.events)
+
+        self._by_symbol = {}
+        self._membership = {}
+        for event in self.events:
+            self._by_symbol.setdefault(event.symbol, []).append(event)
+        self._by_symbol = {symbol: IntervalTree(events) for symbol, events in self._by_symbol.items()}
+        for event in sorted(self.events, key=lambda event: event.effective_date):
+            dates, types = self._membership.setdefault((event.index_name, event.symbol), ([], []))
+            dates.append(event.effective_date)
+            types.append(event.event_type)
+
+    @classmethod
+    def from_frame(cls, frame, trailing_days=None):
+        """Build from a DataFrame with EVENT_COLUMNS (dates as datetimes or dates)"""
+        frame = frame[EVENT_COLUMNS].copy()
+        for column in ('announcement_date', 'effective_date'):
+            frame[column] = pd.to_datetime(frame[column]).dt.date
+        return cls(frame.itertuples(index=False, name=None), trailing_days)
+
+    def __len__(self):
+        return len(self.events)
+
+    def active(self, symbol, day):
+        """Events of symbol active on day, oldest announcement first"""
+        tree = self._by_symbol.get(symbol.upper())
+        if tree is None:
+            return []
+        return sorted(tree.overlapping(day, day), key=event_order)
+
+    def window(self, start_date, end_date, symbols=None):
+        """Events active on any day of [start_date, end_date], optionally only for symbols"""
+        if symbols is not None:
+            symbols = {symbol.upper() for symbol in symbols}
+            if len(symbols) < len(self._by_symbol):
+                events = []
+                for symbol in symbols:
+                    if symbol in self._by_symbol:
+                        events.extend(self._by_symbol[symbol].overlapping(start_date, end_date))
+                return sorted(events, key=event_order)
+        return sorted(
+            (event for event in self._tree.overlapping(start_date, end_date)
+             if symbols is None or event.symbol in symbols),
+            key=event_order,
+        )
+
+    def is_member(self, index_name, symbol, day):
+        """
+        Whether symbol belonged to index_name on day, from the last event
+        effective on or before it. Before its first recorded event a symbol
+        is a member only if that event removes it.
+        """
+        entry = self._membership.get((index_name.upper(), symbol.upper()))
+        if entry is None:
+            return False
+        dates, types = entry
+        position = bisect_right(dates, day)
+        return types[position - 1] == 'ADD' if position else types[0] == 'DELETE'
+
+    def members(self, index_name, day):
+        """Symbols with a recorded event that belonged to index_name on day"""
+        index_name = index_name.upper()
+        return sorted(
+            symbol for name, symbol in self._membership
+            if name == index_name and self.is_member(name, symbol, day)
+        )
+
+    def fingerprint(self, symbols, start_date, end_date):
+        """Hash of the events of symbols overlapping [start_date, end_date]"""
+        digest = hashlib.sha256()
+        for event in self.window(start_date, end_date, symbols):
+            digest.update(repr(tuple(event)).encode())
+        return digest.hexdigest()
+
+
+class IndexEventStore:
+    """
+    Index events read from every .csv/.parquet file in INDEX_EVENTS_DIR
+    (index_name, symbol, event_type ADD/DELETE, announcement_date,
+    effective_date). Reloaded when a file is added, removed or modified.
+    """
+
+    def __init__(self, root=None):
+        self._root = root
+        self._signature = None
+        self._events = None
+        self._lock = threading.Lock()
+
+    @property
+    def root(self):
+        return str(self._root or settings.INDEX_EVENTS_DIR)
+
+    def _files(self):
+        try:
+            entries = list(os.scandir(self.root))
+        except FileNotFoundError:
+            return []
+        return sorted(
+            (entry.path, entry.stat().st_mtime_ns, entry.stat().st_size) for entry in entries
+            if entry.is_file() and entry.name.endswith(EVENT_FILE_EXTENSIONS)
+        )
+
+    def current(self):
+        """The IndexEvents of the files as they are now (empty if there are none)"""
+        files = self._files()
+        signature = (tuple(files), settings.INDEX_EVENT_TRAILING_DAYS)
+        with self._lock:
+            if signature != self._signature:
+                frames = [read_event_file(path) for path, _, _ in files]
+                frame = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=EVENT_COLUMNS)
+                self._events = IndexEvents.from_frame(frame)
+                self._signature = signature
+            return self._events
+
+
+index_event_store = IndexEventStore()
@@ -0,0 +1,96 @@
+"""
+Price Ingestion Feed
+Polls the union of every symbol the app cares about (holdings, active
+signals and the Hermes watchlists) in batches on a fixed cadence and
+publishes the latest prices to MarketQuote. Upstream calls scale with the
+number of distinct symbols, not with the number of users.
+"""
+
+import asyncio
+from decimal import Decimal
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+
+from ..auto_trading_engine import AutoTradingEngine
+from ..models import Holding, MarketQuote, Signal
+from .price_refresh import apply_holding_prices
+from .providers import get_provider
+
+
+def subscribed_symbols():
+    """Distinct upper-case symbols across holdings, active signals and bot watchlists"""
+    symbols = set()
+    symbols.update(Holding.objects.values_list('stock', flat=True).distinct())
+    symbols.update(Signal.objects.filter(is_active=True).values_list('stock', flat=True).distinct())
+    for config in AutoTradingEngine.RISK_CONFIG.values():
+        symbols.update(config['stocks'])
+    return sorted({s.upper() for s in symbols if s})
+
+
+def publish_quotes(prices):
+    """Upsert the latest prices into MarketQuote and push them onto holdings"""
+    if not prices:
+        return
+    now = timezone.now()
+    quotes = [
+        MarketQuote(symbol=symbol, price=Decimal(str(price)).quantize(Decimal('0.0001')), updated_at=now)
+        for symbol, price in prices.items()
+    ]
+    MarketQuote.objects.bulk_create(
+        quotes,
+        update_conflicts=True,
+        unique_fields=['symbol'],
+        update_fields=['price', 'updated_at'],
+    )
+    apply_holding_prices(prices)
+
+
+class PriceIngestor:
+    """Asyncio loop that polls subscribed symbols in batches and publishes their prices"""
+
+    def __init__(self, provider=None, interval=None, batch_size=None, stdout=None):
+        self.provider = provider or get_provider()
+        self.interval = interval or settings.PRICE_INGEST_INTERVAL
+        self.batch_size = batch_size or settings.PRICE_INGEST_BATCH_SIZE
+        self.stdout = stdout
+
+    def log(self, message):
+        if self.stdout:
+            self.stdout.write(message)
+        else:
+            print(message)
+
+    async def _fetch_batch(self, batch):
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(None, self.provider.get_last_prices, batch)
+        except Exception as e:
+            self.log(f"Error fetching batch {batch[0]}..{batch[-1]}: {e}")
+            return {}
+
+    async def poll_once(self):
+        """Fetch every subscribed symbol once and publish the results"""
+        symbols = await sync_to_async(subscribed_symbols)()
+        batches = [symbols[i:i + self.batch_size] for i in range(0, len(symbols), self.batch_size)]
+
+        prices = {}
+        for result in await asyncio.gather(*(self._fetch_batch(batch) for batch in batches)):
+            prices.update(result)
+
+        await sync_to_async(publish_quotes)(prices)
+        return len(symbols), len(prices)
+
+    async def run(self, once=False):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            try:
+                subscribed, published = await self.poll_once()
+                self.log(f"Published {published}/{subscribed} quotes in {loop.time() - started:.2f}s")
+            except Exception as e:
+                self.log(f"Price ingestion cycle failed: {e}")
+            if once:
+                return
+            await asyncio.sleep(max(0.0, self.interval - (loop.time() - started)))
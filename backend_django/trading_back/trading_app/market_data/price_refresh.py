@@ -0,0 +1,101 @@
+"""
+Batched Holding Price Refresh
+Deduplicates symbols across all users, downloads them in one request and
+writes the changed prices back with a single bulk_update.
+"""
+
+from datetime import timedelta
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.functions import Upper
+from django.utils import timezone
+
+from ..models import Holding, MarketQuote
+from .providers import get_provider
+
+
+CACHE_KEY_PREFIX = 'price_refresh:'
+
+
+def _cache_key(symbol):
+    return f"{CACHE_KEY_PREFIX}{symbol}"
+
+
+def apply_holding_prices(prices):
+    """Write {symbol: price} onto every user's holdings with one bulk_update"""
+    new_prices = {
+        symbol.upper(): Decimal(str(price)).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+        for symbol, price in prices.items()
+    }
+    if not new_prices:
+        return 0
+
+    changed = []
+    holdings = (
+        Holding.objects.annotate(symbol=Upper('stock'))
+        .filter(symbol__in=list(new_prices))
+        .only('id', 'stock', 'current_price')
+    )
+    for holding in holdings:
+        new_price = new_prices[holding.symbol]
+        if holding.current_price != new_price:
+            holding.current_price = new_price
+            changed.append(holding)
+    if changed:
+        Holding.objects.bulk_update(changed, ['current_price'])
+    return len(changed)
+
+
+def published_prices(symbols, max_age=None):
+    """Return {symbol: price} for symbols with a published quote younger than max_age seconds"""
+    max_age = settings.PUBLISHED_QUOTE_MAX_AGE if max_age is None else max_age
+    cutoff = timezone.now() - timedelta(seconds=max_age)
+    rows = MarketQuote.objects.filter(
+        symbol__in=[s.upper() for s in symbols],
+        updated_at__gte=cutoff,
+    ).values_list('symbol', 'price')
+    return {symbol: float(price) for symbol, price in rows}
+
+
+def refresh_holding_prices(symbols):
+    """
+    Refresh current_price of every holding (for all users) in the given symbols.
+
+    Symbols refreshed within the last PRICE_REFRESH_INTERVAL seconds, or with a
+    quote published by the ingest_prices daemon, are not fetched again, so
+    concurrent Holdings pages of different users share one upstream download.
+
+    Returns ({symbol: price}, [symbols that could not be priced]).
+    """
+    symbols = sorted({s.upper() for s in symbols if s})
+    if not symbols:
+        return {}, []
+
+    recent = cache.get_many([_cache_key(s) for s in symbols])
+    prices = {s: recent[_cache_key(s)] for s in symbols if _cache_key(s) in recent}
+
+    # Symbols kept fresh by the ingest_prices daemon are already applied to holdings
+    missing = [s for s in symbols if s not in prices]
+    if missing:
+        prices.update(published_prices(missing))
+
+    stale = [s for s in symbols if s not in prices]
+    if not stale:
+        return prices, []
+
+    try:
+        fetched = get_provider().get_last_prices(stale)
+    except Exception as e:
+        print(f"Error downloading prices for {', '.join(stale)}: {e}")
+        fetched = {}
+
+    fetched = {s: p for s, p in fetched.items() if p and p > 0}
+    if fetched:
+        apply_holding_prices(fetched)
+        cache.set_many({_cache_key(s): p for s, p in fetched.items()}, timeout=settings.PRICE_REFRESH_INTERVAL)
+        prices.update(fetched)
+
+    failed = [s for s in stale if s not in fetched]
+    return prices, failed
@@ -0,0 +1,325 @@
+"""
+Market Data Providers
+Every quote, history and fundamentals read goes through a provider so the
+upstream source can be swapped: yfinance for live data, or a deterministic
+replay of local CSV/Parquet files for offline backtests and benchmarks.
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import pandas as pd
+import yfinance as yf
+from yfinance.exceptions import YFPricesMissingError
+from django.conf import settings
+
+from .single_flight import CoalescingProvider
+
+
+BAR_COLUMNS = ['date', 'open', 'high', 'low', 'close', 'volume']
+FUNDAMENTAL_COLUMNS = ['symbol', 'name', 'market_cap', 'volume', 'sector']
+
+
+def empty_bars():
+    """Return an empty bar frame with the standard column layout"""
+    return pd.DataFrame({
+        'date': pd.Series(dtype='datetime64[ns]'),
+        'open': pd.Series(dtype='float64'),
+        'high': pd.Series(dtype='float64'),
+        'low': pd.Series(dtype='float64'),
+        'close': pd.Series(dtype='float64'),
+        'volume': pd.Series(dtype='int64'),
+    })
+
+
+def normalize_bars(df):
+    """
+    Convert a yfinance-style frame (Date/Datetime index, capitalised columns)
+    or a lower-case date/open/... frame to the standard bar layout.
+    """
+    if df is None or df.empty:
+        return empty_bars()
+
+    df = df.reset_index() if 'date' not in df.columns else df
+    df = df.rename(columns={'Date': 'date', 'Datetime': 'date', 'Open': 'open', 'High': 'high',
+                            'Low': 'low', 'Close': 'close', 'Volume': 'volume'})
+    df = df.dropna(subset=['close'])
+
+    stamps = pd.to_datetime(df['date'])
+    if stamps.dt.tz is not None:
+        stamps = stamps.dt.tz_localize(None)
+
+    return pd.DataFrame({
+        'date': stamps.astype('datetime64[ns]').values,
+        'open': df['open'].astype('float64').values,
+        'high': df['high'].astype('float64').values,
+        'low': df['low'].astype('float64').values,
+        'close': df['close'].astype('float64').values,
+        'volume': df['volume'].fillna(0).astype('int64').values,
+    }).sort_values('date').reset_index(drop=True)
+
+
+class MarketDataProvider:
+    """Interface implemented by every market data source"""
+
+    name = 'base'
+
+    def get_quote(self, symbol):
+        """Return {'name', 'current_price', 'currency'} for a symbol"""
+        raise NotImplementedError
+
+    def get_history(self, symbol, start, end, interval='1d'):
+        """Return bars with start <= date <= end in the standard layout"""
+        raise NotImplementedError
+
+    def get_fundamentals(self, symbol):
+        """Return {'name', 'market_cap', 'volume', 'sector'} for a symbol"""
+        raise NotImplementedError
+
+    def get_bulk_history(self, symbols, start, end, interval='1d'):
+        """Return {symbol: bars} for many symbols"""
+        return {symbol: self.get_history(symbol, start, end, interval) for symbol in symbols}
+
+    def get_fundamentals_table(self, symbols=None):
+        """
+        Return fundamentals as one DataFrame with FUNDAMENTAL_COLUMNS, a row per
+        symbol. symbols=None lists every symbol the provider knows, which is
+        none unless the provider has a local universe.
+        """
+        rows = [{'symbol': symbol, **self.get_fundamentals(symbol)} for symbol in symbols or []]
+        return pd.DataFrame(rows, columns=FUNDAMENTAL_COLUMNS)
+
+    def get_last_prices(self, symbols):
+        """Return {symbol: latest close} for many symbols"""
+        prices = {}
+        for symbol in symbols:
+            quote = self.get_quote(symbol)
+            if quote.get('current_price'):
+                prices[symbol] = float(quote['current_price'])
+        return prices
+
+
+class YFinanceProvider(MarketDataProvider):
+    """Live data from Yahoo Finance"""
+
+    name = 'yfinance'
+
+    def get_quote(self, symbol):
+        info = yf.Ticker(symbol).info
+        return {
+            'name': info.get('longName', symbol),
+            'current_price': info.get('currentPrice') or info.get('regularMarketPrice'),
+            'currency': info.get('currency', 'USD'),
+        }
+
+    def get_history(self, symbol, start, end, interval='1d'):
+        ticker = yf.Ticker(symbol)
+        try:
+            # raise_errors so network failures are not mistaken for "no bars in range"
+            df = ticker.history(start=start, end=end + timedelta(days=1), interval=interval, raise_errors=True)
+        except YFPricesMissingError:
+            return empty_bars()
+        return normalize_bars(df)
+
+    def get_fundamentals(self, symbol):
+        info = yf.Ticker(symbol).info
+        return {
+            'name': info.get('longName', symbol),
+            'market_cap': info.get('marketCap'),
+            'volume': info.get('averageVolume') or info.get('volume'),
+            'sector': info.get('sector'),
+        }
+
+    def get_fundamentals_table(self, symbols=None):
+        # One .info request per ticker, so fetch them concurrently
+        def fetch(symbol):
+            try:
+                return {'symbol': symbol, **self.get_fundamentals(symbol)}
+            except Exception as e:
+                print(f"Error fetching fundamentals for {symbol}: {e}")
+                return {'symbol': symbol}
+
+        with ThreadPoolExecutor(max_workers=settings.FUNDAMENTALS_FETCH_WORKERS) as pool:
+            rows = list(pool.map(fetch, symbols or []))
+        return pd.DataFrame(rows, columns=FUNDAMENTAL_COLUMNS)
+
+    def get_bulk_history(self, symbols, start, end, interval='1d'):
+        symbols = list(symbols)
+        if not symbols:
+            return {}
+        data = yf.download(symbols, start=start, end=end + timedelta(days=1), interval=interval,
+                           group_by='ticker', threads=True, progress=False)
+        result = {}
+        for symbol in symbols:
+            try:
+                result[symbol] = normalize_bars(data[symbol])
+            except KeyError:
+                result[symbol] = empty_bars()
+        return result
+
+    def get_last_prices(self, symbols):
+        symbols = list(symbols)
+        if not symbols:
+            return {}
+        data = yf.download(symbols, period='5d', interval='1d', group_by='ticker',
+                           auto_adjust=False, threads=True, progress=False)
+        if data is None or data.empty:
+            return {}
+
+        prices = {}
+        for symbol in symbols:
+            try:
+                closes = data[symbol]['Close'].dropna()
+            except KeyError:
+                continue
+            if not closes.empty:
+                prices[symbol] = float(closes.iloc[-1])
+        return prices
+
+
+class ReplayProvider(MarketDataProvider):
+    """
+    Deterministic offline data replayed from <data_dir>/<SYMBOL>.csv or .parquet
+    files with date,open,high,low,close,volume columns (the layout of
+    data/prices used by backtest_clean_energy). An optional fundamentals.csv
+    (symbol,name,market_cap,volume,sector) supplies fundamentals.
+
+    Quotes are the last close on or before as_of (or the last bar in the file).
+    """
+
+    name = 'replay'
+
+    def __init__(self, data_dir=None, as_of=None):
+        self.data_dir = str(data_dir or settings.MARKET_DATA_REPLAY_DIR)
+        self.as_of = pd.Timestamp(as_of) if as_of else None
+        self._frames = {}
+        self._fundamentals = None
+        self._lock = threading.Lock()
+
+    def _load(self, symbol):
+        symbol = symbol.upper()
+        if symbol in self._frames:
+            return self._frames[symbol]
+
+        parquet_path = os.path.join(self.data_dir, f"{symbol}.parquet")
+        csv_path = os.path.join(self.data_dir, f"{symbol}.csv")
+        if os.path.exists(parquet_path):
+            bars = normalize_bars(pd.read_parquet(parquet_path))
+        elif os.path.exists(csv_path):
+            bars = normalize_bars(pd.read_csv(csv_path))
+        else:
+            bars = empty_bars()
+
+        with self._lock:
+            self._frames[symbol] = bars
+        return bars
+
+    def get_history(self, symbol, start, end, interval='1d'):
+        if interval != '1d':
+            return empty_bars()
+        bars = self._load(symbol)
+        mask = (bars['date'] >= pd.Timestamp(start)) & (bars['date'] < pd.Timestamp(end) + pd.Timedelta(days=1))
+        return bars.loc[mask].reset_index(drop=True)
+
+    def _last_close(self, symbol):
+        bars = self._load(symbol)
+        if self.as_of is not None:
+            bars = bars[bars['date'] <= self.as_of]
+        if bars.empty:
+            return None
+        return float(bars['close'].iloc[-1])
+
+    def _fundamentals_table(self):
+        if self._fundamentals is None:
+            path = os.path.join(self.data_dir, 'fundamentals.csv')
+            table = pd.read_csv(path) if os.path.exists(path) else pd.DataFrame(columns=['symbol'])
+            self._fundamentals = table.set_index(table['symbol'].str.upper())
+        return self._fundamentals
+
+    def _fundamentals_row(self, symbol):
+        table = self._fundamentals_table()
+        if symbol.upper() in table.index:
+            return table.loc[symbol.upper()].to_dict()
+        return {}
+
+    def get_quote(self, symbol):
+        row = self._fundamentals_row(symbol)
+        return {
+            'name': row.get('name', symbol),
+            'current_price': self._last_close(symbol),
+            'currency': 'USD',
+        }
+
+    def get_fundamentals(self, symbol):
+        row = self._fundamentals_row(symbol)
+        volume = row.get('volume')
+        if volume is None:
+            bars = self._load(symbol)
+            volume = int(bars['volume'].tail(20).mean()) if not bars.empty else None
+        return {
+            'name': row.get('name', symbol),
+            'market_cap': row.get('market_cap'),
+            'volume': volume,
+            'sector': row.get('sector'),
+        }
+
+    def get_fundamentals_table(self, symbols=None):
+        table = self._fundamentals_table().reindex(columns=FUNDAMENTAL_COLUMNS)
+        if symbols is None:
+            return table.reset_index(drop=True)
+
+        symbols = list(symbols)
+        table = table.reindex([symbol.upper() for symbol in symbols])
+        table['symbol'] = symbols
+        table['name'] = table['name'].fillna(table['symbol'])
+        # Like get_fundamentals, symbols without a volume use their recent average
+        for position in (table['volume'].isna()).to_numpy().nonzero()[0]:
+            bars = self._load(symbols[position])
+            if not bars.empty:
+                table.iloc[position, table.columns.get_loc('volume')] = int(bars['volume'].tail(20).mean())
+        return table.reset_index(drop=True)
+
+    def get_last_prices(self, symbols):
+        prices = {}
+        for symbol in symbols:
+            price = self._last_close(symbol)
+            if price:
+                prices[symbol] = price
+        return prices
+
+
+PROVIDERS = {
+    YFinanceProvider.name: YFinanceProvider,
+    ReplayProvider.name: ReplayProvider,
+}
+
+_default_provider = None
+
+
+def create_provider(name, **options):
+    """Instantiate a provider by name ('yfinance' or 'replay')"""
+    try:
+        return PROVIDERS[name](**options)
+    except KeyError:
+        raise ValueError(f"Unknown market data provider: {name}")
+
+
+def get_provider():
+    """
+    Return the process-wide provider selected by MARKET_DATA_PROVIDER,
+    wrapped so concurrent identical requests share one upstream call
+    """
+    global _default_provider
+    if _default_provider is None:
+        _default_provider = CoalescingProvider(create_provider(settings.MARKET_DATA_PROVIDER))
+    return _default_provider
+
+
+def set_provider(provider):
+    """Replace the process-wide provider (e.g. a replay provider for offline runs)"""
+    global _default_provider
+    if not isinstance(provider, CoalescingProvider):
+        provider = CoalescingProvider(provider)
+    _default_provider = provider
@@ -0,0 +1,87 @@
+"""
+Quote & Chart Cache
+Process-wide LRU cache with a TTL per entry. Stale entries are served
+immediately while a background thread refreshes them (stale-while-revalidate).
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+
+class QuoteCache:
+    """Thread-safe LRU cache with per-entry TTL and background revalidation"""
+
+    # An entry older than ttl * STALE_FACTOR is reloaded synchronously instead of served stale
+    STALE_FACTOR = 5
+
+    def __init__(self, max_entries=None):
+        self._max_entries = max_entries
+        self._entries = OrderedDict()  # {key: (value, fetched_at)}
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'stale_hits': 0, 'misses': 0, 'refreshes': 0, 'evictions': 0}
+
+    @property
+    def max_entries(self):
+        return self._max_entries or settings.QUOTE_CACHE_MAX_ENTRIES
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def get(self, key, loader, ttl):
+        """
+        Return the cached value for key, calling loader() on a miss.
+        A stale hit returns the old value and refreshes it in the background.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, fetched_at = entry
+                age = now - fetched_at
+                if age < ttl * self.STALE_FACTOR:
+                    self._entries.move_to_end(key)
+                    if age < ttl:
+                        self.stats['hits'] += 1
+                    else:
+                        self.stats['stale_hits'] += 1
+                        self._schedule_refresh(key, loader)
+                    return value
+            self.stats['misses'] += 1
+
+        value = loader()
+        self.set(key, value)
+        return value
+
+    def _schedule_refresh(self, key, loader):
+        # Called with self._lock held
+        if key in self._refreshing:
+            return
+        self._refreshing.add(key)
+        self.stats['refreshes'] += 1
+        threading.Thread(target=self._refresh, args=(key, loader), daemon=True).start()
+
+    def _refresh(self, key, loader):
+        try:
+            self.set(key, loader())
+        except Exception as e:
+            print(f"Background refresh failed for {key}: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+
+# Shared by all request threads of this process
+quote_cache = QuoteCache()
@@ -0,0 +1,91 @@
+"""
+Cached Quotes & Chart Series
+Quote and per-period chart data used by TradingViewSet.get_stock_price, and
+the watchlist return history behind the Hermes bot simulations.
+"""
+
+from datetime import date, timedelta
+
+import pandas as pd
+from django.conf import settings
+
+from .bar_store import bar_store
+from .charts import downsample, serialize_series, slice_period
+from .price_refresh import published_prices
+from .providers import get_provider
+from .quote_cache import quote_cache
+
+
+# Chart label -> yfinance history period
+CHART_PERIODS = {
+    '1D': '1d',
+    '1W': '5d',
+    '1M': '1mo',
+    '3M': '3mo',
+    '1Y': '1y',
+    '5Y': '5y',
+}
+
+
+def fetch_quote(symbol):
+    """
+    Fetch name, current price and currency from the market data provider,
+    with the ingest_prices published price when it is fresh
+    """
+    quote = get_provider().get_quote(symbol)
+    published = published_prices([symbol])
+    if symbol.upper() in published:
+        quote = dict(quote, current_price=published[symbol.upper()])
+    return quote
+
+
+def fetch_chart(symbol, label, max_points=None):
+    """Build the downsampled [{date, price}] series of one chart period"""
+    # Every period is sliced from the single 5Y daily series, so at most one upstream fetch
+    bars = bar_store.get_period(symbol, CHART_PERIODS['5Y'])
+    bars = slice_period(bars, CHART_PERIODS[label])
+    return serialize_series(downsample(bars, max_points))
+
+
+def get_quote(symbol):
+    """Cached quote for a symbol; a warm hit costs no upstream call or query"""
+    ttl = settings.QUOTE_CACHE_TTLS['quote']
+    return quote_cache.get(('quote', symbol), lambda: fetch_quote(symbol), ttl)
+
+
+def get_chart(symbol, label, max_points=None):
+    """Cached chart series for a symbol, chart label (1D, 1W, ... 5Y) and point budget"""
+    ttl = settings.QUOTE_CACHE_TTLS[label]
+    return quote_cache.get(
+        ('chart', symbol, label, max_points),
+        lambda: fetch_chart(symbol, label, max_points),
+        ttl,
+    )
+
+
+def fetch_watchlist_returns(symbols, lookback_days):
+    """Daily returns of an equal-weighted watchlist over the last lookback_days"""
+    end = date.today()
+    start = end - timedelta(days=lookback_days)
+    bar_store.prefetch(symbols, start, end)
+
+    closes = {}
+    for symbol in symbols:
+        bars = bar_store.get_bars(symbol, start, end)
+        if not bars.empty:
+            closes[symbol] = bars.set_index('date')['close']
+    if not closes:
+        return pd.Series(dtype='float64').values
+
+    returns = pd.DataFrame(closes).sort_index().pct_change(fill_method=None).iloc[1:]
+    return returns.mean(axis=1, skipna=True).dropna().values
+
+
+def get_watchlist_returns(symbols, lookback_days=None):
+    """Cached equal-weighted daily returns of a watchlist"""
+    lookback_days = lookback_days or settings.MONTE_CARLO_LOOKBACK_DAYS
+    return quote_cache.get(
+        ('watchlist_returns', tuple(symbols), lookback_days),
+        lambda: fetch_watchlist_returns(symbols, lookback_days),
+        settings.QUOTE_CACHE_TTLS['returns'],
+    )
@@ -0,0 +1,111 @@
+"""
+Single-Flight Request Coalescing
+Concurrent callers asking for the same (data kind, symbol, ...) key wait on
+one in-flight upstream fetch instead of each starting their own.
+"""
+
+import threading
+
+from django.conf import settings
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Run at most one fn() per key at a time; concurrent callers share its result"""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.stats = {'calls': 0, 'executions': 0, 'coalesced': 0, 'timeouts': 0, 'errors': 0}
+
+    def do(self, key, fn, timeout=None):
+        """
+        Return fn() for key, joining an in-flight call when there is one.
+        Callers that join wait at most timeout seconds before giving up.
+        """
+        with self._lock:
+            self.stats['calls'] += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                self.stats['executions'] += 1
+            else:
+                self.stats['coalesced'] += 1
+
+        if leader:
+            try:
+                call.result = fn()
+            except Exception as e:
+                call.error = e
+                with self._lock:
+                    self.stats['errors'] += 1
+            finally:
+                with self._lock:
+                    self._calls.pop(key, None)
+                call.done.set()
+        elif not call.done.wait(timeout):
+            with self._lock:
+                self.stats['timeouts'] += 1
+            raise TimeoutError(f"Timed out after {timeout}s waiting for in-flight fetch {key}")
+
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
+
+
+class CoalescingProvider:
+    """Wraps a market data provider so identical concurrent requests share one upstream call"""
+
+    def __init__(self, provider, flight=None):
+        self.provider = provider
+        self.flight = flight or SingleFlight()
+
+    @property
+    def name(self):
+        return self.provider.name
+
+    def _do(self, kind, key, fn):
+        timeout = settings.SINGLE_FLIGHT_TIMEOUTS.get(kind)
+        return self.flight.do((kind,) + key, fn, timeout)
+
+    def get_quote(self, symbol):
+        return self._do('quote', (symbol,), lambda: self.provider.get_quote(symbol))
+
+    def get_history(self, symbol, start, end, interval='1d'):
+        return self._do(
+            'history', (symbol, start, end, interval),
+            lambda: self.provider.get_history(symbol, start, end, interval),
+        )
+
+    def get_fundamentals(self, symbol):
+        return self._do('fundamentals', (symbol,), lambda: self.provider.get_fundamentals(symbol))
+
+    def get_fundamentals_table(self, symbols=None):
+        symbols = None if symbols is None else sorted(set(symbols))
+        return self._do(
+            'fundamentals_table', (None if symbols is None else tuple(symbols),),
+            lambda: self.provider.get_fundamentals_table(symbols),
+        )
+
+    def get_bulk_history(self, symbols, start, end, interval='1d'):
+        symbols = sorted(set(symbols))
+        return self._do(
+            'bulk_history', (tuple(symbols), start, end, interval),
+            lambda: self.provider.get_bulk_history(symbols, start, end, interval),
+        )
+
+    def get_last_prices(self, symbols):
+        symbols = sorted(set(symbols))
+        return self._do('last_prices', (tuple(symbols),), lambda: self.provider.get_last_prices(symbols))
@@ -0,0 +1,138 @@
+"""
+Synthetic Market Data
+Generates daily OHLCV bars for any number of made-up symbols with geometric
+Brownian motion: each symbol drifts and diffuses with its own parameters,
+switches between calm and turbulent volatility regimes, occasionally gaps
+overnight, and trades more volume on large moves. The output uses the
+<SYMBOL>.csv/.parquet layout read by the replay provider and by
+backtest_clean_energy, so backtests can be scaled and benchmarked offline.
+"""
+
+import os
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from .providers import BAR_COLUMNS
+
+
+TRADING_DAYS_PER_YEAR = 252
+SECTORS = ['Technology', 'Healthcare', 'Financials', 'Energy', 'Industrials', 'Consumer', 'Utilities']
+
+# Volatility regimes: daily chance of entering / leaving the turbulent regime and its volatility multiple
+TURBULENT_ENTER_PROB = 0.02
+TURBULENT_EXIT_PROB = 0.10
+TURBULENT_VOL_MULTIPLE = 2.5
+# Daily chance of an overnight gap and its size in daily standard deviations
+GAP_PROB = 0.01
+GAP_SIZE = 4.0
+# Share of the daily variance realized overnight (open vs previous close)
+OVERNIGHT_VARIANCE = 0.3
+
+
+def synthetic_symbols(count):
+    return [f"S{i:04d}" for i in range(count)]
+
+
+def trading_days(years, end_date=None):
+    """Business days covering the given number of years up to end_date"""
+    end = pd.Timestamp(end_date or date(2025, 12, 31))
+    return pd.bdate_range(end=end, periods=int(round(years * TRADING_DAYS_PER_YEAR)))
+
+
+def generate_bars(n_symbols, dates, seed=None):
+    """
+    Return {field: (days x symbols) array} of open/high/low/close/volume.
+    All symbols are generated together, one vectorized step per day.
+    """
+    rng = np.random.default_rng(seed)
+    n_days = len(dates)
+    dt = 1 / TRADING_DAYS_PER_YEAR
+
+    # Per-symbol annual drift and volatility, start price and typical volume
+    drift = rng.normal(0.07, 0.10, n_symbols)
+    vol = rng.uniform(0.15, 0.50, n_symbols)
+    start_price = np.exp(rng.normal(np.log(50), 0.8, n_symbols))
+    base_volume = np.exp(rng.normal(np.log(2e6), 1.0, n_symbols))
+
+    # Two-state Markov chain of volatility regimes
+    turbulent = np.zeros((n_days, n_symbols), dtype=bool)
+    switches = rng.random((n_days, n_symbols))
+    for day in range(1, n_days):
+        previous = turbulent[day - 1]
+        turbulent[day] = np.where(previous, switches[day] >= TURBULENT_EXIT_PROB, switches[day] < TURBULENT_ENTER_PROB)
+
+    sigma = vol * np.sqrt(dt) * np.where(turbulent, TURBULENT_VOL_MULTIPLE, 1.0)
+    mean = (drift - 0.5 * vol ** 2) * dt
+
+    overnight = rng.standard_normal((n_days, n_symbols)) * sigma * np.sqrt(OVERNIGHT_VARIANCE)
+    gaps = rng.random((n_days, n_symbols)) < GAP_PROB
+    overnight += gaps * rng.choice([-1.0, 1.0], (n_days, n_symbols)) * GAP_SIZE * sigma
+    intraday_shock = rng.standard_normal((n_days, n_symbols))
+    intraday = mean + intraday_shock * sigma * np.sqrt(1 - OVERNIGHT_VARIANCE)
+    overnight[0] = 0.0
+
+    # Close-to-close log returns accumulate into the close path; the open adds back the overnight move
+    log_close = np.log(start_price) + np.cumsum(overnight + intraday, axis=0)
+    close = np.exp(log_close)
+    open_ = np.exp(log_close - intraday)
+
+    # Intraday range extends beyond the open/close body
+    wick = np.abs(rng.standard_normal((2, n_days, n_symbols))) * 0.5 * sigma
+    high = np.maximum(open_, close) * np.exp(wick[0])
+    low = np.minimum(open_, close) * np.exp(-wick[1])
+
+    # Whole cents, never below one cent
+    open_, high, low, close = (np.maximum(np.round(values, 2), 0.01) for values in (open_, high, low, close))
+    high = np.maximum.reduce([high, open_, close])
+    low = np.minimum.reduce([low, open_, close])
+
+    # Volume rises with the size of the move and in turbulent regimes
+    activity = 1 + np.abs(intraday_shock) + np.abs(overnight) / sigma
+    volume = base_volume * activity * np.exp(rng.normal(0, 0.3, (n_days, n_symbols)))
+    volume = volume * np.where(turbulent, 1.5, 1.0)
+
+    return {
+        'open': open_,
+        'high': high,
+        'low': low,
+        'close': close,
+        'volume': volume.astype(np.int64),
+    }
+
+
+def write_universe(out_dir, n_symbols, years, end_date=None, seed=0, fmt='parquet'):
+    """
+    Write n_symbols x years of synthetic bars to out_dir as <SYMBOL>.<fmt>,
+    plus fundamentals.csv for the replay provider and universe.csv (a symbol
+    column) for backtest_clean_energy. Returns the list of symbols.
+    """
+    if fmt not in ('csv', 'parquet'):
+        raise ValueError(f"Unknown format {fmt}: use csv or parquet")
+    os.makedirs(out_dir, exist_ok=True)
+
+    dates = trading_days(years, end_date)
+    symbols = synthetic_symbols(n_symbols)
+    bars = generate_bars(n_symbols, dates, seed)
+
+    for col, symbol in enumerate(symbols):
+        frame = pd.DataFrame({'date': dates, **{name: bars[name][:, col] for name in BAR_COLUMNS[1:]}})
+        path = os.path.join(out_dir, f"{symbol}.{fmt}")
+        if fmt == 'csv':
+            frame.to_csv(path, index=False, date_format='%Y-%m-%d')
+        else:
+            frame.to_parquet(path, index=False)
+
+    last_close = bars['close'][-1]
+    shares = np.exp(np.random.default_rng(seed).normal(np.log(2e8), 1.0, n_symbols))
+    pd.DataFrame({
+        'symbol': symbols,
+        'name': [f"Synthetic {symbol}" for symbol in symbols],
+        'market_cap': (last_close * shares).astype(np.int64),
+        'volume': bars['volume'][-TRADING_DAYS_PER_YEAR // 4:].mean(axis=0).astype(np.int64),
+        'sector': [SECTORS[i % len(SECTORS)] for i in range(n_symbols)],
+    }).to_csv(os.path.join(out_dir, 'fundamentals.csv'), index=False)
+    pd.DataFrame({'symbol': symbols}).to_csv(os.path.join(out_dir, 'universe.csv'), index=False)
+
+    return symbols
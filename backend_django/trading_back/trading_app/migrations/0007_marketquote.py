@@ -0,0 +1,28 @@
+# Generated by Django 4.2 on 2026-10-17 01:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trading_app', '0006_autotradingbot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MarketQuote',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('symbol', models.CharField(help_text='Stock ticker symbol', max_length=10, unique=True)),
+                ('price', models.DecimalField(decimal_places=4, help_text='Latest traded/closing price', max_digits=15)),
+                ('updated_at', models.DateTimeField(help_text='When the price was fetched')),
+            ],
+            options={
+                'verbose_name': 'Market Quote',
+                'verbose_name_plural': 'Market Quotes',
+                'db_table': 'market_quote',
+                'ordering': ['symbol'],
+            },
+        ),
+    ]
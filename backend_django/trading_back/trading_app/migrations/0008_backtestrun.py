@@ -0,0 +1,93 @@
+# Generated by Django 4.2 on 2026-10-17 02:13
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trading_app', '0007_marketquote'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BacktestRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('engine', models.CharField(choices=[('loop', 'Day-by-day loop'), ('vectorized', 'Vectorized'), ('fixed', 'Vectorized fixed-point')], default='vectorized', help_text='Backtest engine', max_length=10)),
+                ('start_date', models.DateField(help_text='First backtest date')),
+                ('end_date', models.DateField(help_text='Last backtest date')),
+                ('status', models.CharField(choices=[('QUEUED', 'Queued'), ('RUNNING', 'Running'), ('COMPLETED', 'Completed'), ('FAILED', 'Failed')], default='QUEUED', help_text='Run status', max_length=10)),
+                ('final_value', models.DecimalField(blank=True, decimal_places=2, max_digits=15, null=True)),
+                ('total_return', models.DecimalField(blank=True, decimal_places=2, max_digits=15, null=True)),
+                ('roi', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('total_trades', models.PositiveIntegerField(default=0)),
+                ('winning_trades', models.PositiveIntegerField(default=0)),
+                ('losing_trades', models.PositiveIntegerField(default=0)),
+                ('win_rate', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('error', models.TextField(blank=True, default='', help_text='Failure message')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('bot', models.ForeignKey(help_text='Bot whose risk level, capital and strategies are backtested', on_delete=django.db.models.deletion.CASCADE, related_name='backtest_runs', to='trading_app.autotradingbot')),
+                ('user', models.ForeignKey(help_text='User who requested the backtest', on_delete=django.db.models.deletion.CASCADE, related_name='backtest_runs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Backtest Run',
+                'verbose_name_plural': 'Backtest Runs',
+                'db_table': 'backtest_run',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='BacktestTrade',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('seq', models.PositiveIntegerField(help_text='Position of the trade within the run')),
+                ('date', models.DateField()),
+                ('symbol', models.CharField(max_length=10)),
+                ('action', models.CharField(choices=[('BUY', 'Buy'), ('SELL', 'Sell')], max_length=4)),
+                ('quantity', models.PositiveIntegerField()),
+                ('price', models.DecimalField(decimal_places=4, max_digits=15)),
+                ('cost', models.DecimalField(blank=True, decimal_places=4, help_text='Cash spent (buys)', max_digits=15, null=True)),
+                ('proceeds', models.DecimalField(blank=True, decimal_places=4, help_text='Cash received (sells)', max_digits=15, null=True)),
+                ('entry_price', models.DecimalField(blank=True, decimal_places=4, max_digits=15, null=True)),
+                ('profit_loss', models.DecimalField(blank=True, decimal_places=4, max_digits=15, null=True)),
+                ('reason', models.CharField(blank=True, max_length=255)),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trades', to='trading_app.backtestrun')),
+            ],
+            options={
+                'db_table': 'backtest_trade',
+                'ordering': ['run', 'seq'],
+            },
+        ),
+        migrations.CreateModel(
+            name='BacktestEquityPoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('cash', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('positions_value', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('total_value', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='equity', to='trading_app.backtestrun')),
+            ],
+            options={
+                'db_table': 'backtest_equity_point',
+                'ordering': ['run', 'date'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='backtesttrade',
+            constraint=models.UniqueConstraint(fields=('run', 'seq'), name='unique_backtest_trade_seq'),
+        ),
+        migrations.AddIndex(
+            model_name='backtestrun',
+            index=models.Index(fields=['status', 'created_at'], name='backtest_ru_status_678a0d_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='backtestequitypoint',
+            constraint=models.UniqueConstraint(fields=('run', 'date'), name='unique_backtest_equity_date'),
+        ),
+    ]
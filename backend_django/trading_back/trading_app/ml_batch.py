@@ -0,0 +1,190 @@
+"""
+ML Batch Requests
+Shared plumbing of the /api/ml/<model>/batch/ endpoints: reading an array
+of inputs (a list of items or a columnar object) column by column, a
+per-item error channel, and rendering the results as streamed NDJSON or a
+single columnar JSON object.
+"""
+
+import json
+
+import numpy as np
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from rest_framework import status
+from rest_framework.response import Response
+
+
+OUTPUTS = ('ndjson', 'columns')
+
+
+class BatchInput:
+    """
+    Inputs of a batch request: {"items": [{...}, ...]}, a bare list of
+    items, or {"columns": {"field": [...], ...}} with equal-length lists.
+    Conversion failures are kept per item in errors ({index: message},
+    first failure of each item wins) instead of failing the whole batch.
+    """
+
+    def __init__(self, data):
+        self.items = self.columns = None
+        if isinstance(data, dict) and isinstance(data.get('columns'), dict):
+            self.columns = data['columns']
+            columns = list(self.columns.values())
+            if not all(isinstance(values, list) for values in columns) or len({len(values) for values in columns}) > 1:
+                raise ValueError('columns must map every field to a list of the same length')
+            self.count = len(columns[0]) if columns else 0
+        else:
+            items = data.get('items') if isinstance(data, dict) else data
+            if not isinstance(items, list):
+                raise ValueError('Expected {"items": [...]}, {"columns": {...}} or a list of items')
+            self.items = items
+            self.count = len(items)
+        if self.count > settings.ML_BATCH_MAX_ITEMS:
+            raise ValueError(f"At most {settings.ML_BATCH_MAX_ITEMS} items per batch")
+
+        self.errors = {}
+        if self.items is not None:
+            for index, item in enumerate(self.items):
+                if not isinstance(item, dict):
+                    self.errors[index] = 'Item must be an object'
+
+    def fail(self, index, message):
+        self.errors.setdefault(int(index), message)
+
+    def item(self, index):
+        """One item as a dict"""
+        if self.items is not None:
+            return self.items[index]
+        return {field: values[index] for field, values in self.columns.items()}
+
+    def column(self, field, cast=None):
+        """
+        Values of field for every item. With cast (float or int) returns a
+        float64 array, converted like cast(value) in the single-item views;
+        items that fail to convert get an error and a NaN.
+        """
+        if self.columns is not None:
+            values = self.columns.get(field, [None] * self.count)
+        else:
+            values = [item.get(field) if isinstance(item, dict) else None for item in self.items]
+        if cast is None:
+            return values
+
+        array = np.asarray(values) if values else np.empty(0)
+        if array.ndim == 1 and array.dtype.kind in ('iu' if cast is int else 'iuf'):
+            return array.astype(np.float64)
+        converted = np.full(self.count, np.nan)
+        for index, value in enumerate(values):
+            try:
+                converted[index] = cast(value)
+            except (TypeError, ValueError, OverflowError) as e:
+                self.fail(index, str(e))
+        return converted
+
+    def valid(self, start=0, stop=None):
+        """Indices in [start, stop) without an error"""
+        stop = self.count if stop is None else stop
+        return np.array([index for index in range(start, stop) if index not in self.errors], dtype=np.intp)
+
+
+def per_item(inputs, analyze):
+    """
+    compute function for batch_response that runs analyze(item) item by
+    item. Items that raise TypeError/ValueError or return an 'error' go to
+    the error channel.
+    """
+    def compute(index):
+        rows = []
+        for position in index:
+            try:
+                result = analyze(inputs.item(position))
+            except (TypeError, ValueError, ZeroDivisionError) as e:
+                result = {'error': str(e)}
+            if 'error' in result:
+                inputs.fail(position, result['error'])
+                result = None
+            rows.append(result)
+        return rows
+    return compute
+
+
+def _compute_rows(inputs, compute, row, index):
+    """
+    Rows of compute(index) in the order of index: compute returns either
+    {field: values aligned with index} or a list with a dict (or None after
+    inputs.fail) per index. Returns {index: row}.
+    """
+    if not len(index):
+        return {}
+    result = compute(index)
+    if isinstance(result, dict):
+        rows = (row(result, position) for position in range(len(index)))
+    else:
+        rows = result
+    return {int(i): values for i, values in zip(index, rows) if values is not None}
+
+
+def _default_row(columns, position):
+    return {field: values[position] for field, values in columns.items()}
+
+
+def _ndjson(inputs, compute, row):
+    chunk = settings.ML_BATCH_CHUNK_SIZE
+    for start in range(0, inputs.count, chunk):
+        stop = min(start + chunk, inputs.count)
+        try:
+            rows = _compute_rows(inputs, compute, row, inputs.valid(start, stop))
+        except Exception as e:
+            # The response has already started, so a failing chunk is reported per item
+            for index in inputs.valid(start, stop):
+                inputs.fail(index, f"{type(e).__name__}: {e}")
+            rows = {}
+        lines = []
+        for index in range(start, stop):
+            if index in rows:
+                lines.append(json.dumps({'item': index, 'result': rows[index]}))
+            else:
+                lines.append(json.dumps({'item': index, 'error': inputs.errors.get(index, 'No result')}))
+        yield '\n'.join(lines) + '\n'
+
+
+def _columns(inputs, compute, row):
+    rows = _compute_rows(inputs, compute, row, inputs.valid())
+    fields = {}
+    for values in rows.values():
+        for field, value in values.items():
+            # Nested objects (e.g. pivot_points) become one column per key
+            for name in (value if isinstance(value, dict) else (field,)):
+                fields.setdefault(name, None)
+    columns = {field: [None] * inputs.count for field in fields}
+    for index, values in rows.items():
+        for field, value in values.items():
+            if isinstance(value, dict):
+                for name, nested in value.items():
+                    columns[name][index] = nested
+            else:
+                columns[field][index] = value
+    return {
+        'count': inputs.count,
+        'columns': columns,
+        'errors': [{'item': index, 'error': inputs.errors[index]} for index in sorted(inputs.errors)],
+    }
+
+
+def batch_response(request, inputs, compute, row=None):
+    """
+    Respond to a batch request. ?output=ndjson (default) streams one JSON
+    line per item in input order, {"item": i, "result": {...}} or
+    {"item": i, "error": "..."}, computing ML_BATCH_CHUNK_SIZE items at a time.
+    ?output=columns returns {"count", "columns": {field: [value or null per item]},
+    "errors": [{"item", "error"}]}.
+    """
+    output = request.query_params.get('output', 'ndjson')
+    if output not in OUTPUTS:
+        return Response({'error': f"output must be one of {', '.join(OUTPUTS)}"},
+                        status=status.HTTP_400_BAD_REQUEST)
+    row = row or _default_row
+    if output == 'columns':
+        return Response(_columns(inputs, compute, row), status=status.HTTP_200_OK)
+    return StreamingHttpResponse(_ndjson(inputs, compute, row), content_type='application/x-ndjson')
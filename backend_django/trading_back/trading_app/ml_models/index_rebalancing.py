@@ -2,19 +2,32 @@
 Index Reconstitution Trading Strategy
 """
 
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+
+
+def as_date(value):
+    """A date from a date, datetime or YYYY-MM-DD string"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
 
 class IndexRebalancingStrategy:
     def __init__(self):
         self.name = "Index Reconstitution Strategy"
     
     def analyze_event(self, stock_symbol, event_type, announcement_date, 
-                     effective_date, current_price, index_name='SP500'):
-        """Analyze index reconstitution event"""
+                     effective_date, current_price, index_name='SP500', as_of=None):
+        """
+        Analyze index reconstitution event as seen on as_of (default today).
+        Dates may be date objects or YYYY-MM-DD strings.
+        """
         
-        today = datetime.now().date()
-        effective_dt = datetime.strptime(effective_date, '%Y-%m-%d').date()
-        announcement_dt = datetime.strptime(announcement_date, '%Y-%m-%d').date()
+        today = as_date(as_of) if as_of else datetime.now().date()
+        effective_dt = as_date(effective_date)
+        announcement_dt = as_date(announcement_date)
         
         days_to_effective = (effective_dt - today).days
         days_since_announcement = (today - announcement_dt).days
@@ -0,0 +1,82 @@
+"""
+Monte Carlo Simulation of Bot Equity Paths
+Bootstraps historical daily returns of a bot's watchlist into tens of
+thousands of equity paths in one vectorized pass and summarizes them as
+percentile bands, stop loss / take profit hit probabilities and the
+max-drawdown distribution.
+"""
+
+import numpy as np
+
+PERCENTILES = [5, 25, 50, 75, 95]
+# Most days at which percentile bands are reported (longer horizons are sampled evenly)
+MAX_BAND_POINTS = 53
+
+
+class MonteCarloSimulator:
+    def __init__(self, daily_returns, seed=None):
+        """
+        daily_returns: 1-D array of historical daily returns of the
+        equal-weighted watchlist (0.01 = +1%); days are resampled whole so the
+        cross-sectional correlation of each day is kept.
+        """
+        self.name = "Monte Carlo Simulator"
+        self.daily_returns = np.asarray(daily_returns, dtype='float64')
+        self.rng = np.random.default_rng(seed)
+
+    def simulate_paths(self, horizon_days, paths):
+        """Equity multiples of shape (paths, horizon_days + 1), starting at 1.0"""
+        picks = self.rng.integers(0, len(self.daily_returns), size=(paths, horizon_days), dtype=np.int32)
+        equity = np.empty((paths, horizon_days + 1))
+        equity[:, 0] = 1.0
+        np.cumprod(1.0 + self.daily_returns[picks], axis=1, out=equity[:, 1:])
+        return equity
+
+    def simulate(self, investment, horizon_days, stop_loss, take_profit, paths=20000):
+        """Simulate paths for an investment and summarize them"""
+        if len(self.daily_returns) == 0 or horizon_days < 1:
+            return None
+
+        investment = float(investment)
+        equity = self.simulate_paths(horizon_days, paths)
+        final = equity[:, -1]
+
+        lowest = equity.min(axis=1)
+        highest = equity.max(axis=1)
+
+        # Peak-to-trough drop along each path
+        peaks = np.maximum.accumulate(equity, axis=1)
+        np.divide(equity, peaks, out=peaks)
+        max_drawdown = (1 - peaks.min(axis=1)) * 100
+
+        band_days = np.unique(np.linspace(0, horizon_days, min(horizon_days + 1, MAX_BAND_POINTS)).round().astype(int))
+        bands = np.percentile(equity[:, band_days], PERCENTILES, axis=0) * investment
+        final_values = np.percentile(final, PERCENTILES) * investment
+        drawdowns = np.percentile(max_drawdown, PERCENTILES)
+        counts, edges = np.histogram(max_drawdown, bins=10)
+
+        return {
+            'paths': paths,
+            'horizon_days': horizon_days,
+            'history_days': int(len(self.daily_returns)),
+            'band_days': band_days.tolist(),
+            'percentile_bands': {
+                f'p{p}': np.round(band, 2).tolist() for p, band in zip(PERCENTILES, bands)
+            },
+            'final_value': {
+                f'p{p}': round(float(value), 2) for p, value in zip(PERCENTILES, final_values)
+            },
+            'expected_final_value': round(float(final.mean() * investment), 2),
+            'expected_return_percentage': round(float((final.mean() - 1) * 100), 2),
+            'probability_of_loss': round(float((final < 1).mean() * 100), 2),
+            'probability_stop_loss': round(float((lowest <= 1 - float(stop_loss)).mean() * 100), 2),
+            'probability_take_profit': round(float((highest >= 1 + float(take_profit)).mean() * 100), 2),
+            'max_drawdown': {
+                **{f'p{p}': round(float(value), 2) for p, value in zip(PERCENTILES, drawdowns)},
+                'mean': round(float(max_drawdown.mean()), 2),
+                'histogram': {
+                    'counts': counts.tolist(),
+                    'edges': np.round(edges, 2).tolist(),
+                },
+            },
+        }
@@ -2,10 +2,45 @@
 Next-Day Price Movement Predictor
 """
 
+import numpy as np
+import pandas as pd
+
+from .vectorized import py_round, prediction_scores
+
+
 class NextDayPredictor:
+    RECOMMENDATION = "Expect price to move {prediction} with {confidence:.0f}% confidence"
+    
     def __init__(self):
         self.name = "Next Day Predictor"
     
+    def predict_batch(self, open_price, high=None, low=None, close=None, volume=None):
+        """
+        Predict next day price movement for many bars at once with the same
+        rules as predict. Takes open/high/low/close arrays (volume is accepted
+        like in predict but not scored), or a DataFrame of bars with
+        open/high/low/close columns. Returns arrays:
+        prediction (int8 codes into PREDICTIONS), confidence,
+        price_change_today and volatility (rounded like predict), and valid
+        (False where predict would raise on a zero open or close price).
+        """
+        if isinstance(open_price, pd.DataFrame):
+            frame = open_price
+            open_price, high, low, close = (frame[column] for column in ('open', 'high', 'low', 'close'))
+        open_price, high, low, close = (
+            np.asarray(values, dtype=np.float64) for values in (open_price, high, low, close)
+        )
+        
+        codes, confidence, price_change, hl_range, valid = prediction_scores(open_price, high, low, close)
+        with np.errstate(invalid='ignore'):
+            return {
+                'prediction': codes,
+                'confidence': py_round(confidence, 1),
+                'price_change_today': py_round(price_change, 2),
+                'volatility': py_round(hl_range, 2),
+                'valid': valid,
+            }
+    
     def predict(self, stock_symbol, open_price, high, low, close, volume):
         """Predict next day price movement"""
         
@@ -47,5 +82,5 @@ class NextDayPredictor:
             'confidence': round(confidence, 1),
             'price_change_today': round(price_change, 2),
             'volatility': round(hl_range, 2),
-            'recommendation': f"Expect price to move {prediction} with {confidence:.0f}% confidence"
+            'recommendation': self.RECOMMENDATION.format(prediction=prediction, confidence=confidence)
         }
@@ -2,58 +2,71 @@
 Pivot Point Trading Strategy for Index Rebalancing Platform
 """
 
+import numpy as np
+import pandas as pd
+
+from .vectorized import PIVOT_LEVELS, PIVOT_SIGNALS, SIGNAL_LEVELS, pivot_levels, pivot_signals
+
+
+# Level each signal is explained by, and the explanation
+SIGNAL_DESCRIPTIONS = {
+    'STRONG_BUY': ('resistance_2', "Price ${price} broke above R2 (${level})"),
+    'BUY': ('resistance_1', "Price ${price} above R1 (${level})"),
+    'HOLD_BULLISH': ('pivot_point', "Price ${price} above pivot (${level})"),
+    'HOLD_BEARISH': ('pivot_point', "Price ${price} below pivot (${level})"),
+    'SELL': ('support_1', "Price ${price} below S1 (${level})"),
+    'STRONG_SELL': ('support_2', "Price ${price} broke below S2 (${level})"),
+}
+
+
 class PivotStrategy:
     def __init__(self):
         self.name = "Pivot Point Strategy"
     
     def calculate_pivot_points(self, high, low, close):
         """Calculate pivot points and support/resistance levels"""
-        pivot_point = (high + low + close) / 3
-        
-        support_1 = (2 * pivot_point) - high
-        support_2 = pivot_point - (high - low)
-        support_3 = low - 2 * (high - pivot_point)
-        
-        resistance_1 = (2 * pivot_point) - low
-        resistance_2 = pivot_point + (high - low)
-        resistance_3 = high + 2 * (pivot_point - low)
-        
-        return {
-            'pivot_point': round(pivot_point, 2),
-            'support_1': round(support_1, 2),
-            'support_2': round(support_2, 2),
-            'support_3': round(support_3, 2),
-            'resistance_1': round(resistance_1, 2),
-            'resistance_2': round(resistance_2, 2),
-            'resistance_3': round(resistance_3, 2)
-        }
+        levels = pivot_levels(*(np.array([value], dtype=np.float64) for value in (high, low, close)))
+        return {level: float(values[0]) for level, values in levels.items()}
+    
+    def describe_signal(self, signal, pivot_points, current_price):
+        level, description = SIGNAL_DESCRIPTIONS[signal]
+        return description.format(price=current_price, level=pivot_points[level])
     
     def generate_signal(self, pivot_points, current_price):
         """Generate trading signal"""
-        pp = pivot_points
+        levels = {level: np.array([pivot_points[level]], dtype=np.float64) for level in SIGNAL_LEVELS}
+        signal = str(PIVOT_SIGNALS[pivot_signals(levels, np.array([current_price], dtype=np.float64))[0]])
+        return signal, self.describe_signal(signal, pivot_points, current_price)
+    
+    def predict_batch(self, high, low=None, close=None, current_price=None):
+        """
+        Pivot levels and signals for many rows at once, without per-row
+        Python objects. Takes high/low/close (and optionally current_price,
+        default close) arrays, or a DataFrame with those columns.
+        Returns {level: float64 array} for the seven levels plus 'signal',
+        an int8 array of codes into PIVOT_SIGNALS.
+        """
+        if isinstance(high, pd.DataFrame):
+            frame = high
+            high, low, close = frame['high'], frame['low'], frame['close']
+            if current_price is None and 'current_price' in frame:
+                current_price = frame['current_price']
+        high, low, close = (np.asarray(values, dtype=np.float64) for values in (high, low, close))
+        current_price = close if current_price is None else np.asarray(current_price, dtype=np.float64)
         
-        if current_price > pp['resistance_2']:
-            return 'STRONG_BUY', f"Price ${current_price} broke above R2 (${pp['resistance_2']})"
-        elif current_price > pp['resistance_1']:
-            return 'BUY', f"Price ${current_price} above R1 (${pp['resistance_1']})"
-        elif current_price >= pp['support_1']:
-            if current_price > pp['pivot_point']:
-                return 'HOLD_BULLISH', f"Price ${current_price} above pivot (${pp['pivot_point']})"
-            else:
-                return 'HOLD_BEARISH', f"Price ${current_price} below pivot (${pp['pivot_point']})"
-        elif current_price > pp['support_2']:
-            return 'SELL', f"Price ${current_price} below S1 (${pp['support_1']})"
-        else:
-            return 'STRONG_SELL', f"Price ${current_price} broke below S2 (${pp['support_2']})"
+        levels = pivot_levels(high, low, close)
+        levels['signal'] = pivot_signals(levels, current_price)
+        return levels
     
     def predict(self, high, low, close):
         """Main prediction method"""
-        pivot_points = self.calculate_pivot_points(high, low, close)
-        signal, description = self.generate_signal(pivot_points, close)
+        batch = self.predict_batch([high], [low], [close])
+        pivot_points = {level: float(batch[level][0]) for level in PIVOT_LEVELS}
+        signal = str(PIVOT_SIGNALS[batch['signal'][0]])
         
         return {
             'signal': signal,
-            'description': description,
+            'description': self.describe_signal(signal, pivot_points, close),
             'current_price': round(close, 2),
             'pivot_points': pivot_points,
             'strategy': 'Pivot Point Analysis'
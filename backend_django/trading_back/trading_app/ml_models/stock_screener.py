@@ -2,6 +2,18 @@
 Stock Screener for Index Reconstitution Candidates
 """
 
+import math
+
+import numpy as np
+import pandas as pd
+
+from .vectorized import SCREENER_RECOMMENDATIONS, screener_scores
+
+
+# Market caps are packed below the score in one int64 ranking key (2**43 dollars is about $8.8T)
+MARKET_CAP_BITS = 43
+
+
 class StockScreener:
     def __init__(self):
         self.name = "Stock Screener"
@@ -48,3 +60,106 @@ class StockScreener:
             'market_cap': market_cap,
             'daily_volume': volume
         }
+    
+    def screen_universe(self, table):
+        """
+        Screen a fundamentals table (symbol, name, market_cap, volume, sector
+        columns, one row per ticker) in one vectorized pass
+        """
+        return UniverseScreen(table, self)
+
+
+class UniverseScreen:
+    """
+    Scores, recommendations and per-sector ranks of every row of a
+    fundamentals table. Rows rank by score, then market cap, best first.
+    """
+
+    def __init__(self, table, screener=None):
+        self.screener = screener or StockScreener()
+        self.symbols = table['symbol'].astype(str).to_numpy()
+        self.names = table['name'].where(table['name'].notna(), table['symbol']).to_numpy(dtype=object)
+        self.sectors = table['sector'].astype(object).where(table['sector'].notna(), None).to_numpy()
+        self.market_cap = pd.to_numeric(table['market_cap'], errors='coerce').to_numpy(dtype=np.float64)
+        self.volume = pd.to_numeric(table['volume'], errors='coerce').to_numpy(dtype=np.float64)
+        self.scores, self.recommendations = screener_scores(self.market_cap, self.volume, self.sectors)
+
+        market_cap = np.clip(np.nan_to_num(self.market_cap), 0, 2 ** MARKET_CAP_BITS - 1).astype(np.int64)
+        self.rank_key = (self.scores.astype(np.int64) << MARKET_CAP_BITS) | market_cap
+
+        # Rows grouped by sector (missing sectors last), best first within each group
+        sector_codes, sector_names = pd.factorize(self.sectors)
+        sector_codes = np.where(sector_codes < 0, len(sector_names), sector_codes)
+        self.sector_order = np.lexsort((-self.rank_key, sector_codes))
+        grouped = sector_codes[self.sector_order]
+        starts = np.flatnonzero(np.diff(grouped, prepend=-1))
+        stops = np.append(starts[1:], len(grouped))
+        self.sector_slices = {
+            (sector_names[code] if code < len(sector_names) else None): (start, stop)
+            for code, start, stop in zip(grouped[starts], starts, stops)
+        }
+        self.sector_rank = np.empty(len(grouped), dtype=np.int32)
+        self.sector_rank[self.sector_order] = np.arange(len(grouped)) - np.repeat(starts, stops - starts) + 1
+
+    def __len__(self):
+        return len(self.symbols)
+
+    @property
+    def sector_counts(self):
+        return {sector: int(stop - start) for sector, (start, stop) in self.sector_slices.items()}
+
+    def top(self, n, sector=None, recommendation=None):
+        """
+        Indices of the n best rows, best first, optionally within one sector
+        and/or with one recommendation. Sector queries slice the precomputed
+        sector ranking; whole-universe queries partially sort the rank keys.
+        """
+        if recommendation is not None:
+            codes = np.flatnonzero(SCREENER_RECOMMENDATIONS == recommendation)
+            if not codes.size:
+                raise ValueError(f"Unknown recommendation: {recommendation}")
+        n = max(int(n), 0)
+
+        if sector is not None:
+            start, stop = self.sector_slices.get(sector, (0, 0))
+            rows = self.sector_order[start:stop]
+            if recommendation is not None:
+                rows = rows[self.recommendations[rows] == codes[0]]
+            return rows[:n]
+
+        if recommendation is None:
+            rows = np.arange(len(self.symbols))
+        else:
+            rows = np.flatnonzero(self.recommendations == codes[0])
+        if n == 0:
+            return rows[:0]
+        if n < len(rows):
+            rows = np.sort(rows[np.argpartition(-self.rank_key[rows], n - 1)[:n]])
+        return rows[np.argsort(-self.rank_key[rows], kind='stable')]
+
+    def row(self, index):
+        """screen_for_index_addition's result for one row, with its symbol, name, sector and sector rank"""
+        market_cap, volume = self.market_cap[index], self.volume[index]
+        result = self.screener.screen_for_index_addition(market_cap, volume, self.sectors[index])
+        result['market_cap'] = None if math.isnan(market_cap) else float(market_cap)
+        result['daily_volume'] = None if math.isnan(volume) else int(volume)
+        return {
+            'symbol': self.symbols[index],
+            'name': self.names[index],
+            'sector': self.sectors[index],
+            'sector_rank': int(self.sector_rank[index]),
+            **result,
+        }
+
+    def to_frame(self):
+        """Every row as a DataFrame, in table order"""
+        return pd.DataFrame({
+            'symbol': self.symbols,
+            'name': self.names,
+            'sector': self.sectors,
+            'market_cap': self.market_cap,
+            'volume': self.volume,
+            'score': self.scores,
+            'recommendation': SCREENER_RECOMMENDATIONS[self.recommendations],
+            'sector_rank': self.sector_rank,
+        })
@@ -0,0 +1,168 @@
+"""
+Vectorized Strategy Signals
+Array versions of PivotStrategy, NextDayPredictor and StockScreener that
+score whole columns or (days x symbols) matrices at once and return the
+same signals as the scalar methods.
+"""
+
+import numpy as np
+
+
+# Pivot signal codes, in the order of PivotStrategy.generate_signal's thresholds
+PIVOT_SIGNALS = np.array(['STRONG_SELL', 'SELL', 'HOLD_BEARISH', 'HOLD_BULLISH', 'BUY', 'STRONG_BUY'])
+PIVOT_BUY_SCORE = np.array([0, 0, 0, 0, 1, 2], dtype=np.int8)
+PIVOT_SELL_SCORE = np.array([2, 1, 0, 0, 0, 0], dtype=np.int8)
+PIVOT_HOLD_SCORE = np.array([0, 0, 1, 1, 0, 0], dtype=np.int8)
+PIVOT_CODES = np.arange(len(PIVOT_SIGNALS), dtype=np.int8)
+
+# Support / resistance levels of PivotStrategy.calculate_pivot_points, and the ones signals compare against
+PIVOT_LEVELS = ('pivot_point', 'support_1', 'support_2', 'support_3', 'resistance_1', 'resistance_2', 'resistance_3')
+SIGNAL_LEVELS = ('pivot_point', 'support_1', 'support_2', 'resistance_1', 'resistance_2')
+# Below this many level values, pivot_levels rounds all levels in one call (larger batches stay per level)
+SMALL_BATCH = 4096
+
+# Next-day prediction codes
+PREDICTIONS = np.array(['DOWN', 'NEUTRAL', 'UP'])
+PREDICTION_DOWN, PREDICTION_NEUTRAL, PREDICTION_UP = 0, 1, 2
+PREDICTION_CODES = np.arange(len(PREDICTIONS), dtype=np.int8)
+
+# Stock screener recommendation codes, weakest first, and the sectors earning the growth bonus
+SCREENER_RECOMMENDATIONS = np.array(['UNLIKELY', 'POTENTIAL_CANDIDATE', 'STRONG_CANDIDATE'])
+GROWTH_SECTORS = ('Technology', 'Healthcare', 'Finance')
+
+
+# Dekker's splitting constant (2**27 + 1): splits a double into two halves whose products are exact
+SPLITTER = 134217729.0
+
+
+def _split(values):
+    scaled = values * SPLITTER
+    high = scaled - (scaled - values)
+    return high, values - high
+
+
+def exact_round(values, scale):
+    """
+    Correctly rounded values * scale to the nearest integer (ties to even on
+    the exact binary value, like Python's round), divided back by scale.
+    The product is split into p + err exactly, so the tie decision never
+    depends on the rounding of values * scale.
+    """
+    with np.errstate(invalid='ignore', over='ignore'):
+        product = values * scale
+        value_high, value_low = _split(values)
+        scale_high, scale_low = _split(np.float64(scale))
+        err = ((value_high * scale_high - product) + value_high * scale_low + value_low * scale_high) + value_low * scale_low
+        floor = np.floor(product)
+        excess = (product - floor - 0.5) + err
+        up = (excess > 0) | ((excess == 0) & (floor % 2 != 0))
+        return np.copysign((floor + up) / scale, values)
+
+
+def py_round(values, ndigits):
+    """
+    Element-wise equivalent of Python's round(x, ndigits) for float arrays.
+    np.round disagrees with the correctly rounded result when x * 10**ndigits
+    lands next to a .5 boundary, so those few elements are rounded exactly.
+    """
+    scale = 10.0 ** ndigits
+    distance = np.multiply(values, scale)
+    rounded = np.rint(distance)
+    np.subtract(distance, rounded, out=distance)
+    near_tie = np.flatnonzero(np.abs(distance, out=distance) > 0.5 - 1e-6)
+    rounded /= scale
+    if near_tie.size:
+        rounded.reshape(-1)[near_tie] = exact_round(values.reshape(-1)[near_tie], scale)
+    return rounded
+
+
+def pivot_levels(high, low, close, levels=PIVOT_LEVELS):
+    """
+    PivotStrategy.calculate_pivot_points as {level: float array}, rounded to
+    cents exactly like the scalar version. levels selects which to compute.
+    """
+    pivot_point = (high + low + close) / 3
+    spread = high - low
+    formulas = {
+        'pivot_point': lambda: pivot_point,
+        'support_1': lambda: (2 * pivot_point) - high,
+        'support_2': lambda: pivot_point - spread,
+        'support_3': lambda: low - 2 * (high - pivot_point),
+        'resistance_1': lambda: (2 * pivot_point) - low,
+        'resistance_2': lambda: pivot_point + spread,
+        'resistance_3': lambda: high + 2 * (pivot_point - low),
+    }
+    if pivot_point.size * len(levels) <= SMALL_BATCH:
+        # A handful of rows: one rounding call for all levels costs less than one per level
+        return dict(zip(levels, py_round(np.array([formulas[level]() for level in levels]), 2)))
+    return {level: py_round(formulas[level](), 2) for level in levels}
+
+
+def pivot_signals(levels, current_price):
+    """PivotStrategy.generate_signal's signal as codes into PIVOT_SIGNALS"""
+    # Nested like generate_signal's if/elif chain, so unordered levels (high < low) agree too
+    return np.where(
+        current_price > levels['resistance_2'], PIVOT_CODES[5], np.where(
+            current_price > levels['resistance_1'], PIVOT_CODES[4], np.where(
+                current_price >= levels['support_1'],
+                np.where(current_price > levels['pivot_point'], PIVOT_CODES[3], PIVOT_CODES[2]),
+                np.where(current_price > levels['support_2'], PIVOT_CODES[1], PIVOT_CODES[0]),
+            ),
+        ),
+    )
+
+
+def pivot_signal_codes(high, low, close):
+    """PivotStrategy.predict(high, low, close)['signal'] as codes into PIVOT_SIGNALS"""
+    return pivot_signals(pivot_levels(high, low, close, SIGNAL_LEVELS), close)
+
+
+def prediction_scores(open_price, high, low, close):
+    """
+    NextDayPredictor.predict's rules over arrays. Returns (codes into
+    PREDICTIONS, confidence, price change %, high-low range %, valid), where
+    valid masks the cells the scalar predictor would not raise on (zero open
+    or close price). Confidence and the percentages are not rounded.
+    """
+    valid = (open_price != 0) & (close != 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        price_change = ((close - open_price) / open_price) * 100
+        hl_range = ((high - low) / close) * 100
+
+    # Bullish / bearish indicators, damped on volatile days
+    score = np.select(
+        [price_change > 2, price_change > 0, price_change < -2, price_change < 0],
+        [3, 1, -3, -1],
+        default=0,
+    ).astype('float64')
+    score = np.where(hl_range > 5, score * 0.8, score)
+
+    up = score >= 2
+    down = score <= -2
+    codes = np.where(up, PREDICTION_CODES[PREDICTION_UP], np.where(
+        down, PREDICTION_CODES[PREDICTION_DOWN], PREDICTION_CODES[PREDICTION_NEUTRAL]
+    ))
+    confidence = np.where(up | down, np.minimum(70 + (np.abs(score) * 5), 90), 50.0)
+    return codes, confidence, price_change, hl_range, valid
+
+
+def prediction_codes(open_price, high, low, close):
+    """
+    NextDayPredictor.predict(...)['prediction'] as codes into PREDICTIONS, plus
+    the valid mask of prediction_scores. UP/DOWN always come with >= 70% confidence.
+    """
+    codes, _, _, _, valid = prediction_scores(open_price, high, low, close)
+    return codes, valid
+
+
+def screener_scores(market_cap, volume, sector):
+    """
+    StockScreener.screen_for_index_addition's score and recommendation (codes
+    into SCREENER_RECOMMENDATIONS) over columns. A missing (NaN) market cap
+    or volume earns no points, like the scalar comparisons against NaN.
+    """
+    score = np.select([market_cap >= 14500000000, market_cap >= 8000000000], [40, 25], default=0)
+    score += np.select([volume >= 1000000, volume >= 500000], [30, 15], default=0)
+    score += np.where(np.isin(sector, GROWTH_SECTORS), 10, 0)
+    recommendation = np.select([score >= 70, score >= 50], [2, 1], default=0).astype(np.int8)
+    return score.astype(np.int16), recommendation
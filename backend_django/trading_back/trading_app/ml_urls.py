@@ -7,7 +7,13 @@ from . import ml_views
 
 urlpatterns = [
     path('pivot/', ml_views.pivot_analysis, name='ml-pivot'),
+    path('pivot/batch/', ml_views.pivot_analysis_batch, name='ml-pivot-batch'),
     path('predict/', ml_views.next_day_prediction, name='ml-predict'),
+    path('predict/batch/', ml_views.next_day_prediction_batch, name='ml-predict-batch'),
     path('screener/', ml_views.stock_screener_analysis, name='ml-screener'),
+    path('screener/batch/', ml_views.stock_screener_batch, name='ml-screener-batch'),
+    path('screener/universe/', ml_views.universe_screener, name='ml-screener-universe'),
     path('index-event/', ml_views.index_rebalancing_analysis, name='ml-index-event'),
+    path('index-event/batch/', ml_views.index_rebalancing_batch, name='ml-index-event-batch'),
+    path('index-events/', ml_views.index_events, name='ml-index-events'),
 ]
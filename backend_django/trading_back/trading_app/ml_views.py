@@ -6,11 +6,19 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework import status
+from django.conf import settings
+from datetime import date, timedelta
 
+import numpy as np
+
+from .ml_batch import BatchInput, batch_response, per_item
 from .ml_models.pivot import PivotStrategy
 from .ml_models.nextday_prediction import NextDayPredictor
+from .ml_models.vectorized import PIVOT_LEVELS, PIVOT_SIGNALS, PREDICTIONS, py_round
 from .ml_models.stock_screener import StockScreener
-from .ml_models.index_rebalancing import IndexRebalancingStrategy
+from .ml_models.index_rebalancing import IndexRebalancingStrategy, as_date
+from .market_data.index_events import index_event_store
+from .universe_screen import get_universe_screen, trading_day
 
 # Initialize ML models
 pivot_strategy = PivotStrategy()
@@ -39,6 +47,44 @@ def pivot_analysis(request):
         return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
 
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def pivot_analysis_batch(request):
+    """
+    Pivot Point Analysis for many inputs, scored with PivotStrategy.predict_batch
+    POST /api/ml/pivot/batch/?output=ndjson|columns
+    Body: {"items": [{"high": 150.0, "low": 145.0, "close": 148.0}, ...]}
+       or {"columns": {"high": [...], "low": [...], "close": [...]}}
+    """
+    try:
+        inputs = BatchInput(request.data)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    high, low, close = (inputs.column(field, float) for field in ('high', 'low', 'close'))
+    
+    def compute(index):
+        batch = pivot_strategy.predict_batch(high[index], low[index], close[index])
+        return {
+            'signal': PIVOT_SIGNALS[batch['signal']].tolist(),
+            'close': close[index].tolist(),
+            'current_price': py_round(close[index], 2).tolist(),
+            **{level: batch[level].tolist() for level in PIVOT_LEVELS},
+        }
+    
+    def row(columns, position):
+        pivot_points = {level: columns[level][position] for level in PIVOT_LEVELS}
+        signal = columns['signal'][position]
+        return {
+            'signal': signal,
+            'description': pivot_strategy.describe_signal(signal, pivot_points, columns['close'][position]),
+            'current_price': columns['current_price'][position],
+            'pivot_points': pivot_points,
+            'strategy': 'Pivot Point Analysis'
+        }
+    
+    return batch_response(request, inputs, compute, row)
+
+
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def next_day_prediction(request):
@@ -69,6 +115,46 @@ def next_day_prediction(request):
         return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
 
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def next_day_prediction_batch(request):
+    """
+    Next-Day Price Prediction for many inputs, scored with NextDayPredictor.predict_batch
+    POST /api/ml/predict/batch/?output=ndjson|columns
+    Body: {"items": [{"stock_symbol": "AAPL", "open_price": 145.0, "high": 150.0,
+                      "low": 144.0, "close": 148.0, "volume": 1000000}, ...]}
+       or {"columns": {"stock_symbol": [...], "open_price": [...], ...}}
+    """
+    try:
+        inputs = BatchInput(request.data)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    stock_symbols = inputs.column('stock_symbol')
+    open_price, high, low, close = (inputs.column(field, float) for field in ('open_price', 'high', 'low', 'close'))
+    inputs.column('volume', int)
+    # predict divides by the open and close prices
+    for index in np.flatnonzero((open_price == 0) | (close == 0)):
+        inputs.fail(index, 'float division by zero')
+    
+    def compute(index):
+        batch = predictor.predict_batch(open_price[index], high[index], low[index], close[index])
+        predictions = PREDICTIONS[batch['prediction']].tolist()
+        confidence = batch['confidence'].tolist()
+        return {
+            'stock_symbol': [stock_symbols[position] for position in index],
+            'prediction': predictions,
+            'confidence': confidence,
+            'price_change_today': batch['price_change_today'].tolist(),
+            'volatility': batch['volatility'].tolist(),
+            'recommendation': [
+                predictor.RECOMMENDATION.format(prediction=prediction, confidence=value)
+                for prediction, value in zip(predictions, confidence)
+            ],
+        }
+    
+    return batch_response(request, inputs, compute)
+
+
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def stock_screener_analysis(request):
@@ -82,12 +168,58 @@ def stock_screener_analysis(request):
     }
     """
     try:
-        market_cap = float(request.data.get('market_cap'))
-        volume = int(request.data.get('volume'))
-        sector = request.data.get('sector', 'Technology')
+        return Response(screen_item(request.data), status=status.HTTP_200_OK)
+    
+    except (TypeError, ValueError) as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+
+def screen_item(data):
+    """Stock Screener result for one request body or batch item"""
+    market_cap = float(data.get('market_cap'))
+    volume = int(data.get('volume'))
+    sector = data.get('sector', 'Technology')
+    
+    return screener.screen_for_index_addition(market_cap, volume, sector)
+
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def stock_screener_batch(request):
+    """
+    Stock Screener for many inputs
+    POST /api/ml/screener/batch/?output=ndjson|columns
+    Body: {"items": [{"market_cap": 15000000000, "volume": 1200000, "sector": "Technology"}, ...]}
+       or {"columns": {"market_cap": [...], "volume": [...], "sector": [...]}}
+    """
+    try:
+        inputs = BatchInput(request.data)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    return batch_response(request, inputs, per_item(inputs, screen_item))
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def universe_screener(request):
+    """
+    Whole-market Stock Screener, cached per trading day
+    GET /api/ml/screener/universe/?top=50&sector=Technology&recommendation=STRONG_CANDIDATE
+    Returns the top rows by score (then market cap), each with its rank in its sector
+    """
+    try:
+        top = min(int(request.query_params.get('top', settings.SCREENER_TOP_N)), settings.SCREENER_MAX_TOP_N)
+        sector = request.query_params.get('sector') or None
+        recommendation = request.query_params.get('recommendation') or None
         
-        result = screener.screen_for_index_addition(market_cap, volume, sector)
-        return Response(result, status=status.HTTP_200_OK)
+        screen = get_universe_screen()
+        rows = screen.top(top, sector=sector, recommendation=recommendation)
+        return Response({
+            'trading_day': trading_day().isoformat(),
+            'universe_size': len(screen),
+            'sectors': screen.sector_counts,
+            'results': [screen.row(index) for index in rows],
+        }, status=status.HTTP_200_OK)
     
     except (TypeError, ValueError) as e:
         return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
@@ -105,22 +237,99 @@ def index_rebalancing_analysis(request):
         "announcement_date": "2025-10-15",
         "effective_date": "2025-10-30",
         "current_price": 150.0,
-        "index_name": "SP500"
+        "index_name": "SP500",
+        "as_of": "2025-10-20"
     }
+    Without announcement/effective dates, every event of the symbol active on
+    as_of (default today) in the index event store is analyzed
     """
     try:
-        stock_symbol = request.data.get('stock_symbol')
-        event_type = request.data.get('event_type')
-        announcement_date = request.data.get('announcement_date')
-        effective_date = request.data.get('effective_date')
-        current_price = float(request.data.get('current_price'))
-        index_name = request.data.get('index_name', 'SP500')
+        return Response(analyze_index_item(request.data), status=status.HTTP_200_OK)
+    
+    except (TypeError, ValueError) as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+
+def analyze_index_item(data):
+    """Index event analysis for one request body or batch item"""
+    stock_symbol = data.get('stock_symbol')
+    event_type = data.get('event_type')
+    announcement_date = data.get('announcement_date')
+    effective_date = data.get('effective_date')
+    current_price = float(data.get('current_price'))
+    index_name = data.get('index_name', 'SP500')
+    as_of = as_date(data.get('as_of') or date.today())
+    
+    if not announcement_date and not effective_date:
+        if not stock_symbol:
+            raise ValueError('stock_symbol is required')
+        events = index_event_store.current().active(stock_symbol, as_of)
+        return {
+            'stock_symbol': stock_symbol,
+            'as_of': as_of.isoformat(),
+            'events': [
+                index_strategy.analyze_event(
+                    stock_symbol, event.event_type, event.announcement_date,
+                    event.effective_date, current_price, event.index_name, as_of=as_of
+                )
+                for event in events
+            ],
+        }
+    
+    return index_strategy.analyze_event(
+        stock_symbol, event_type, announcement_date,
+        effective_date, current_price, index_name, as_of=as_of
+    )
+
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def index_rebalancing_batch(request):
+    """
+    Index Reconstitution Event Analysis for many inputs
+    POST /api/ml/index-event/batch/?output=ndjson|columns
+    Body: {"items": [{"stock_symbol": "AAPL", "event_type": "ADD", ...}, ...]}
+       or {"columns": {"stock_symbol": [...], ...}}
+    Items take the same fields as /api/ml/index-event/
+    """
+    try:
+        inputs = BatchInput(request.data)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    return batch_response(request, inputs, per_item(inputs, analyze_index_item))
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def index_events(request):
+    """
+    Recorded index reconstitution events
+    GET /api/ml/index-events/?start=2025-01-01&end=2025-12-31&symbol=AAPL,MSFT&index=SP500
+    Returns the events active on any day of the window (default: the last 30 days)
+    """
+    try:
+        end = as_date(request.query_params.get('end') or date.today())
+        start = as_date(request.query_params.get('start') or end - timedelta(days=30))
+        symbols = request.query_params.get('symbol')
+        symbols = [symbol.strip() for symbol in symbols.split(',') if symbol.strip()] if symbols else None
+        index_name = (request.query_params.get('index') or '').upper()
         
-        result = index_strategy.analyze_event(
-            stock_symbol, event_type, announcement_date,
-            effective_date, current_price, index_name
-        )
-        return Response(result, status=status.HTTP_200_OK)
+        events = index_event_store.current().window(start, end, symbols)
+        return Response({
+            'start': start.isoformat(),
+            'end': end.isoformat(),
+            'events': [
+                {
+                    'index_name': event.index_name,
+                    'symbol': event.symbol,
+                    'event_type': event.event_type,
+                    'announcement_date': event.announcement_date.isoformat(),
+                    'effective_date': event.effective_date.isoformat(),
+                    'active_until': event.end_date.isoformat(),
+                }
+                for event in events if not index_name or event.index_name == index_name
+            ],
+        }, status=status.HTTP_200_OK)
     
     except (TypeError, ValueError) as e:
         return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
@@ -475,4 +475,155 @@ class AutoTradingBot(models.Model):
         return 0
     
     def __str__(self):
-        return f"{self.name} - {self.user.name} ({self.status})"
\ No newline at end of file
+        return f"{self.name} - {self.user.name} ({self.status})"
+
+class MarketQuote(models.Model):
+    """
+    Latest price per symbol, published by the ingest_prices daemon
+    and only read by request handlers
+    """
+    symbol = models.CharField(
+        max_length=10,
+        unique=True,
+        help_text="Stock ticker symbol"
+    )
+    price = models.DecimalField(
+        max_digits=15,
+        decimal_places=4,
+        help_text="Latest traded/closing price"
+    )
+    updated_at = models.DateTimeField(
+        help_text="When the price was fetched"
+    )
+    
+    class Meta:
+        db_table = 'market_quote'
+        verbose_name = 'Market Quote'
+        verbose_name_plural = 'Market Quotes'
+        ordering = ['symbol']
+    
+    def __str__(self):
+        return f"{self.symbol} ${self.price} at {self.updated_at}"
+
+
+class BacktestRun(models.Model):
+    """
+    A queued or finished backtest of a trading bot, executed by the
+    run_backtests worker
+    """
+    STATUS_CHOICES = [
+        ('QUEUED', 'Queued'),
+        ('RUNNING', 'Running'),
+        ('COMPLETED', 'Completed'),
+        ('FAILED', 'Failed'),
+    ]
+    
+    ENGINE_CHOICES = [
+        ('loop', 'Day-by-day loop'),
+        ('vectorized', 'Vectorized'),
+        ('fixed', 'Vectorized fixed-point'),
+    ]
+    
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='backtest_runs',
+        help_text="User who requested the backtest"
+    )
+    bot = models.ForeignKey(
+        AutoTradingBot,
+        on_delete=models.CASCADE,
+        related_name='backtest_runs',
+        help_text="Bot whose risk level, capital and strategies are backtested"
+    )
+    engine = models.CharField(
+        max_length=10,
+        choices=ENGINE_CHOICES,
+        default='vectorized',
+        help_text="Backtest engine"
+    )
+    start_date = models.DateField(help_text="First backtest date")
+    end_date = models.DateField(help_text="Last backtest date")
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default='QUEUED',
+        help_text="Run status"
+    )
+    final_value = models.DecimalField(max_digits=15, decimal_places=2, null=True, blank=True)
+    total_return = models.DecimalField(max_digits=15, decimal_places=2, null=True, blank=True)
+    roi = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    total_trades = models.PositiveIntegerField(default=0)
+    winning_trades = models.PositiveIntegerField(default=0)
+    losing_trades = models.PositiveIntegerField(default=0)
+    win_rate = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    error = models.TextField(blank=True, default='', help_text="Failure message")
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        db_table = 'backtest_run'
+        verbose_name = 'Backtest Run'
+        verbose_name_plural = 'Backtest Runs'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+    
+    def __str__(self):
+        return f"Backtest {self.id} of {self.bot.name} ({self.status})"
+
+
+class BacktestTrade(models.Model):
+    """
+    One simulated buy or sell of a backtest run, numbered in execution order
+    """
+    ACTION_CHOICES = [
+        ('BUY', 'Buy'),
+        ('SELL', 'Sell'),
+    ]
+    
+    run = models.ForeignKey(BacktestRun, on_delete=models.CASCADE, related_name='trades')
+    seq = models.PositiveIntegerField(help_text="Position of the trade within the run")
+    date = models.DateField()
+    symbol = models.CharField(max_length=10)
+    action = models.CharField(max_length=4, choices=ACTION_CHOICES)
+    quantity = models.PositiveIntegerField()
+    price = models.DecimalField(max_digits=15, decimal_places=4)
+    cost = models.DecimalField(max_digits=15, decimal_places=4, null=True, blank=True, help_text="Cash spent (buys)")
+    proceeds = models.DecimalField(max_digits=15, decimal_places=4, null=True, blank=True, help_text="Cash received (sells)")
+    entry_price = models.DecimalField(max_digits=15, decimal_places=4, null=True, blank=True)
+    profit_loss = models.DecimalField(max_digits=15, decimal_places=4, null=True, blank=True)
+    reason = models.CharField(max_length=255, blank=True)
+    
+    class Meta:
+        db_table = 'backtest_trade'
+        ordering = ['run', 'seq']
+        constraints = [
+            models.UniqueConstraint(fields=['run', 'seq'], name='unique_backtest_trade_seq'),
+        ]
+    
+    def __str__(self):
+        return f"{self.date} {self.action} {self.quantity} {self.symbol} @ {self.price}"
+
+
+class BacktestEquityPoint(models.Model):
+    """
+    Portfolio value of a backtest run at the close of one trading day
+    """
+    run = models.ForeignKey(BacktestRun, on_delete=models.CASCADE, related_name='equity')
+    date = models.DateField()
+    cash = models.DecimalField(max_digits=15, decimal_places=2)
+    positions_value = models.DecimalField(max_digits=15, decimal_places=2)
+    total_value = models.DecimalField(max_digits=15, decimal_places=2)
+    
+    class Meta:
+        db_table = 'backtest_equity_point'
+        ordering = ['run', 'date']
+        constraints = [
+            models.UniqueConstraint(fields=['run', 'date'], name='unique_backtest_equity_date'),
+        ]
+    
+    def __str__(self):
+        return f"Backtest {self.run_id} {self.date}: ${self.total_value}"
@@ -0,0 +1,79 @@
+"""
+Live Streams
+Server-Sent Events endpoint pushing price ticks, holding P/L and unread
+signal counts. Requires serving the project through ASGI (trading_back.asgi),
+e.g. `uvicorn trading_back.asgi:application`, and the ingest_prices daemon to
+publish quotes. Under WSGI (runserver) the stream is refused with 503 and the
+frontend keeps polling.
+"""
+
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+from rest_framework.authtoken.models import Token
+
+from .market_data.broadcaster import broadcaster
+
+
+def _authenticate(request):
+    """
+    Resolve the user from the DRF token. EventSource cannot set headers, so the
+    token may also be passed as ?token=...
+    """
+    key = request.GET.get('token')
+    header = request.headers.get('Authorization', '')
+    if not key and header.startswith('Token '):
+        key = header[len('Token '):].strip()
+    if not key:
+        return None
+    try:
+        token = Token.objects.select_related('user').get(key=key)
+    except Token.DoesNotExist:
+        return None
+    return token.user if token.user.is_active else None
+
+
+def _format_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def price_stream(request):
+    """
+    GET /api/stream/?token=<token>
+    Events: 'prices' {prices, holdings, summary} and 'signals' {unread_count}
+    """
+    if not isinstance(request, ASGIRequest):
+        # A WSGI server buffers the whole async stream, so the client would get
+        # nothing until STREAM_MAX_DURATION; refuse so it falls back to polling
+        return JsonResponse({'detail': 'Live stream requires the ASGI server.'}, status=503)
+    user = await sync_to_async(_authenticate)(request)
+    if user is None:
+        return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=401)
+
+    queue = await broadcaster.subscribe(user.id)
+
+    async def events():
+        loop = asyncio.get_running_loop()
+        # Connections are recycled so clients that vanished without a disconnect
+        # are dropped; EventSource reconnects on its own after `retry` ms
+        closes_at = loop.time() + settings.STREAM_MAX_DURATION
+        try:
+            yield "retry: 3000\n\n"
+            while loop.time() < closes_at:
+                try:
+                    event, data = await asyncio.wait_for(queue.get(), timeout=settings.STREAM_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield _format_event(event, data)
+        finally:
+            broadcaster.unsubscribe(queue)
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
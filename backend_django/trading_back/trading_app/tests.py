@@ -1,3 +1,1332 @@
-from django.test import TestCase
+import contextlib
+import io
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+import pandas as pd
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import AsyncClient, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .auto_trading_engine import AutoTradingEngine
+from .backtest_benchmark import MEMORY_SLACK_MB, find_regressions
+from .backtest_batch import run_batch
+from .backtest_clean_energy import symbol_trades
+from .backtest_hermes_bot import HermesBotBacktester, run_backtest_for_bot, run_cached
+from .backtest_hermes_fixed import FIXED_POINT_TOLERANCE, FixedPointHermesBacktester
+from .backtest_hermes_vectorized import VectorizedHermesBacktester
+from .backtest_runs import claim_next_run, execute_run
+from .backtest_sweep import RISK_PARAMS, SweepBot, build_grid, parse_toggle, parse_values, run_sweep
+from .market_data import providers
+from .market_data import quote_cache as quote_cache_module
+from .market_data.bar_store import BarStore, is_trading_day
+from .market_data.broadcaster import PriceBroadcaster
+from .market_data.charts import downsample, lttb_indices, serialize_series, slice_period
+from .market_data.index_events import IndexEvents, IntervalTree, event_order
+from .market_data.price_refresh import refresh_holding_prices
+from .market_data.providers import BAR_COLUMNS, MarketDataProvider, ReplayProvider, create_provider, set_provider
+from .market_data.quote_cache import QuoteCache
+from .market_data.quotes import CHART_PERIODS, get_quote
+from .market_data.single_flight import CoalescingProvider, SingleFlight
+from .market_data.synthetic import generate_bars
+from .ml_models.nextday_prediction import NextDayPredictor
+from .ml_models.pivot import PivotStrategy
+from .ml_models.vectorized import PIVOT_LEVELS, PIVOT_SIGNALS, PREDICTIONS
+from .models import AutoTradingBot, BacktestRun, BacktestTrade, Holding, MarketQuote, User
+from .trade_journal import END_OF_BACKTEST, REASON_END, REASON_STOP_LOSS, REASON_TAKE_PROFIT, EquityCurve, TradeJournal
+
+
+class FundamentalsOnlyProvider(MarketDataProvider):
+    """Provider without a local universe, like yfinance: fundamentals per symbol only"""
+
+    name = 'test-fundamentals'
+
+    def __init__(self):
+        self.requested = []
+
+    def get_fundamentals(self, symbol):
+        self.requested.append(symbol)
+        return {
+            'name': f"{symbol} Inc.",
+            'market_cap': {'NVDA': 30000000000, 'AAPL': 20000000000}.get(symbol, 9000000000),
+            'volume': 2000000,
+            'sector': 'Technology',
+        }
+
+
+class UniverseScreenerTests(TestCase):
+    def setUp(self):
+        self.provider = FundamentalsOnlyProvider()
+        self.previous = providers._default_provider
+        set_provider(self.provider)
+
+    def tearDown(self):
+        providers._default_provider = self.previous
+
+    @override_settings(SCREENER_UNIVERSE=None)
+    def test_falls_back_to_bot_watchlists(self):
+        response = self.client.get('/api/ml/screener/universe/?top=3')
+        self.assertEqual(response.status_code, 200)
+
+        watchlists = {symbol for config in AutoTradingEngine.RISK_CONFIG.values() for symbol in config['stocks']}
+        self.assertEqual(set(self.provider.requested), watchlists)
+        self.assertEqual(response.data['universe_size'], len(watchlists))
+        results = response.data['results']
+        self.assertEqual([row['symbol'] for row in results[:2]], ['NVDA', 'AAPL'])
+        self.assertEqual(results[0]['recommendation'], 'STRONG_CANDIDATE')
+
+
+class PriceStreamTests(TestCase):
+    def test_refused_under_wsgi(self):
+        # runserver would buffer the async stream until STREAM_MAX_DURATION
+        response = self.client.get('/api/stream/?token=unknown')
+        self.assertEqual(response.status_code, 503)
+
+    async def test_requires_token_under_asgi(self):
+        response = await AsyncClient().get('/api/stream/?token=unknown')
+        self.assertEqual(response.status_code, 401)
+
+
+
+def drain(queue):
+    events = []
+    while not queue.empty():
+        events.append(queue.get_nowait())
+    return events
+
+
+class PriceBroadcasterTests(TestCase):
+    def setUp(self):
+        self.users = [
+            User.objects.create_user(email=f"stream{i}@example.com", username=f"stream{i}", name=f"Stream {i}", password='x')
+            for i in range(3)
+        ]
+        for user in self.users:
+            Holding.objects.create(user=user, stock='AAPL', quantity=2, buying_price=Decimal('90'), current_price=Decimal('100'))
+        MarketQuote.objects.create(symbol='AAPL', price=Decimal('100'), updated_at=timezone.now() - timedelta(seconds=5))
+
+    def publish(self, price):
+        MarketQuote.objects.filter(symbol='AAPL').update(price=price, updated_at=timezone.now())
+
+    async def test_late_subscriber_does_not_swallow_pending_update(self):
+        broadcaster = PriceBroadcaster()
+        with mock.patch.object(PriceBroadcaster, '_ensure_running'):
+            first = await broadcaster.subscribe(self.users[0].id)
+            second = await broadcaster.subscribe(self.users[1].id)
+            await broadcaster._tick()
+            drain(first), drain(second)
+
+            await sync_to_async(self.publish)(Decimal('105'))
+            late = await broadcaster.subscribe(self.users[2].id)
+            self.assertEqual(drain(late)[0], ('prices', mock.ANY))
+            self.assertEqual(broadcaster._prices['AAPL'], 100.0)
+
+            await broadcaster._tick()
+        for queue in (first, second):
+            events = dict(drain(queue))
+            self.assertEqual(events['prices']['prices'], {'AAPL': 105.0})
+            self.assertEqual(events['prices']['summary']['total_current_value'], 210.0)
+
+
+
+class LastPriceProvider(MarketDataProvider):
+    name = 'test-last-prices'
+
+    def __init__(self, prices):
+        self.prices = prices
+        self.requests = []
+
+    def get_last_prices(self, symbols):
+        self.requests.append(list(symbols))
+        return {symbol: self.prices[symbol] for symbol in symbols if symbol in self.prices}
+
+
+class HoldingPriceRefreshTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.provider = LastPriceProvider({'AAPL': 190.123, 'MSFT': 410.0})
+        self.addCleanup(setattr, providers, '_default_provider', providers._default_provider)
+        set_provider(self.provider)
+
+        self.users = [
+            User.objects.create_user(email=f"refresh{i}@example.com", username=f"refresh{i}", name=f"Refresh {i}", password='x')
+            for i in range(2)
+        ]
+        for user, stock in zip(self.users, ('AAPL', 'aapl')):
+            Holding.objects.create(user=user, stock=stock, quantity=1, buying_price=Decimal('150'), current_price=Decimal('150'))
+        Holding.objects.create(user=self.users[0], stock='MSFT', quantity=1, buying_price=Decimal('400'), current_price=Decimal('410'))
+        Holding.objects.create(user=self.users[0], stock='GONE', quantity=1, buying_price=Decimal('5'), current_price=Decimal('5'))
+
+    def test_one_download_updates_every_users_holdings(self):
+        prices, failed = refresh_holding_prices(['AAPL', 'aapl', 'MSFT', 'GONE'])
+        self.assertEqual(self.provider.requests, [['AAPL', 'GONE', 'MSFT']])
+        self.assertEqual(prices, {'AAPL': 190.123, 'MSFT': 410.0})
+        self.assertEqual(failed, ['GONE'])
+        self.assertEqual(
+            sorted(Holding.objects.filter(stock__iexact='aapl').values_list('current_price', flat=True)),
+            [Decimal('190.12'), Decimal('190.12')],
+        )
+
+        # Within PRICE_REFRESH_INTERVAL the prices are reused instead of downloaded again
+        refresh_holding_prices(['AAPL', 'MSFT'])
+        self.assertEqual(len(self.provider.requests), 1)
+
+    def test_endpoint_counts_changed_holdings(self):
+        client = APIClient()
+        client.force_authenticate(self.users[0])
+        response = client.post('/api/holdings/refresh_prices/')
+        self.assertEqual(response.status_code, 200)
+        # AAPL moved; MSFT was already at its price and GONE has none
+        self.assertEqual(response.data['updated_count'], 1)
+        self.assertEqual(response.data['message'], 'Updated 1 holdings')
+        self.assertEqual(response.data['total_holdings'], 3)
+        self.assertEqual(response.data['errors'], ['Could not fetch price for GONE'])
+
+        # The other user's holding was refreshed by the same download
+        client.force_authenticate(self.users[1])
+        response = client.post('/api/holdings/refresh_prices/')
+        self.assertEqual(response.data['updated_count'], 0)
+        self.assertEqual(len(self.provider.requests), 1)
+
+
+class HermSimulationBoundsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='bounds@example.com', username='bounds', name='Bounds', password='x', balance=Decimal('5000')
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    @override_settings(HERM_MAX_DURATION_WEEKS=52, MONTE_CARLO_MAX_CELLS=10000000)
+    def test_simulation_rejects_oversized_requests(self):
+        response = self.client.post('/api/herm/simulate/', {'duration_weeks': 100000}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+        # 52 weeks = 261 days per path, so 100000 paths exceed 10M cells
+        response = self.client.post('/api/herm/simulate/', {'duration_weeks': 52, 'paths': 100000}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('38314 paths', response.data['error'])
+
+    @override_settings(HERM_MAX_DURATION_WEEKS=52)
+    def test_create_rejects_oversized_duration_before_charging(self):
+        response = self.client.post('/api/herm/create/', {'duration_weeks': 100000}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.balance, Decimal('5000'))
+        self.assertFalse(AutoTradingBot.objects.exists())
+
+
+BACKTEST_START, BACKTEST_END = date(2024, 9, 2), date(2025, 6, 27)
+
+
+def run_quietly(function, *args, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return function(*args, **kwargs)
+
+
+def result_signature(results):
+    """Everything a backtest reports, in comparable form"""
+    return (
+        results['final_value'], results['total_trades'], results['winning_trades'],
+        [tuple(trade.items()) for trade in results['trades']],
+        [tuple(day.items()) for day in results['daily_values']],
+    )
+
+
+def daily_frame(results):
+    return pd.DataFrame([dict(day) for day in results['daily_values']])
+
+
+class SyntheticMarketMixin:
+    """
+    Replay provider over synthetic bars of every bot watchlist symbol, with an
+    SP500 addition of NVDA inside the window, and scratch directories for the
+    bar store, result cache and checkpoints
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.scratch = tempfile.mkdtemp()
+        replay_dir, events_dir = (os.path.join(cls.scratch, name) for name in ('replay', 'index_events'))
+        os.makedirs(replay_dir)
+        os.makedirs(events_dir)
+
+        symbols = sorted({symbol for config in AutoTradingEngine.RISK_CONFIG.values() for symbol in config['stocks']})
+        dates = pd.bdate_range(BACKTEST_START, BACKTEST_END)
+        bars = generate_bars(len(symbols), dates, seed=11)
+        for col, symbol in enumerate(symbols):
+            pd.DataFrame({'date': dates, **{name: bars[name][:, col] for name in BAR_COLUMNS[1:]}}).to_csv(
+                os.path.join(replay_dir, f"{symbol}.csv"), index=False, date_format='%Y-%m-%d'
+            )
+        pd.DataFrame({
+            'symbol': symbols,
+            'name': symbols,
+            'market_cap': [20000000000 if i % 2 else 9000000000 for i in range(len(symbols))],
+            'volume': [1500000 if i % 3 else 600000 for i in range(len(symbols))],
+            'sector': ['Technology' if i % 4 else 'Energy' for i in range(len(symbols))],
+        }).to_csv(os.path.join(replay_dir, 'fundamentals.csv'), index=False)
+        pd.DataFrame([{
+            'index_name': 'SP500', 'symbol': 'NVDA', 'event_type': 'ADD',
+            'announcement_date': '2025-01-06', 'effective_date': '2025-01-21',
+        }]).to_csv(os.path.join(events_dir, 'sp500.csv'), index=False)
+
+        cls.settings_override = override_settings(
+            BAR_STORE_DIR=os.path.join(cls.scratch, 'bars'),
+            BACKTEST_CACHE_DIR=os.path.join(cls.scratch, 'cache'),
+            BACKTEST_CHECKPOINT_DIR=os.path.join(cls.scratch, 'checkpoints'),
+            INDEX_EVENTS_DIR=events_dir,
+        )
+        cls.settings_override.enable()
+        cls.previous_provider = providers._default_provider
+        set_provider(create_provider('replay', data_dir=replay_dir))
+
+    @classmethod
+    def tearDownClass(cls):
+        providers._default_provider = cls.previous_provider
+        cls.settings_override.disable()
+        shutil.rmtree(cls.scratch, ignore_errors=True)
+        super().tearDownClass()
+
+
+
+class CountingReplayProvider(ReplayProvider):
+    """Replay provider recording every history download, failing the ones fail(start, end) selects"""
+
+    def __init__(self, data_dir, fail=None):
+        super().__init__(data_dir)
+        self.calls = []
+        self.symbols = []
+        self.fail = fail
+
+    def get_history(self, symbol, start, end, interval='1d'):
+        self.calls.append((start, end))
+        self.symbols.append(symbol)
+        if self.fail and self.fail(start, end):
+            raise ConnectionError('provider unavailable')
+        return super().get_history(symbol, start, end, interval)
+
+
+class BarStoreTests(SimpleTestCase):
+    def setUp(self):
+        self.scratch = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.scratch, ignore_errors=True)
+        dates = pd.bdate_range('2024-01-01', '2024-12-31')
+        bars = generate_bars(1, dates, seed=8)
+        pd.DataFrame({'date': dates, **{name: bars[name][:, 0] for name in BAR_COLUMNS[1:]}}).to_csv(
+            os.path.join(self.scratch, 'AAA.csv'), index=False, date_format='%Y-%m-%d'
+        )
+        self.provider = CountingReplayProvider(self.scratch)
+        settings_override = override_settings(BAR_STORE_DIR=os.path.join(self.scratch, 'bars'))
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def store(self):
+        """A store with an empty in-memory cache, so reads go through the Parquet files"""
+        return BarStore(provider=self.provider)
+
+    def expected(self, start, end):
+        return ReplayProvider(self.scratch).get_history('AAA', start, end)
+
+    def test_missing_ranges(self):
+        jan, feb, mar = date(2024, 1, 10), date(2024, 2, 10), date(2024, 3, 10)
+        coverage = (feb, mar)
+        day = timedelta(days=1)
+        self.assertEqual(BarStore.missing_ranges(None, jan, mar), [(jan, mar)])
+        self.assertEqual(BarStore.missing_ranges(coverage, feb + day, mar - day), [])
+        self.assertEqual(BarStore.missing_ranges(coverage, jan, mar), [(jan, feb - day)])
+        self.assertEqual(BarStore.missing_ranges(coverage, feb, date(2024, 4, 1)), [(mar + day, date(2024, 4, 1))])
+        self.assertEqual(
+            BarStore.missing_ranges(coverage, jan, date(2024, 4, 1)),
+            [(jan, feb - day), (mar + day, date(2024, 4, 1))],
+        )
+        # Disjoint requests also fetch the gap, keeping the coverage one span
+        self.assertEqual(BarStore.missing_ranges(coverage, date(2024, 5, 1), date(2024, 5, 9)), [(mar + day, date(2024, 5, 9))])
+        self.assertEqual(BarStore.missing_ranges(coverage, jan, jan + day), [(jan, feb - day)])
+        # Nothing past today is requested
+        today = date.today()
+        self.assertEqual(BarStore.missing_ranges(None, today - day, today + 10 * day), [(today - day, today)])
+        self.assertEqual(BarStore.missing_ranges(None, today + day, today + 10 * day), [])
+
+    def test_covered_range_is_served_without_provider_calls(self):
+        store = self.store()
+        bars = store.get_bars('AAA', date(2024, 3, 1), date(2024, 6, 30))
+        pd.testing.assert_frame_equal(bars, self.expected(date(2024, 3, 1), date(2024, 6, 30)))
+        self.assertEqual(len(self.provider.calls), 1)
+
+        for store in (store, self.store()):
+            bars = store.get_bars('AAA', date(2024, 4, 6), date(2024, 5, 1))
+            pd.testing.assert_frame_equal(bars, self.expected(date(2024, 4, 6), date(2024, 5, 1)))
+        # A stored weekend returns no rows without asking the provider
+        self.assertTrue(self.store().get_bars('AAA', date(2024, 4, 6), date(2024, 4, 7)).empty)
+        self.assertEqual(len(self.provider.calls), 1)
+
+    def test_refetched_bars_replace_stored_ones(self):
+        store = self.store()
+        stale = self.expected(date(2024, 3, 1), date(2024, 3, 15))
+        stale.loc[stale.index[-1], 'close'] = 1.0
+        # Fetched while the last day's session was still open
+        store.save('AAA', '1d', stale, (date(2024, 3, 1), date(2024, 3, 15)), datetime(2024, 3, 15, 11))
+
+        bars = self.store().get_bars('AAA', date(2024, 3, 1), date(2024, 3, 22))
+        pd.testing.assert_frame_equal(bars, self.expected(date(2024, 3, 1), date(2024, 3, 22)))
+        self.assertTrue(bars['date'].is_unique)
+        self.assertEqual(self.provider.calls, [(date(2024, 3, 15), date(2024, 3, 22))])
+
+    def test_failed_range_is_left_uncovered(self):
+        self.store().get_bars('AAA', date(2024, 3, 1), date(2024, 3, 31))
+        self.provider.calls.clear()
+        self.provider.fail = lambda start, end: start < date(2024, 3, 1)
+
+        bars = run_quietly(self.store().get_bars, 'AAA', date(2024, 2, 1), date(2024, 4, 30))
+        pd.testing.assert_frame_equal(bars, self.expected(date(2024, 3, 1), date(2024, 4, 30)))
+        self.assertEqual(self.store().load('AAA')[1], (date(2024, 3, 1), date(2024, 4, 30)))
+
+        self.provider.fail = None
+        bars = self.store().get_bars('AAA', date(2024, 2, 1), date(2024, 4, 30))
+        pd.testing.assert_frame_equal(bars, self.expected(date(2024, 2, 1), date(2024, 4, 30)))
+        self.assertEqual(self.provider.calls, [
+            (date(2024, 2, 1), date(2024, 2, 29)),
+            (date(2024, 4, 1), date(2024, 4, 30)),
+            (date(2024, 2, 1), date(2024, 2, 29)),
+        ])
+
+
+    def test_overlapping_request_fetches_only_the_gaps(self):
+        self.store().get_bars('AAA', date(2024, 3, 1), date(2024, 3, 31))
+        bars = self.store().get_bars('AAA', date(2024, 2, 1), date(2024, 4, 30))
+        pd.testing.assert_frame_equal(bars, self.expected(date(2024, 2, 1), date(2024, 4, 30)))
+        self.assertEqual(self.provider.calls, [
+            (date(2024, 3, 1), date(2024, 3, 31)),
+            (date(2024, 2, 1), date(2024, 2, 29)),
+            (date(2024, 4, 1), date(2024, 4, 30)),
+        ])
+
+    def test_stale_last_day_is_refetched_once(self):
+        self.store().save('AAA', '1d', self.expected(date(2024, 3, 1), date(2024, 3, 15)),
+                          (date(2024, 3, 1), date(2024, 3, 15)), datetime(2024, 3, 15, 11))
+        for _ in range(3):
+            self.store().get_bars('AAA', date(2024, 3, 1), date(2024, 3, 15))
+        self.assertEqual(self.provider.calls, [(date(2024, 3, 15), date(2024, 3, 15))])
+
+    @override_settings(BAR_STORE_LIVE_TTL=60)
+    def test_last_day_without_session_is_settled(self):
+        coverage = (date(2024, 3, 1), date(2024, 3, 15))
+        self.assertEqual(BarStore.settled_coverage(coverage, datetime(2024, 3, 15, 11), datetime(2024, 3, 15, 11, 0, 30)), coverage)
+        self.assertEqual(BarStore.settled_coverage(coverage, datetime(2024, 3, 15, 11), datetime(2024, 3, 15, 12)),
+                         (date(2024, 3, 1), date(2024, 3, 14)))
+        self.assertEqual(BarStore.settled_coverage(coverage, datetime(2024, 3, 16, 9), datetime(2024, 3, 18, 9)), coverage)
+        # A Saturday and Good Friday fetched on the day itself never produce a bar
+        for end in (date(2024, 3, 16), date(2024, 3, 29)):
+            coverage = (date(2024, 3, 1), end)
+            fetched_at = datetime.combine(end, datetime.min.time()).replace(hour=10)
+            self.assertEqual(BarStore.settled_coverage(coverage, fetched_at, fetched_at + timedelta(hours=5)), coverage)
+
+    def test_exchange_holidays(self):
+        for day in (date(2024, 3, 29), date(2024, 7, 4), date(2024, 6, 19), date(2022, 12, 26), date(2024, 3, 16)):
+            self.assertFalse(is_trading_day(day), day)
+        # Federal holidays the exchanges trade through, and New Year's Eve before a Saturday New Year
+        for day in (date(2024, 10, 14), date(2024, 11, 11), date(2021, 12, 31), date(2021, 6, 18)):
+            self.assertTrue(is_trading_day(day), day)
+
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+class CountingLoader:
+    """Loader returning 1, 2, 3, ...; while gate is cleared, loads block until it is set"""
+
+    def __init__(self):
+        self.calls = 0
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def __call__(self):
+        self.calls += 1
+        value = self.calls
+        self.gate.wait(5)
+        return value
+
+
+class QuoteCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        clock_patch = mock.patch.object(quote_cache_module, 'time', self.clock)
+        clock_patch.start()
+        self.addCleanup(clock_patch.stop)
+        self.cache = QuoteCache(max_entries=3)
+        self.loader = CountingLoader()
+
+    def wait_for_refreshes(self):
+        deadline = time.monotonic() + 5
+        while self.cache._refreshing and time.monotonic() < deadline:
+            time.sleep(0.001)
+        self.assertFalse(self.cache._refreshing)
+
+    def test_fresh_entries_are_hits(self):
+        self.assertEqual(self.cache.get('k', self.loader, ttl=10), 1)
+        self.clock.now += 9.9
+        self.assertEqual(self.cache.get('k', self.loader, ttl=10), 1)
+        self.assertEqual(self.loader.calls, 1)
+        self.assertEqual((self.cache.stats['misses'], self.cache.stats['hits']), (1, 1))
+
+    def test_stale_entry_is_served_while_one_refresh_runs(self):
+        self.cache.get('k', self.loader, ttl=10)
+        self.clock.now += 15
+        self.loader.gate.clear()
+        # Both stale hits return the old value at once and share one background reload
+        self.assertEqual(self.cache.get('k', self.loader, ttl=10), 1)
+        self.assertEqual(self.cache.get('k', self.loader, ttl=10), 1)
+        self.loader.gate.set()
+        self.wait_for_refreshes()
+
+        self.assertEqual(self.loader.calls, 2)
+        self.assertEqual(self.cache.stats['stale_hits'], 2)
+        self.assertEqual(self.cache.stats['refreshes'], 1)
+        self.assertEqual(self.cache.get('k', self.loader, ttl=10), 2)
+        self.assertEqual(self.cache.stats['hits'], 1)
+
+    def test_very_stale_entry_is_reloaded_synchronously(self):
+        self.cache.get('k', self.loader, ttl=10)
+        self.clock.now += 10 * QuoteCache.STALE_FACTOR
+        self.assertEqual(self.cache.get('k', self.loader, ttl=10), 2)
+        self.assertEqual(self.cache.stats['refreshes'], 0)
+        self.assertEqual(self.cache.stats['misses'], 2)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        for key in ('a', 'b', 'c'):
+            self.cache.set(key, key)
+        self.cache.get('a', self.loader, ttl=10)
+        self.cache.set('d', 'd')
+        self.assertEqual(list(self.cache._entries), ['c', 'a', 'd'])
+        self.assertEqual(self.cache.stats['evictions'], 1)
+        self.assertEqual(self.cache.get('b', self.loader, ttl=10), 1)
+        self.assertEqual(list(self.cache._entries), ['a', 'd', 'b'])
+
+
+class StubQuoteProvider(MarketDataProvider):
+    name = 'test-quotes'
+
+    def __init__(self):
+        self.requested = []
+
+    def get_quote(self, symbol):
+        self.requested.append(symbol)
+        return {'name': f"{symbol} Inc.", 'current_price': 100.0, 'currency': 'USD'}
+
+
+class CachedQuoteTests(TestCase):
+    def setUp(self):
+        self.provider = StubQuoteProvider()
+        self.previous_provider = providers._default_provider
+        set_provider(self.provider)
+        self.addCleanup(setattr, providers, '_default_provider', self.previous_provider)
+        self.addCleanup(quote_cache_module.quote_cache.invalidate, ('quote', 'AAPL'))
+        quote_cache_module.quote_cache.invalidate(('quote', 'AAPL'))
+
+    def test_published_price_is_folded_in_on_load(self):
+        MarketQuote.objects.create(symbol='AAPL', price=Decimal('101.5'), updated_at=timezone.now())
+        self.assertEqual(get_quote('AAPL')['current_price'], 101.5)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_quote('AAPL')['current_price'], 101.5)
+        self.assertEqual(self.provider.requested, ['AAPL'])
+
+    def test_stale_published_price_is_ignored(self):
+        MarketQuote.objects.create(symbol='AAPL', price=Decimal('101.5'), updated_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(get_quote('AAPL'), {'name': 'AAPL Inc.', 'current_price': 100.0, 'currency': 'USD'})
+
+
+
+class SlowQuoteProvider(StubQuoteProvider):
+    """Quote provider whose calls block until release is set"""
+
+    def __init__(self):
+        super().__init__()
+        self.release = threading.Event()
+
+    def get_quote(self, symbol):
+        self.release.wait(5)
+        return super().get_quote(symbol)
+
+
+class SingleFlightTests(SimpleTestCase):
+    def start(self, target, *args):
+        thread = threading.Thread(target=target, args=args)
+        thread.start()
+        self.addCleanup(thread.join, 5)
+        return thread
+
+    def wait_for(self, condition):
+        deadline = time.monotonic() + 5
+        while not condition() and time.monotonic() < deadline:
+            time.sleep(0.001)
+        self.assertTrue(condition())
+
+    def test_concurrent_callers_share_one_upstream_call(self):
+        provider = SlowQuoteProvider()
+        coalescing = CoalescingProvider(provider)
+        results = []
+        threads = [self.start(lambda: results.append(coalescing.get_quote('AAPL'))) for _ in range(8)]
+        self.wait_for(lambda: coalescing.flight.stats['calls'] == 8)
+        provider.release.set()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(provider.requested, ['AAPL'])
+        self.assertEqual(len(results), 8)
+        self.assertTrue(all(result is results[0] for result in results))
+        self.assertEqual(coalescing.flight.stats['executions'], 1)
+        self.assertEqual(coalescing.flight.stats['coalesced'], 7)
+        self.assertEqual(coalescing.flight.in_flight(), 0)
+
+        # Once the call finished the next caller fetches again
+        coalescing.get_quote('AAPL')
+        self.assertEqual(provider.requested, ['AAPL', 'AAPL'])
+
+    def test_errors_reach_every_caller(self):
+        flight = SingleFlight()
+        release = threading.Event()
+        errors = []
+
+        def fail():
+            release.wait(5)
+            raise ConnectionError('upstream down')
+
+        def call():
+            try:
+                flight.do('key', fail)
+            except ConnectionError as e:
+                errors.append(e)
+
+        threads = [self.start(call) for _ in range(3)]
+        self.wait_for(lambda: flight.stats['calls'] == 3)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(len(errors), 3)
+        self.assertEqual(flight.stats['errors'], 1)
+
+    @override_settings(SINGLE_FLIGHT_TIMEOUTS={'quote': 0.05})
+    def test_follower_times_out_without_hanging(self):
+        provider = SlowQuoteProvider()
+        coalescing = CoalescingProvider(provider)
+        results = []
+        leader = self.start(lambda: results.append(coalescing.get_quote('AAPL')))
+        self.wait_for(lambda: coalescing.flight.in_flight() == 1)
+
+        started = time.monotonic()
+        with self.assertRaises(TimeoutError):
+            coalescing.get_quote('AAPL')
+        self.assertLess(time.monotonic() - started, 2)
+        self.assertEqual(coalescing.flight.stats['timeouts'], 1)
+
+        # The leader is unaffected and still completes its call
+        provider.release.set()
+        leader.join(5)
+        self.assertEqual(results[0]['current_price'], 100.0)
+        self.assertEqual(provider.requested, ['AAPL'])
+
+
+
+class BenchmarkRegressionTests(SimpleTestCase):
+    baseline = {
+        'vectorized_10sym_1y': {'bars_per_sec': 100000.0, 'peak_mb': 40.0},
+        'loop_10sym_1y': {'bars_per_sec': 2000.0, 'peak_mb': 10.0},
+    }
+
+    def test_drops_and_growth_beyond_tolerance_are_flagged(self):
+        results = {
+            'vectorized_10sym_1y': {'bars_per_sec': 74000.0, 'peak_mb': 40.0},
+            'loop_10sym_1y': {'bars_per_sec': 2000.0, 'peak_mb': 10.0 * 1.25 + MEMORY_SLACK_MB + 0.1},
+        }
+        regressions = find_regressions(results, self.baseline, tolerance=0.25)
+        self.assertEqual(len(regressions), 2)
+        self.assertTrue(regressions[0].startswith('vectorized_10sym_1y: 74,000 bars/s'))
+        self.assertTrue(regressions[1].startswith('loop_10sym_1y: peak'))
+
+    def test_changes_within_tolerance_pass(self):
+        results = {
+            'vectorized_10sym_1y': {'bars_per_sec': 76000.0, 'peak_mb': 50.0},
+            'loop_10sym_1y': {'bars_per_sec': 9000.0, 'peak_mb': 5.0},
+            # Not in the baseline, so not compared
+            'fixed_10sym_1y': {'bars_per_sec': 1.0, 'peak_mb': 1000.0},
+        }
+        self.assertEqual(find_regressions(results, self.baseline, tolerance=0.25), [])
+
+    def test_missing_baseline_fails_before_running(self):
+        with mock.patch('trading_app.management.commands.benchmark_backtests.run_benchmarks') as run:
+            with self.assertRaisesMessage(CommandError, 'No baseline at'):
+                call_command('benchmark_backtests', baseline=os.path.join(tempfile.gettempdir(), 'missing-baseline.json'))
+        run.assert_not_called()
+
+
+
+class TradeJournalTests(SimpleTestCase):
+    signals = (('Pivot', 'BUY'), ('NextDay', 'UP'))
+
+    def journal(self, capacity=4):
+        journal = TradeJournal(capacity=capacity)
+        day = date(2025, 1, 2)
+        journal.record_buy(day, 'NVDA', 5, 138.31, 691.55, self.signals)
+        journal.record_sell(day + timedelta(days=1), 'NVDA', 5, 134.16, 670.8, 138.31, -20.75, REASON_STOP_LOSS)
+        journal.record_buy(day + timedelta(days=2), 'AAPL', 2, 200.0, 400.0, self.signals)
+        journal.record_sell(day + timedelta(days=3), 'AAPL', 2, 220.0, 440.0, 200.0, 40.0, REASON_TAKE_PROFIT)
+        journal.record_sell(day + timedelta(days=4), 'TSLA', 1, 10.5, 10.5, 10.0, 0.5, REASON_END)
+        journal.record_sell(day + timedelta(days=4), 'TSLA', 1, 10.5, 10.5, 10.0, 0.5, 'Manual exit')
+        return journal
+
+    def test_reasons_are_formatted_on_read(self):
+        journal = self.journal()
+        # Signal combinations are stored once as tuples, not as formatted strings
+        self.assertEqual(journal.details.values, [self.signals, 'Manual exit'])
+        self.assertEqual([trade['reason'] for trade in journal], [
+            'ML Signals: Pivot(BUY), NextDay(UP)',
+            'Stop Loss triggered (-3.00%)',
+            'ML Signals: Pivot(BUY), NextDay(UP)',
+            'Take Profit triggered (10.00%)',
+            END_OF_BACKTEST,
+            'Manual exit',
+        ])
+
+    def test_reads_return_trade_dicts(self):
+        journal = self.journal()
+        self.assertEqual(journal[0], {
+            'date': date(2025, 1, 2), 'symbol': 'NVDA', 'action': 'BUY', 'quantity': 5,
+            'price': Decimal('138.31'), 'cost': Decimal('691.55'), 'reason': 'ML Signals: Pivot(BUY), NextDay(UP)',
+        })
+        self.assertEqual(journal[1], {
+            'date': date(2025, 1, 3), 'symbol': 'NVDA', 'action': 'SELL', 'quantity': 5, 'price': Decimal('134.16'),
+            'proceeds': Decimal('670.8'), 'entry_price': Decimal('138.31'), 'profit_loss': Decimal('-20.75'),
+            'reason': 'Stop Loss triggered (-3.00%)',
+        })
+        trades = list(journal)
+        self.assertEqual(journal[1:4], trades[1:4])
+        self.assertEqual(journal[::-2], trades[::-2])
+        self.assertEqual(journal[-1], trades[-1])
+        with self.assertRaises(IndexError):
+            journal[len(journal)]
+        self.assertFalse(TradeJournal())
+
+    def test_grows_past_initial_capacity(self):
+        journal = TradeJournal(capacity=2)
+        for i in range(600):
+            journal.record_buy(date(2020, 1, 1) + timedelta(days=i), f"S{i % 7}", i + 1, 10.0 + i, 10.0 * (i + 1), self.signals)
+        self.assertEqual(len(journal), 600)
+        self.assertEqual(len(journal.symbols.values), 7)
+        self.assertEqual(journal[0]['quantity'], 1)
+        self.assertEqual(journal[599]['date'], date(2020, 1, 1) + timedelta(days=599))
+        self.assertEqual(journal[599]['price'], Decimal('609.0'))
+
+    def test_pickle_round_trip(self):
+        journal = self.journal()
+        restored = pickle.loads(pickle.dumps(journal))
+        self.assertEqual(list(restored), list(journal))
+        # The intern tables keep their ids, so appending after a checkpoint resume reuses them
+        restored.record_buy(date(2025, 2, 3), 'NVDA', 1, 100.0, 100.0, self.signals)
+        self.assertEqual(restored.symbols.values, ['NVDA', 'AAPL', 'TSLA'])
+        self.assertEqual(len(restored.details.values), 2)
+        self.assertEqual(restored[-1]['reason'], 'ML Signals: Pivot(BUY), NextDay(UP)')
+
+        curve = EquityCurve.from_arrays([date(2025, 1, 2), date(2025, 1, 3)], [100.0, 50.0], [0.0, 60.0])
+        curve.append(date(2025, 1, 6), 40.0, 75.5)
+        restored = pickle.loads(pickle.dumps(curve))
+        self.assertEqual(list(restored), list(curve))
+        self.assertEqual(restored[-1], {'date': date(2025, 1, 6), 'cash': 40.0, 'positions_value': 75.5, 'total_value': 115.5})
+        np.testing.assert_array_equal(restored.total_value, [100.0, 110.0, 115.5])
+
+    def test_to_frame(self):
+        frame = self.journal().to_frame()
+        self.assertEqual(list(frame.columns), [
+            'date', 'symbol', 'action', 'quantity', 'price', 'amount', 'entry_price', 'profit_loss', 'reason',
+        ])
+        self.assertEqual(list(frame['symbol']), ['NVDA', 'NVDA', 'AAPL', 'AAPL', 'TSLA', 'TSLA'])
+        self.assertEqual(list(frame['action']), ['BUY', 'SELL', 'BUY', 'SELL', 'SELL', 'SELL'])
+        self.assertEqual(frame['reason'][3], 'Take Profit triggered (10.00%)')
+        self.assertEqual(list(TradeJournal().to_frame().columns), list(frame.columns))
+
+
+
+class ChartSeriesTests(SimpleTestCase):
+    today = date(2025, 6, 30)
+
+    def history(self):
+        dates = pd.bdate_range('2020-01-02', self.today)
+        bars = generate_bars(1, dates, seed=9)
+        return pd.DataFrame({'date': dates, **{name: bars[name][:, 0] for name in BAR_COLUMNS[1:]}})
+
+    def test_lttb_keeps_endpoints_and_point_budget(self):
+        rng = np.random.default_rng(10)
+        y = np.cumsum(rng.normal(size=5000))
+        y[2345] = y.max() + 50  # a spike LTTB must not average away
+        x = np.arange(5000) * 86400
+        for n_out in (3, 10, 300, 4999):
+            with self.subTest(n_out=n_out):
+                picked = lttb_indices(x, y, n_out)
+                self.assertEqual(len(picked), n_out)
+                self.assertEqual((picked[0], picked[-1]), (0, 4999))
+                self.assertTrue((np.diff(picked) > 0).all())
+                if n_out >= 10:
+                    self.assertIn(2345, picked)
+
+    def test_downsample_within_budget_is_a_no_op(self):
+        bars = self.history()
+        self.assertIs(downsample(bars, len(bars)), bars)
+        self.assertIs(downsample(bars, len(bars) + 1), bars)
+        self.assertIs(downsample(bars, None), bars)
+        np.testing.assert_array_equal(lttb_indices(np.arange(5), np.arange(5), 5), np.arange(5))
+
+        reduced = downsample(bars, 200)
+        self.assertEqual(len(reduced), 200)
+        self.assertEqual((reduced['date'].iloc[0], reduced['date'].iloc[-1]), (bars['date'].iloc[0], bars['date'].iloc[-1]))
+
+    def test_periods_slice_the_five_year_series(self):
+        bars = self.history()
+        expected_first = {
+            '1D': date(2025, 6, 30),
+            '1W': date(2025, 6, 24),
+            '1M': date(2025, 5, 30),
+            '3M': date(2025, 3, 31),  # 2025-03-30 is a Sunday
+            '1Y': date(2024, 7, 1),  # 2024-06-30 is a Sunday
+            '5Y': date(2020, 6, 30),
+        }
+        for label, period in CHART_PERIODS.items():
+            with self.subTest(label=label):
+                window = slice_period(bars, period, today=self.today)
+                self.assertEqual(window['date'].iloc[0].date(), expected_first[label])
+                self.assertEqual(window['date'].iloc[-1].date(), self.today)
+                self.assertEqual(len(window), len(pd.bdate_range(expected_first[label], self.today)))
+        with self.assertRaises(ValueError):
+            slice_period(bars, '2w', today=self.today)
+
+    def test_serialize_series(self):
+        bars = self.history().tail(2)
+        self.assertEqual(serialize_series(bars), [
+            {'date': '2025-06-27 00:00:00', 'price': float(bars['close'].iloc[0])},
+            {'date': '2025-06-30 00:00:00', 'price': float(bars['close'].iloc[1])},
+        ])
+
+
+class VectorizedBacktestTests(SyntheticMarketMixin, SimpleTestCase):
+    def test_trades_match_loop_engine(self):
+        for risk_level in ('LOW', 'HIGH'):
+            for flags in ((True, True, True, True), (True, False, False, True), (False, True, True, False)):
+                with self.subTest(risk_level=risk_level, flags=flags):
+                    bot = SweepBot(risk_level, Decimal('10000'), *flags)
+                    loop = run_quietly(HermesBotBacktester(bot, BACKTEST_START, BACKTEST_END).run_backtest)
+                    vectorized = run_quietly(VectorizedHermesBacktester(bot, BACKTEST_START, BACKTEST_END).run_backtest)
+                    self.assertGreater(loop['total_trades'], 0)
+                    # Trades go through the same Decimal code; only the float daily sums may differ in the last bits
+                    self.assertEqual(result_signature(vectorized)[:4], result_signature(loop)[:4])
+                    pd.testing.assert_frame_equal(daily_frame(vectorized), daily_frame(loop), check_exact=False, rtol=0, atol=1e-9)
+
+    def test_fixed_point_engine_within_tolerance(self):
+        def amounts(trade):
+            return [Decimal(str(trade.get(field) or 0)) for field in ('price', 'cost', 'proceeds', 'entry_price', 'profit_loss')]
+
+        for risk_level in ('LOW', 'MEDIUM', 'HIGH'):
+            for capital in (Decimal('1234.56'), Decimal('250000')):
+                with self.subTest(risk_level=risk_level, capital=capital):
+                    bot = SweepBot(risk_level, capital)
+                    decimal = run_quietly(VectorizedHermesBacktester(bot, BACKTEST_START, BACKTEST_END).run_backtest)
+                    fixed = run_quietly(FixedPointHermesBacktester(bot, BACKTEST_START, BACKTEST_END).run_backtest)
+
+                    key = lambda trade: (trade['date'], trade['symbol'], trade['action'], trade['quantity'], trade['reason'])
+                    self.assertEqual([key(trade) for trade in fixed['trades']], [key(trade) for trade in decimal['trades']])
+                    for fixed_trade, decimal_trade in zip(fixed['trades'], decimal['trades']):
+                        for fixed_amount, decimal_amount in zip(amounts(fixed_trade), amounts(decimal_trade)):
+                            self.assertLessEqual(abs(fixed_amount - decimal_amount), FIXED_POINT_TOLERANCE)
+                    self.assertLessEqual(
+                        abs(Decimal(str(fixed['final_value'])) - Decimal(str(decimal['final_value']))), FIXED_POINT_TOLERANCE
+                    )
+                    pd.testing.assert_frame_equal(
+                        daily_frame(fixed), daily_frame(decimal), check_exact=False, rtol=0, atol=float(FIXED_POINT_TOLERANCE)
+                    )
+
+    def test_cached_and_resumed_runs_match_fresh_run(self):
+        bot = SweepBot('HIGH', Decimal('10000'))
+        for engine in (HermesBotBacktester, VectorizedHermesBacktester):
+            with self.subTest(engine=engine.__name__):
+                fresh = result_signature(run_quietly(engine(bot, BACKTEST_START, BACKTEST_END).run_backtest))
+
+                run_quietly(run_cached, engine(bot, BACKTEST_START, BACKTEST_END))
+                cached = run_quietly(run_cached, engine(bot, BACKTEST_START, BACKTEST_END))
+                self.assertEqual(result_signature(cached), fresh)
+
+                # Interrupt the run after a checkpoint on day 100, then resume it
+                save_checkpoint = HermesBotBacktester.save_checkpoint
+
+                def interrupted(backtester, day_idx, trading_dates, engine_state=None):
+                    save_checkpoint(backtester, day_idx, trading_dates, engine_state)
+                    if day_idx == 100:
+                        raise KeyboardInterrupt
+
+                with override_settings(BACKTEST_CHECKPOINT_INTERVAL=0):
+                    with mock.patch.object(HermesBotBacktester, 'save_checkpoint', interrupted):
+                        with self.assertRaises(KeyboardInterrupt):
+                            run_quietly(run_cached, engine(bot, BACKTEST_START, BACKTEST_END), use_cache=False)
+                    output = io.StringIO()
+                    with contextlib.redirect_stdout(output):
+                        resumed = run_cached(engine(bot, BACKTEST_START, BACKTEST_END), use_cache=False, resume=True)
+                self.assertIn('Resuming', output.getvalue())
+                self.assertEqual(result_signature(resumed), fresh)
+
+
+
+class SweepGridTests(SimpleTestCase):
+    def test_parse_values(self):
+        stops = parse_values('0.05:0.15:0.01')
+        self.assertEqual(len(stops), 11)
+        self.assertEqual((stops[0], stops[-1]), (0.05, 0.15))
+        self.assertEqual(parse_values('0.05, 0.08,0.1'), [0.05, 0.08, 0.1])
+        self.assertEqual(parse_values('1:3:1', int), [1, 2, 3])
+        self.assertEqual(parse_toggle('0,1'), [False, True])
+        self.assertEqual(parse_toggle('true'), [True])
+
+    def test_malformed_values_are_rejected(self):
+        for spec in ('abc', '0.1:0.2', '0.1:x:0.01', '0.1:0.2:0', '0.2:0.1:0.01', ',', '1.5'):
+            with self.subTest(spec=spec):
+                with self.assertRaises(ValueError):
+                    parse_values(spec, int if spec == '1.5' else float)
+        for spec in ('maybe', '1,2', ''):
+            with self.subTest(spec=spec):
+                with self.assertRaises(ValueError):
+                    parse_toggle(spec)
+        with self.assertRaisesMessage(CommandError, "Invalid sweep values 'abc'"):
+            call_command('backtest_hermes', sweep=True, stop_loss='abc')
+        with self.assertRaisesMessage(CommandError, "Invalid toggle values 'maybe'"):
+            call_command('backtest_hermes', sweep=True, use_pivot='maybe')
+
+    def test_grid_is_the_cartesian_product(self):
+        grid = build_grid({
+            'use_pivot': [True, False],
+            'stop_loss': parse_values('0.05:0.07:0.01'),
+            'buy_threshold': [2, 3],
+            'take_profit': [0.1, 0.2],
+        })
+        self.assertEqual(len(grid), 3 * 2 * 2 * 2)
+        self.assertEqual(len({tuple(params.items()) for params in grid}), len(grid))
+        # Parameters are in SWEEP_PARAMS order, whatever order they were given in
+        self.assertEqual(list(grid[0]), ['stop_loss', 'take_profit', 'buy_threshold', 'use_pivot'])
+        self.assertEqual(build_grid({'stop_loss': [0.05]}), [{'stop_loss': 0.05}])
+
+
+class SweepRunTests(SyntheticMarketMixin, SimpleTestCase):
+    def test_sweep_points_match_standalone_runs(self):
+        config = AutoTradingEngine.RISK_CONFIG['HIGH']
+        grid = build_grid({
+            **{name: [float(config[name])] for name in RISK_PARAMS},
+            'buy_threshold': [2, 3],
+            'use_pivot': [True], 'use_prediction': [True, False], 'use_screener': [True], 'use_index_rebalancing': [True],
+        })
+        output_path = os.path.join(self.scratch, 'sweep.jsonl')
+        results = run_sweep(grid, 'HIGH', Decimal('10000'), BACKTEST_START, BACKTEST_END, output_path,
+                            workers=2, stdout=io.StringIO())
+        self.assertEqual(len(results), 4)
+        self.assertEqual([result['roi'] for result in results], sorted((result['roi'] for result in results), reverse=True))
+        with open(os.path.join(self.scratch, 'sweep.ranked.jsonl')) as ranked:
+            self.assertEqual([json.loads(line)['rank'] for line in ranked], [1, 2, 3, 4])
+
+        for result in results:
+            params = result['params']
+            with self.subTest(params=params):
+                bot = SweepBot('HIGH', Decimal('10000'), use_prediction=params['use_prediction'])
+                standalone = run_quietly(VectorizedHermesBacktester(
+                    bot, BACKTEST_START, BACKTEST_END,
+                    config={**config, **{name: Decimal(str(params[name])) for name in RISK_PARAMS}},
+                    buy_threshold=params['buy_threshold'],
+                ).run_backtest)
+                self.assertEqual(
+                    (result['final_value'], result['total_trades'], result['roi'], result['win_rate']),
+                    (standalone['final_value'], standalone['total_trades'], standalone['roi'], standalone['win_rate']),
+                )
+        # The default thresholds and toggles are the plain vectorized run
+        default = next(result for result in results if result['params']['buy_threshold'] == 2 and result['params']['use_prediction'])
+        plain = run_quietly(VectorizedHermesBacktester(SweepBot('HIGH', Decimal('10000')), BACKTEST_START, BACKTEST_END).run_backtest)
+        self.assertGreater(default['total_trades'], 0)
+        self.assertEqual(default['final_value'], plain['final_value'])
+
+
+def scalar_clean_energy_trades(frame, symbol):
+    """The clean energy backtest's original row-by-row loop, as the reference for symbol_trades"""
+    pivot, predictor = PivotStrategy(), NextDayPredictor()
+    rows = []
+    for i in range(len(frame) - 1):
+        hi, lo, cl = frame.loc[i, ['high', 'low', 'close']]
+        o_n, h_n, l_n, c_n = frame.loc[i + 1, ['open', 'high', 'low', 'close']]
+        signal = pivot.predict(hi, lo, cl)['signal']
+        if predictor.predict(symbol, frame.loc[i, 'open'], hi, lo, cl, int(frame.loc[i, 'volume']))['prediction'] == 'DOWN':
+            continue
+        if signal in ('BUY', 'STRONG_BUY', 'HOLD_BULLISH'):
+            entry = float(o_n)
+            tp, sl = entry * 1.04, entry * 0.97
+            if float(h_n) >= tp:
+                exit_px, outcome = tp, 'TP'
+            elif float(l_n) <= sl:
+                exit_px, outcome = sl, 'SL'
+            else:
+                exit_px, outcome = float(c_n), 'EOD'
+            rows.append({
+                'symbol': symbol,
+                'trade_date': str(frame.loc[i + 1, 'date'].date()),
+                'entry': round(entry, 4),
+                'exit': round(exit_px, 4),
+                'ret_pct': round((exit_px - entry) / entry * 100, 3),
+                'outcome': outcome,
+            })
+    return rows
+
+
+class CleanEnergyBacktestTests(SimpleTestCase):
+    def test_symbol_trades_match_row_by_row_loop(self):
+        dates = pd.bdate_range('2024-01-01', periods=300)
+        bars = generate_bars(3, dates, seed=5)
+        with tempfile.TemporaryDirectory() as price_dir:
+            for col, symbol in enumerate(('AAA', 'BBB', 'CCC')):
+                frame = pd.DataFrame({'date': dates, **{name: bars[name][:, col] for name in BAR_COLUMNS[1:]}})
+                frame.to_csv(os.path.join(price_dir, f"{symbol}.csv"), index=False, date_format='%Y-%m-%d')
+
+                trades = symbol_trades(symbol, price_dir, '2024-01-01', '2025-12-31')
+                expected = scalar_clean_energy_trades(pd.read_csv(os.path.join(price_dir, f"{symbol}.csv"), parse_dates=['date']), symbol)
+                self.assertGreater(len(expected), 0)
+                self.assertEqual(trades.to_dict('records'), expected)
+
+
+def random_bars(count, seed):
+    """Prices on a cent grid (so roundings land on .5 ties) with some flat, gapped and inverted bars"""
+    rng = np.random.default_rng(seed)
+    close = np.round(rng.uniform(1, 500, count), 2)
+    open_price = np.round(close * rng.uniform(0.9, 1.1, count), 2)
+    high = np.round(np.maximum(open_price, close) * rng.uniform(1.0, 1.08, count), 2)
+    low = np.round(np.minimum(open_price, close) * rng.uniform(0.92, 1.0, count), 2)
+    open_price[::17] = close[::17]
+    high[::23], low[::23] = low[::23], high[::23]
+    return open_price, high, low, close
+
+
+class BatchPredictorTests(SimpleTestCase):
+    def test_pivot_batch_matches_predict(self):
+        strategy = PivotStrategy()
+        _, high, low, close = random_bars(5000, seed=1)
+        batch = strategy.predict_batch(high, low, close)
+        for i in range(len(close)):
+            expected = strategy.predict(float(high[i]), float(low[i]), float(close[i]))
+            self.assertEqual(PIVOT_SIGNALS[batch['signal'][i]], expected['signal'])
+            self.assertEqual({level: float(batch[level][i]) for level in PIVOT_LEVELS}, expected['pivot_points'])
+
+    def test_prediction_batch_matches_predict(self):
+        predictor = NextDayPredictor()
+        open_price, high, low, close = random_bars(5000, seed=2)
+        open_price[::101] = 0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            batch = predictor.predict_batch(open_price, high, low, close)
+        for i in range(len(close)):
+            if open_price[i] == 0:
+                self.assertFalse(batch['valid'][i])
+                continue
+            expected = predictor.predict('T', float(open_price[i]), float(high[i]), float(low[i]), float(close[i]), 1000)
+            self.assertTrue(batch['valid'][i])
+            self.assertEqual(PREDICTIONS[batch['prediction'][i]], expected['prediction'])
+            for field in ('confidence', 'price_change_today', 'volatility'):
+                self.assertEqual(float(batch[field][i]), expected[field])
+
+
+
+@override_settings(ML_BATCH_CHUNK_SIZE=4, ML_BATCH_MAX_ITEMS=20)
+class MLBatchEndpointTests(SimpleTestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def single(self, path, item):
+        return json.loads(self.client.post(path, item, format='json').content)
+
+    def stream(self, path, body):
+        response = self.client.post(path, body, format='json')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        chunks = [chunk.decode() for chunk in response.streaming_content]
+        return chunks, [json.loads(line) for line in ''.join(chunks).splitlines()]
+
+    def test_ndjson_streams_items_in_order_with_per_item_errors(self):
+        _, high, low, close = random_bars(10, seed=6)
+        items = [{'high': float(h), 'low': float(l), 'close': float(c)} for h, l, c in zip(high, low, close)]
+        items[3]['high'] = 'abc'
+        items[7] = 'not an object'
+
+        chunks, lines = self.stream('/api/ml/pivot/batch/', {'items': items})
+        self.assertEqual(len(chunks), 3)
+        self.assertEqual([line['item'] for line in lines], list(range(10)))
+        self.assertIn('could not convert', lines[3]['error'])
+        self.assertEqual(lines[7]['error'], 'Item must be an object')
+        for index in (0, 4, 9):
+            self.assertEqual(lines[index]['result'], self.single('/api/ml/pivot/', items[index]))
+
+    def test_columns_output_for_columnar_body(self):
+        open_price, high, low, close = random_bars(6, seed=7)
+        open_price[2] = 0
+        columns = {
+            'stock_symbol': ['T'] * 6, 'open_price': open_price.tolist(), 'high': high.tolist(),
+            'low': low.tolist(), 'close': close.tolist(), 'volume': [1000, 2000, 3000, 'many', 5000, 6000],
+        }
+        response = self.client.post('/api/ml/predict/batch/?output=columns', {'columns': columns}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 6)
+        self.assertEqual([error['item'] for error in response.data['errors']], [2, 3])
+        for index in range(6):
+            prediction = response.data['columns']['prediction'][index]
+            if index in (2, 3):
+                self.assertIsNone(prediction)
+                continue
+            item = {field: values[index] for field, values in columns.items()}
+            expected = self.single('/api/ml/predict/', item)
+            self.assertEqual({field: values[index] for field, values in response.data['columns'].items()}, expected)
+
+    def test_bare_list_runs_item_by_item(self):
+        items = [
+            {'market_cap': 15000000000, 'volume': 1200000, 'sector': 'Technology'},
+            {'volume': 1200000},
+            {'market_cap': 2000000000, 'volume': 100000, 'sector': 'Energy'},
+        ]
+        _, lines = self.stream('/api/ml/screener/batch/', items)
+        self.assertIn('error', lines[1])
+        for index in (0, 2):
+            self.assertEqual(lines[index]['result'], self.single('/api/ml/screener/', items[index]))
+
+    def test_rejects_malformed_and_oversized_batches(self):
+        item = {'high': 150.0, 'low': 145.0, 'close': 148.0}
+        for body, query in (
+            ({'items': 'abc'}, ''),
+            ({'columns': {'high': [1.0, 2.0], 'low': [1.0]}}, ''),
+            ({'items': [item] * 21}, ''),
+            ({'items': [item]}, '?output=xml'),
+        ):
+            with self.subTest(body=str(body)[:40], query=query):
+                response = self.client.post(f"/api/ml/pivot/batch/{query}", body, format='json')
+                self.assertEqual(response.status_code, 400)
+
+
+@override_settings(BACKTEST_RUN_TIMEOUT=3600)
+class BacktestWorkerTests(SyntheticMarketMixin, TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='worker@example.com', username='worker', name='Worker', password='x')
+        self.bot = AutoTradingBot.objects.create(
+            user=self.user, name='Herm_HIGH', risk_level='HIGH', initial_capital=Decimal('10000'),
+        )
+
+    def create_run(self, status, started_minutes_ago=None):
+        started_at = timezone.now() - timedelta(minutes=started_minutes_ago) if started_minutes_ago is not None else None
+        return BacktestRun.objects.create(
+            user=self.user, bot=self.bot, engine='vectorized', status=status,
+            start_date=BACKTEST_START, end_date=BACKTEST_END, started_at=started_at,
+        )
+
+    def test_stalled_runs_are_reclaimed_before_queued_ones(self):
+        self.create_run('RUNNING', started_minutes_ago=5)
+        queued = self.create_run('QUEUED')
+        stalled = self.create_run('RUNNING', started_minutes_ago=120)
+
+        run = claim_next_run()
+        self.assertEqual(run.id, stalled.id)
+        self.assertTrue(run.resumed)
+        self.assertGreater(run.started_at, timezone.now() - timedelta(minutes=1))
+        # Claimed again just now, so no other worker takes it over
+        run = claim_next_run()
+        self.assertEqual(run.id, queued.id)
+        self.assertFalse(run.resumed)
+        self.assertIsNone(claim_next_run())
+
+    def test_reclaimed_run_replaces_partial_results(self):
+        stalled = self.create_run('RUNNING', started_minutes_ago=120)
+        BacktestTrade.objects.create(
+            run=stalled, seq=1, date=BACKTEST_START, symbol='TSLA', action='BUY', quantity=1, price=Decimal('1'),
+        )
+
+        run = claim_next_run()
+        run_quietly(execute_run, run, use_cache=False, resume=run.resumed)
+        run.refresh_from_db()
+        self.assertEqual(run.status, 'COMPLETED')
+        self.assertGreater(run.total_trades, 0)
+        expected = run_quietly(
+            VectorizedHermesBacktester(SweepBot('HIGH', Decimal('10000')), BACKTEST_START, BACKTEST_END).run_backtest
+        )
+        self.assertEqual(
+            list(run.trades.order_by('seq').values_list('date', 'symbol', 'action', 'quantity')),
+            [(trade['date'], trade['symbol'], trade['action'], trade['quantity']) for trade in expected['trades']],
+        )
+
+
+
+class BacktestRunApiTests(SyntheticMarketMixin, TestCase):
+    def setUp(self):
+        self.user, self.other = (
+            User.objects.create_user(email=f"{name}@example.com", username=name, name=name, password='x')
+            for name in ('owner', 'other')
+        )
+        self.bot = AutoTradingBot.objects.create(
+            user=self.user, name='Herm_HIGH', risk_level='HIGH', initial_capital=Decimal('10000'),
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create_and_execute(self):
+        response = self.client.post('/api/backtests/create/', {
+            'bot_id': self.bot.id, 'engine': 'vectorized',
+            'start_date': str(BACKTEST_START), 'end_date': str(BACKTEST_END),
+        }, format='json')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['status'], 'QUEUED')
+        run = claim_next_run()
+        self.assertEqual(run.id, response.data['run_id'])
+        run_quietly(execute_run, run, use_cache=False)
+        return run
+
+    def test_trades_pages_cover_every_trade_once(self):
+        run = self.create_and_execute()
+        response = self.client.get(f"/api/backtests/{run.id}/")
+        self.assertEqual(response.data['status'], 'COMPLETED')
+        self.assertGreater(response.data['total_trades'], 7)
+
+        seqs, cursor = [], 0
+        while cursor is not None:
+            page = self.client.get(f"/api/backtests/{run.id}/trades/?limit=3&cursor={cursor}").data
+            self.assertLessEqual(page['count'], 3)
+            seqs.extend(trade['seq'] for trade in page['trades'])
+            cursor = page['next_cursor']
+        self.assertEqual(seqs, list(run.trades.order_by('seq').values_list('seq', flat=True)))
+        self.assertEqual(len(seqs), len(set(seqs)))
+
+        equity = self.client.get(f"/api/backtests/{run.id}/equity/").data
+        self.assertEqual(len(equity['dates']), run.equity.count())
+        self.assertEqual(list(equity['dates']), sorted(equity['dates']))
+        self.assertEqual(equity['total_value'][-1], float(run.equity.order_by('date').last().total_value))
+
+    def test_other_users_runs_are_not_found(self):
+        run = self.create_and_execute()
+        self.client.force_authenticate(self.other)
+        for path in ('', 'trades/', 'equity/'):
+            with self.subTest(path=path):
+                self.assertEqual(self.client.get(f"/api/backtests/{run.id}/{path}").status_code, 404)
+        self.assertEqual(self.client.get('/api/backtests/list/').data['count'], 0)
+
+    def test_list_filters_by_bot(self):
+        run = self.create_and_execute()
+        response = self.client.get(f"/api/backtests/list/?bot_id={self.bot.id}")
+        self.assertEqual([row['run_id'] for row in response.data['runs']], [run.id])
+        self.assertEqual(self.client.get('/api/backtests/list/?bot_id=abc').status_code, 400)
+
+
+
+class BatchBacktestTests(SyntheticMarketMixin, TestCase):
+    def setUp(self):
+        user = User.objects.create_user(email='backtest@test.com', username='backtest_user', name='Backtest User', password='x')
+        self.bots = [
+            AutoTradingBot.objects.create(
+                user=user, name=f"Herm_{risk_level}_{i}", risk_level=risk_level, initial_capital=capital,
+                use_prediction=use_prediction,
+            )
+            for i, (risk_level, capital, use_prediction) in enumerate((
+                ('LOW', Decimal('5000'), True),
+                ('LOW', Decimal('12000'), True),
+                ('HIGH', Decimal('10000'), True),
+                ('HIGH', Decimal('10000'), False),
+            ))
+        ]
+        # A fresh bar store, so every bar is downloaded through the counting provider
+        self.provider = CountingReplayProvider(os.path.join(self.scratch, 'replay'))
+        self.addCleanup(setattr, providers, '_default_provider', providers._default_provider)
+        set_provider(self.provider)
+        settings_override = override_settings(BAR_STORE_DIR=tempfile.mkdtemp(dir=self.scratch))
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_batch_matches_individual_runs(self):
+        with mock.patch.object(AutoTradingBot.objects, 'bulk_update', wraps=AutoTradingBot.objects.bulk_update) as bulk_update:
+            logged = []
+            results = run_batch(self.bots, BACKTEST_START, BACKTEST_END, log=logged.append)
+        bulk_update.assert_called_once()
+        # The two LOW bots share their scoring pass
+        self.assertIn('(3 distinct signal sets)', logged[-1])
+        self.assertEqual(set(results), {bot.id for bot in self.bots})
+
+        watchlists = {symbol for bot in self.bots for symbol in AutoTradingEngine.RISK_CONFIG[bot.risk_level]['stocks']}
+        self.assertEqual(sorted(self.provider.symbols), sorted(watchlists))
+
+        for bot in self.bots:
+            with self.subTest(bot=bot.name):
+                bot.refresh_from_db()
+                written = [getattr(bot, field) for field in
+                           ('current_capital', 'total_profit_loss', 'total_trades', 'winning_trades', 'losing_trades')]
+                individual = run_quietly(
+                    run_backtest_for_bot, bot_id=bot.id, start_date=BACKTEST_START, end_date=BACKTEST_END,
+                    backtester_class=VectorizedHermesBacktester, use_cache=False,
+                )
+                self.assertGreater(individual['total_trades'], 0)
+                self.assertEqual(result_signature(results[bot.id])[:4], result_signature(individual)[:4])
+                bot.refresh_from_db()
+                self.assertEqual(
+                    written,
+                    [getattr(bot, field) for field in
+                     ('current_capital', 'total_profit_loss', 'total_trades', 'winning_trades', 'losing_trades')],
+                )
+
+
+class IndexEventsTests(SimpleTestCase):
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        start = date(2015, 1, 1)
+        rows = []
+        for i in range(2000):
+            announced = start + timedelta(days=int(rng.integers(0, 3650)))
+            rows.append(('SP500' if i % 3 else 'NDX', f"S{i % 150:03d}", 'ADD' if i % 2 else 'DELETE',
+                         announced, announced + timedelta(days=int(rng.integers(0, 30)))))
+        # One event active for decades must not slow down or break the other lookups
+        rows.append(('SP500', 'S000', 'ADD', date(1990, 1, 1), date(2040, 1, 1)))
+        self.events = IndexEvents(rows, trailing_days=10)
+
+    def brute_force(self, first, last, symbols=None):
+        return sorted((
+            event for event in self.events.events
+            if event.announcement_date <= last and event.end_date >= first
+            and (symbols is None or event.symbol in symbols)
+        ), key=event_order)
+
+    def test_lookups_match_brute_force(self):
+        rng = np.random.default_rng(4)
+        for _ in range(300):
+            first = date(2014, 6, 1) + timedelta(days=int(rng.integers(0, 4000)))
+            last = first + timedelta(days=int(rng.integers(0, 60)))
+            symbol = f"S{int(rng.integers(0, 160)):03d}"
+            self.assertEqual(self.events.active(symbol, first), self.brute_force(first, first, {symbol}))
+            self.assertEqual(self.events.window(first, last), self.brute_force(first, last))
+            self.assertEqual(self.events.window(first, last, [symbol, 'S001']), self.brute_force(first, last, {symbol, 'S001'}))
+
+    def test_point_lookup_reads_only_overlapping_spans(self):
+        tree = IntervalTree(self.events.events)
+        day = date(2020, 6, 1)
+        visited = []
+        nodes = [tree.root]
+        while nodes:
+            node = nodes.pop()
+            if node is not None:
+                visited.append(node)
+                nodes.append(node[3] if day < node[0] else node[4] if day > node[0] else None)
+        # One root-to-leaf path, whatever the longest span
+        self.assertLess(len(visited), 40)
+        self.assertEqual(sorted(tree.overlapping(day, day), key=event_order), self.brute_force(day, day))
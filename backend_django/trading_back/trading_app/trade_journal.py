@@ -0,0 +1,258 @@
+"""
+Columnar trade journal and equity curve for backtests
+Trades are rows of a NumPy structured array: dates as datetime64, symbols
+and signal combinations as ids into interned tables, actions and reasons as
+small integer codes. Human-readable reasons are only formatted when a trade
+is read back (report printing, DB export), so a multi-year, many-symbol
+backtest stores tens of bytes per trade instead of a dict of Decimals and
+strings.
+"""
+
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+
+
+ACTIONS = ['BUY', 'SELL']
+BUY, SELL = 0, 1
+
+# Reason codes: the signals that opened a trade, the exit rule that closed it, or free text
+REASON_SIGNALS, REASON_STOP_LOSS, REASON_TAKE_PROFIT, REASON_END, REASON_TEXT = range(5)
+END_OF_BACKTEST = 'End of backtest'
+
+TRADE_DTYPE = np.dtype([
+    ('date', 'datetime64[D]'),
+    ('symbol', np.int32),
+    ('action', np.int8),
+    ('reason', np.int8),
+    ('detail', np.int32),  # signals / text id for REASON_SIGNALS and REASON_TEXT
+    ('quantity', np.int64),
+    ('price', np.float64),
+    ('amount', np.float64),  # cost of a buy, proceeds of a sell
+    ('entry_price', np.float64),
+    ('profit_loss', np.float64),
+])
+
+EQUITY_DTYPE = np.dtype([
+    ('date', 'datetime64[D]'),
+    ('cash', np.float64),
+    ('positions_value', np.float64),
+])
+
+INITIAL_CAPACITY = 256
+
+
+def as_decimal(value):
+    """Decimal of a stored float, exact to its shortest repr (the value the engines recorded)"""
+    return Decimal(repr(float(value)))
+
+
+class _Interned:
+    """Table of distinct values addressed by small integer ids"""
+
+    def __init__(self):
+        self.values = []
+        self._ids = {}
+
+    def id_for(self, value):
+        value_id = self._ids.get(value)
+        if value_id is None:
+            value_id = self._ids[value] = len(self.values)
+            self.values.append(value)
+        return value_id
+
+    def __getstate__(self):
+        return self.values
+
+    def __setstate__(self, values):
+        self.values = values
+        self._ids = {value: value_id for value_id, value in enumerate(values)}
+
+
+class _GrowableRecords:
+    """Structured array that doubles its capacity as rows are appended"""
+
+    dtype = None
+
+    def __init__(self, capacity=INITIAL_CAPACITY):
+        self._rows = np.empty(capacity, dtype=self.dtype)
+        self._size = 0
+        self._dates = {}
+
+    def _day(self, date):
+        """datetime64 of a date; converting date objects is the slowest part of appending, so it is memoized"""
+        day = self._dates.get(date)
+        if day is None:
+            day = self._dates[date] = np.datetime64(date, 'D')
+        return day
+
+    def _append(self, values):
+        """Append one row given as a tuple in dtype field order"""
+        if self._size == len(self._rows):
+            rows = np.empty(max(2 * len(self._rows), INITIAL_CAPACITY), dtype=self.dtype)
+            rows[:self._size] = self._rows[:self._size]
+            self._rows = rows
+        self._rows[self._size] = values
+        self._size += 1
+
+    @property
+    def records(self):
+        """The filled rows as a structured array (a view, no copy)"""
+        return self._rows[:self._size]
+
+    @property
+    def nbytes(self):
+        return self.records.nbytes
+
+    def __len__(self):
+        return self._size
+
+    def __bool__(self):
+        return self._size > 0
+
+    def __iter__(self):
+        for index in range(self._size):
+            yield self.row(index)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.row(i) for i in range(*index.indices(self._size))]
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError(index)
+        return self.row(index)
+
+    def __getstate__(self):
+        state = {k: v for k, v in self.__dict__.items() if k not in ('_rows', '_size', '_dates')}
+        return {'rows': self.records.copy(), **state}
+
+    def __setstate__(self, state):
+        rows = state.pop('rows')
+        self.__dict__.update(state)
+        self._rows = rows
+        self._size = len(rows)
+        self._dates = {}
+
+
+class TradeJournal(_GrowableRecords):
+    """
+    Trades of one backtest. Reading a trade (iteration, indexing, slicing)
+    returns the dict layout of HermesBotBacktester: date, symbol, action,
+    quantity, price, cost (buys) or proceeds / entry_price / profit_loss
+    (sells) as Decimals, and a formatted reason.
+    """
+
+    dtype = TRADE_DTYPE
+
+    def __init__(self, capacity=INITIAL_CAPACITY):
+        super().__init__(capacity)
+        self.symbols = _Interned()
+        self.details = _Interned()
+
+    def _reason_code(self, reason):
+        """
+        reason is a tuple of (strategy, signal) pairs, REASON_STOP_LOSS,
+        REASON_TAKE_PROFIT, REASON_END or any other text
+        """
+        if isinstance(reason, tuple):
+            return REASON_SIGNALS, self.details.id_for(reason)
+        if isinstance(reason, int):
+            return reason, -1
+        return REASON_TEXT, self.details.id_for(str(reason))
+
+    def record_buy(self, date, symbol, quantity, price, cost, reason):
+        self._append((self._day(date), self.symbols.id_for(symbol), BUY, *self._reason_code(reason),
+                      quantity, price, cost, price, 0.0))
+
+    def record_sell(self, date, symbol, quantity, price, proceeds, entry_price, profit_loss, reason):
+        self._append((self._day(date), self.symbols.id_for(symbol), SELL, *self._reason_code(reason),
+                      quantity, price, proceeds, entry_price, profit_loss))
+
+    def format_reason(self, row):
+        reason = row['reason']
+        if reason == REASON_SIGNALS:
+            signals = self.details.values[row['detail']]
+            return f"ML Signals: {', '.join(f'{name}({signal})' for name, signal in signals)}"
+        if reason == REASON_TEXT:
+            return self.details.values[row['detail']]
+        if reason == REASON_END:
+            return END_OF_BACKTEST
+        price, entry_price = as_decimal(row['price']), as_decimal(row['entry_price'])
+        pnl_pct = ((price - entry_price) / entry_price) * 100
+        if reason == REASON_STOP_LOSS:
+            return f'Stop Loss triggered ({pnl_pct:.2f}%)'
+        return f'Take Profit triggered ({pnl_pct:.2f}%)'
+
+    def row(self, index):
+        row = self._rows[index]
+        trade = {
+            'date': row['date'].item(),
+            'symbol': self.symbols.values[row['symbol']],
+            'action': ACTIONS[row['action']],
+            'quantity': int(row['quantity']),
+            'price': as_decimal(row['price']),
+        }
+        if row['action'] == BUY:
+            trade['cost'] = as_decimal(row['amount'])
+        else:
+            trade['proceeds'] = as_decimal(row['amount'])
+            trade['entry_price'] = as_decimal(row['entry_price'])
+            trade['profit_loss'] = as_decimal(row['profit_loss'])
+        trade['reason'] = self.format_reason(row)
+        return trade
+
+    def to_frame(self):
+        """All trades as a DataFrame with formatted reasons, for exports"""
+        records = self.records
+        symbols = np.array(self.symbols.values, dtype=object)
+        return pd.DataFrame({
+            'date': records['date'],
+            'symbol': symbols[records['symbol']] if len(records) else [],
+            'action': np.array(ACTIONS, dtype=object)[records['action']],
+            'quantity': records['quantity'],
+            'price': records['price'],
+            'amount': records['amount'],
+            'entry_price': records['entry_price'],
+            'profit_loss': records['profit_loss'],
+            'reason': [self.format_reason(row) for row in records],
+        })
+
+
+class EquityCurve(_GrowableRecords):
+    """
+    Daily cash and positions value of one backtest. Reading a day returns
+    {'date', 'cash', 'positions_value', 'total_value'} with float values.
+    """
+
+    dtype = EQUITY_DTYPE
+
+    @classmethod
+    def from_arrays(cls, dates, cash, positions_value):
+        curve = cls(capacity=max(len(dates), 1))
+        rows = curve._rows[:len(dates)]
+        rows['date'] = np.array(dates, dtype='datetime64[D]')
+        rows['cash'] = cash
+        rows['positions_value'] = positions_value
+        curve._size = len(dates)
+        return curve
+
+    def append(self, date, cash, positions_value):
+        self._append((self._day(date), cash, positions_value))
+
+    @property
+    def total_value(self):
+        records = self.records
+        return records['cash'] + records['positions_value']
+
+    def row(self, index):
+        row = self._rows[index]
+        cash = float(row['cash'])
+        positions_value = float(row['positions_value'])
+        return {
+            'date': row['date'].item(),
+            'cash': cash,
+            'positions_value': positions_value,
+            'total_value': cash + positions_value,
+        }
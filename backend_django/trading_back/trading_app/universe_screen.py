@@ -0,0 +1,58 @@
+"""
+Universe Screen
+StockScreener over the whole screener universe: one fundamentals table
+fetched from the market data provider, scored in a single vectorized pass
+and cached for the trading day, so market-wide queries never fan out into
+per-ticker requests.
+"""
+
+from datetime import date, timedelta
+
+import pandas as pd
+from django.conf import settings
+
+from .auto_trading_engine import AutoTradingEngine
+from .market_data.providers import get_provider
+from .market_data.quote_cache import quote_cache
+from .ml_models.stock_screener import StockScreener
+
+
+screener = StockScreener()
+
+
+def trading_day(day=None):
+    """day (default today), with weekends rolled back to the preceding Friday"""
+    day = day or date.today()
+    return day - timedelta(days=max(day.weekday() - 4, 0))
+
+
+def universe_symbols():
+    """Symbols listed in SCREENER_UNIVERSE, or None when it is not set"""
+    if not settings.SCREENER_UNIVERSE:
+        return None
+    symbols = pd.read_csv(settings.SCREENER_UNIVERSE)['symbol'].dropna().astype(str).str.strip().str.upper()
+    return list(dict.fromkeys(symbols))
+
+
+def watchlist_symbols():
+    """Every symbol in a Hermes bot watchlist"""
+    return sorted({symbol for config in AutoTradingEngine.RISK_CONFIG.values() for symbol in config['stocks']})
+
+
+def fetch_universe_screen():
+    provider = get_provider()
+    symbols = universe_symbols()
+    table = provider.get_fundamentals_table(symbols)
+    if symbols is None and table.empty:
+        # The provider has no local universe (yfinance): screen the bot watchlists
+        table = provider.get_fundamentals_table(watchlist_symbols())
+    return screener.screen_universe(table)
+
+
+def get_universe_screen():
+    """The UniverseScreen of the current trading day, computed at most once per day and provider"""
+    return quote_cache.get(
+        ('universe_screen', get_provider().name, trading_day()),
+        fetch_universe_screen,
+        settings.QUOTE_CACHE_TTLS['screener'],
+    )
@@ -30,4 +30,21 @@ urlpatterns += [
     path('herm/create/', herm_trades.create_herm_bot, name='create_herm_bot'),
     path('herm/<int:bot_id>/status/', herm_trades.get_herm_bot_status, name='herm_bot_status'),
     path('herm/list/', herm_trades.list_herm_bots, name='list_herm_bots'),
+    path('herm/simulate/', herm_trades.simulate_herm_bot, name='simulate_herm_bot'),
+]
+
+# Persisted backtest runs (executed by the run_backtests worker)
+from . import backtest_runs
+urlpatterns += [
+    path('backtests/create/', backtest_runs.create_backtest_run, name='create_backtest_run'),
+    path('backtests/list/', backtest_runs.list_backtest_runs, name='list_backtest_runs'),
+    path('backtests/<int:run_id>/', backtest_runs.get_backtest_run, name='backtest_run'),
+    path('backtests/<int:run_id>/trades/', backtest_runs.list_backtest_trades, name='backtest_run_trades'),
+    path('backtests/<int:run_id>/equity/', backtest_runs.get_backtest_equity, name='backtest_run_equity'),
+]
+
+# Live price/holding/signal stream (Server-Sent Events, served via ASGI)
+from . import streams
+urlpatterns += [
+    path('stream/', streams.price_stream, name='price_stream'),
 ]
@@ -2,12 +2,16 @@ from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.authtoken.models import Token
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
+from django.conf import settings
 from django.contrib.auth import authenticate
 from django.db.models import Sum, Count
 from decimal import Decimal, ROUND_HALF_UP
-import yfinance as yf
 from .models import User, Transaction, Holding, Signal
+from .market_data.providers import get_provider
+from .market_data.quote_cache import quote_cache
+from .market_data.quotes import CHART_PERIODS, get_chart, get_quote
+from .market_data.price_refresh import refresh_holding_prices
 from .serializers import (
     UserSerializer, UserRegistrationSerializer, UserLoginSerializer,
     TransactionSerializer, TransactionCreateSerializer,
@@ -257,59 +261,30 @@ class HoldingViewSet(viewsets.ModelViewSet):
         Refresh current prices for all user holdings
         POST /api/holdings/refresh_prices/
         """
-        import yfinance as yf
-        
         user = request.user
         holdings = Holding.objects.filter(user=user)
+        old_prices = dict(holdings.values_list('id', 'current_price'))
+        symbols = list(holdings.values_list('stock', flat=True))
         
-        if not holdings.exists():
+        if not symbols:
             return Response({
                 'message': 'No holdings to refresh'
             }, status=status.HTTP_200_OK)
         
-        updated_count = 0
-        errors = []
+        # One bulk download for all distinct symbols; also refreshes other users' holdings
+        prices, failed = refresh_holding_prices(symbols)
         
-        for holding in holdings:
-            try:
-                print(f"Fetching price for {holding.stock}...")
-                stock = yf.Ticker(holding.stock)
-                
-                # Get live price using fast_info (works during market hours)
-                try:
-                    current_price = stock.fast_info.get('lastPrice')
-                    if not current_price or current_price == 0:
-                        # Fallback to info
-                        current_price = stock.info.get('currentPrice') or stock.info.get('regularMarketPrice')
-                    print(f"{holding.stock}: Live price = {current_price}")
-                except:
-                    # If live fails, use yesterday's close as fallback
-                    hist = stock.history(period='1d')
-                    if not hist.empty:
-                        current_price = float(hist['Close'].iloc[-1])
-                        print(f"{holding.stock}: Using history close = {current_price}")
-                    else:
-                        current_price = None
-                        print(f"{holding.stock}: No price available")
-                
-                print(f"{holding.stock}: current_price = {current_price}, old price = {holding.current_price}")
-                
-                if current_price:
-                    holding.current_price = Decimal(str(current_price))
-                    holding.save()
-                    print(f"Saved {holding.stock} with new price {holding.current_price}")
-                    updated_count += 1
-                else:
-                    print(f"No price found for {holding.stock}")
-                    errors.append(f"Could not fetch price for {holding.stock}")
-            except Exception as e:
-                print(f"Error for {holding.stock}: {e}")
-                errors.append(f"Error updating {holding.stock}: {str(e)}")
+        # Holdings whose price actually changed, not every holding that has a price
+        updated_count = sum(
+            1 for holding_id, price in holdings.values_list('id', 'current_price')
+            if old_prices.get(holding_id) != price
+        )
+        errors = [f"Could not fetch price for {symbol}" for symbol in failed]
         
         return Response({
             'message': f'Updated {updated_count} holdings',
             'updated_count': updated_count,
-            'total_holdings': holdings.count(),
+            'total_holdings': len(symbols),
             'errors': errors if errors else None
         }, status=status.HTTP_200_OK)
 
@@ -615,10 +590,11 @@ class TradingViewSet(viewsets.ViewSet):
     @action(detail=False, methods=['post'])
     def get_stock_price(self, request):
         """
-        Get real-time stock price and historical data using yfinance
+        Get real-time stock price and historical data from the market data provider
         POST /api/trading/get_stock_price/
         Body: {
-            "stock": "AAPL"
+            "stock": "AAPL",
+            "max_points": 500  (optional point budget per chart period)
         }
         """
         stock_symbol = request.data.get('stock', '').upper().strip()
@@ -630,12 +606,18 @@ class TradingViewSet(viewsets.ViewSet):
             )
         
         try:
-            # Fetch stock data from yfinance
-            stock = yf.Ticker(stock_symbol)
-            info = stock.info
-            
-            # Get current price
-            current_price = info.get('currentPrice') or info.get('regularMarketPrice')
+            max_points = int(request.data.get('max_points', settings.CHART_MAX_POINTS))
+        except (TypeError, ValueError):
+            return Response(
+                {'error': 'max_points must be an integer'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        max_points = min(max(max_points, 10), 5000)
+        
+        try:
+            # Quote and charts are served from the process-wide TTL cache
+            quote = get_quote(stock_symbol)
+            current_price = quote['current_price']
             
             if not current_price:
                 return Response(
@@ -643,38 +625,22 @@ class TradingViewSet(viewsets.ViewSet):
                     status=status.HTTP_404_NOT_FOUND
                 )
             
-            # Fetch historical data for different periods
+            # Historical data for different periods
             historical_data = {}
-            periods = {
-                '1D': '1d',
-                '1W': '5d',
-                '1M': '1mo',
-                '3M': '3mo',
-                '1Y': '1y',
-                '5Y': '5y'
-            }
-            
-            for label, period in periods.items():
+            for label in CHART_PERIODS:
                 try:
-                    hist = stock.history(period=period)
-                    if not hist.empty:
-                        # Convert to list of {date, price} objects
-                        historical_data[label] = [
-                            {
-                                'date': index.strftime('%Y-%m-%d %H:%M:%S'),
-                                'price': float(row['Close'])
-                            }
-                            for index, row in hist.iterrows()
-                        ]
+                    series = get_chart(stock_symbol, label, max_points)
+                    if series:
+                        historical_data[label] = series
                 except Exception as e:
                     print(f"Error fetching {label} data: {str(e)}")
                     historical_data[label] = []
             
             return Response({
                 'symbol': stock_symbol,
-                'name': info.get('longName', stock_symbol),
+                'name': quote['name'],
                 'current_price': float(current_price),
-                'currency': info.get('currency', 'USD'),
+                'currency': quote['currency'],
                 'historical_data': historical_data
             }, status=status.HTTP_200_OK)
             
@@ -683,7 +649,20 @@ class TradingViewSet(viewsets.ViewSet):
                 {'error': f'Error fetching stock data: {str(e)}'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
-        
+    
+    @action(detail=False, methods=['get'], permission_classes=[IsAdminUser])
+    def market_data_stats(self, request):
+        """
+        Upstream fetch coalescing and quote cache metrics (staff only)
+        GET /api/trading/market_data_stats/
+        """
+        provider = get_provider()
+        return Response({
+            'provider': provider.name,
+            'single_flight': dict(provider.flight.stats, in_flight=provider.flight.in_flight()),
+            'quote_cache': dict(quote_cache.stats),
+        }, status=status.HTTP_200_OK)
+    
 class PortfolioSnapshotViewSet(viewsets.ViewSet):
     """
     ViewSet for portfolio performance tracking
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -165,3 +166,107 @@ CORS_ALLOW_HEADERS = [
     'x-csrftoken',
     'x-requested-with',
 ]
+
+# Market Data
+# Provider for quotes/history/fundamentals: 'yfinance' (live) or 'replay' (local files)
+MARKET_DATA_PROVIDER = os.environ.get('MARKET_DATA_PROVIDER', 'yfinance')
+MARKET_DATA_REPLAY_DIR = os.environ.get('MARKET_DATA_REPLAY_DIR', BASE_DIR / 'trading_app' / 'data' / 'prices')
+
+# Local OHLCV bar store: one Parquet file per symbol and interval
+BAR_STORE_DIR = BASE_DIR / 'trading_app' / 'data' / 'bars'
+# Seconds before today's (still provisional) bars are fetched again
+BAR_STORE_LIVE_TTL = 15 * 60
+
+# Seconds a bulk-refreshed holding price is reused before it is downloaded again
+PRICE_REFRESH_INTERVAL = 15
+
+# Quote/chart cache: seconds before an entry is stale (served while refreshing in the background)
+QUOTE_CACHE_TTLS = {
+    'quote': 15,
+    '1D': 60,
+    '1W': 300,
+    '1M': 900,
+    '3M': 1800,
+    '1Y': 4 * 3600,
+    '5Y': 12 * 3600,
+    'returns': 4 * 3600,
+    'screener': 4 * 3600,
+}
+QUOTE_CACHE_MAX_ENTRIES = 2048
+
+# ingest_prices daemon: polling cadence, symbols per upstream request, and how long
+# a published quote is trusted by request handlers (seconds)
+PRICE_INGEST_INTERVAL = 15
+PRICE_INGEST_BATCH_SIZE = 100
+PUBLISHED_QUOTE_MAX_AGE = 60
+
+# Bot equity simulations: bootstrapped paths per request and days of watchlist history resampled
+MONTE_CARLO_PATHS = 20000
+MONTE_CARLO_LOOKBACK_DAYS = 730
+# Request bounds: bot duration, paths per request, and paths x (trading days + 1), which
+# sizes each float64 array of a simulation (10M cells = 80 MB, a few arrays live at once)
+HERM_MAX_DURATION_WEEKS = 52
+MONTE_CARLO_MAX_PATHS = 100000
+MONTE_CARLO_MAX_CELLS = 10000000
+
+# Finished backtest results, keyed by config and bar fingerprint; least recently used evicted over the size bound
+BACKTEST_CACHE_DIR = BASE_DIR / 'trading_app' / 'data' / 'backtest_cache'
+BACKTEST_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# Saved state of interrupted backtests (resumed with backtest_hermes --resume) and the
+# minimum number of seconds between checkpoints of a running backtest
+BACKTEST_CHECKPOINT_DIR = BASE_DIR / 'trading_app' / 'data' / 'backtest_checkpoints'
+BACKTEST_CHECKPOINT_INTERVAL = 30
+
+# Index reconstitution events (S&P 500, NASDAQ-100, ...): directory of .csv/.parquet files with
+# index_name, symbol, event_type (ADD/DELETE), announcement_date, effective_date columns, and the
+# calendar days an event stays active after its effective date
+INDEX_EVENTS_DIR = BASE_DIR / 'trading_app' / 'data' / 'index_events'
+INDEX_EVENT_TRAILING_DAYS = 10
+
+# Persisted backtest runs: seconds between polls of the run_backtests worker, seconds after
+# which a run still RUNNING is assumed abandoned by a dead worker and claimed again (keep it
+# above the longest run), rows per bulk insert, and default/maximum trades per page of the
+# trades endpoint
+BACKTEST_WORKER_POLL_INTERVAL = 5
+BACKTEST_RUN_TIMEOUT = 3600
+BACKTEST_BULK_BATCH_SIZE = 5000
+BACKTEST_TRADES_PAGE_SIZE = 500
+BACKTEST_TRADES_MAX_PAGE_SIZE = 5000
+
+# Stored results of the benchmark_backtests command that later runs are compared against
+BACKTEST_BENCHMARK_BASELINE = BASE_DIR / 'trading_app' / 'data' / 'benchmarks' / 'backtest_baseline.json'
+
+# Default point budget per chart period returned by get_stock_price (LTTB downsampled)
+CHART_MAX_POINTS = 500
+
+# Seconds a caller waits on an identical in-flight upstream fetch before giving up, per data kind
+SINGLE_FLIGHT_TIMEOUTS = {
+    'quote': 10,
+    'history': 30,
+    'fundamentals': 10,
+    'bulk_history': 60,
+    'last_prices': 20,
+    'fundamentals_table': 300,
+}
+
+# Whole-market screener (/api/ml/screener/universe/): CSV with a symbol column listing the
+# universe (unset: every symbol in the provider's fundamentals, else the bot watchlists),
+# concurrent per-ticker fundamentals requests, and default/maximum rows per response
+SCREENER_UNIVERSE = os.environ.get('SCREENER_UNIVERSE')
+FUNDAMENTALS_FETCH_WORKERS = 8
+SCREENER_TOP_N = 50
+SCREENER_MAX_TOP_N = 5000
+
+# /api/ml/<model>/batch/ endpoints: items accepted per request, and items computed per
+# streamed NDJSON chunk
+ML_BATCH_MAX_ITEMS = 100000
+ML_BATCH_CHUNK_SIZE = 5000
+
+# Live stream (/api/stream/): seconds between broadcaster ticks, between holding reloads,
+# between keepalive comments, and before a connection is recycled; events buffered per client
+STREAM_POLL_INTERVAL = 2
+STREAM_HOLDINGS_REFRESH = 30
+STREAM_KEEPALIVE = 15
+STREAM_MAX_DURATION = 300
+STREAM_QUEUE_SIZE = 100
@@ -33,7 +33,7 @@ import {
   Badge,
 } from '@mui/icons-material'
 import { useAuth } from '../contexts/AuthContext'
-import { signalAPI } from '../services/api'
+import { signalAPI, streamAPI } from '../services/api'
 
 const drawerWidth = 240
 
@@ -68,10 +68,16 @@ export default function Layout({ children }) {
       }
     }
     fetchUnreadCount()
-    
-    // Refresh every 60 seconds
-    const interval = setInterval(fetchUnreadCount, 60000)
-    return () => clearInterval(interval)
+
+    // Live updates pushed by the backend stream, polling every 60 seconds while it is down
+    const unsubscribe = streamAPI.subscribe('signals', (update) => setUnreadSignals(update.unread_count))
+    const interval = setInterval(() => {
+      if (!streamAPI.isLive('signals')) fetchUnreadCount()
+    }, 60000)
+    return () => {
+      clearInterval(interval)
+      unsubscribe()
+    }
   }, [])
 
   const handleDrawerToggle = () => {
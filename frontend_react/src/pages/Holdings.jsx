@@ -23,7 +23,7 @@ import {
   Chip,
 } from '@mui/material'
 import { Add } from '@mui/icons-material'
-import { holdingAPI, portfolioAPI } from '../services/api'
+import { holdingAPI, portfolioAPI, streamAPI } from '../services/api'
 import { formatCurrency, formatPercentage } from '../utils/format'
 import { toast } from 'react-toastify'
 
@@ -43,20 +43,37 @@ export default function Holdings() {
  
   useEffect(() => {
     loadHoldings()
-    
-    // Auto-refresh prices every 30 seconds and save snapshot
+  }, [])
+
+  // Live prices pushed by the backend stream; save a snapshot at most every 30 seconds
+  useEffect(() => {
+    let lastSnapshot = 0
+    return streamAPI.subscribe('prices', (update) => {
+      if (update.holdings.length === 0) return
+      const changed = Object.fromEntries(update.holdings.map((h) => [h.id, h]))
+      setHoldings((prev) => prev.map((h) => (changed[h.id] ? { ...h, ...changed[h.id] } : h)))
+      setSummary((prev) => (prev ? { ...prev, ...update.summary } : prev))
+
+      if (Date.now() - lastSnapshot >= 30000) {
+        lastSnapshot = Date.now()
+        portfolioAPI.saveSnapshot().catch((err) => console.error('Snapshot save failed:', err))
+      }
+    })
+  }, [])
+
+  // Poll every 30 seconds while the stream is not delivering prices
+  useEffect(() => {
     const interval = setInterval(async () => {
-      if (holdings.length > 0) {
-        try {
-          await holdingAPI.refreshPrices()
-          await portfolioAPI.saveSnapshot()  // Save snapshot after refreshing prices
-          await loadHoldings()
-        } catch (err) {
-          console.error('Auto-refresh failed:', err)
-        }
+      if (holdings.length === 0 || streamAPI.isLive('prices', 30000)) return
+      try {
+        await holdingAPI.refreshPrices()
+        await portfolioAPI.saveSnapshot()  // Save snapshot after refreshing prices
+        await loadHoldings()
+      } catch (err) {
+        console.error('Auto-refresh failed:', err)
       }
     }, 30000) // 30 seconds
-  
+
     // Cleanup interval on unmount
     return () => clearInterval(interval)
   }, [holdings.length])
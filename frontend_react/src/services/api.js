@@ -141,6 +141,61 @@ export const hermAPI = {
   createBot: (data) => api.post('/herm/create/', data),
   getBotStatus: (botId) => api.get(`/herm/${botId}/status/`),
   listBots: () => api.get('/herm/list/'),
+  simulate: (data) => api.post('/herm/simulate/', data),
+}
+
+// Backtest Runs API (queued, executed by the run_backtests worker)
+export const backtestAPI = {
+  createRun: (data) => api.post('/backtests/create/', data),
+  listRuns: (params) => api.get('/backtests/list/', { params }),
+  getRun: (runId) => api.get(`/backtests/${runId}/`),
+  getTrades: (runId, cursor = 0, limit = 500) => api.get(`/backtests/${runId}/trades/`, { params: { cursor, limit } }),
+  getEquity: (runId) => api.get(`/backtests/${runId}/equity/`),
+}
+
+// Live Stream API (Server-Sent Events): one shared connection per tab pushing
+// 'prices' ({prices, holdings, summary}) and 'signals' ({unread_count}) events
+const STREAM_EVENTS = ['prices', 'signals']
+const streamHandlers = { prices: new Set(), signals: new Set() }
+const streamReceivedAt = { prices: 0, signals: 0 }
+let stream = null
+
+const openStream = () => {
+  const token = localStorage.getItem('token')
+  if (!token) return null
+  // EventSource cannot send headers, so the token goes in the query string
+  const source = new EventSource(`${config.API_URL}/stream/?token=${encodeURIComponent(token)}`)
+  STREAM_EVENTS.forEach((event) => {
+    source.addEventListener(event, (e) => {
+      streamReceivedAt[event] = Date.now()
+      const data = JSON.parse(e.data)
+      streamHandlers[event].forEach((handler) => handler(data))
+    })
+  })
+  return source
+}
+
+export const streamAPI = {
+  // Returns an unsubscribe function; the connection closes with the last subscriber
+  subscribe: (event, handler) => {
+    streamHandlers[event].add(handler)
+    if (!stream) stream = openStream()
+    return () => {
+      streamHandlers[event].delete(handler)
+      const listening = STREAM_EVENTS.some((name) => streamHandlers[name].size > 0)
+      if (!listening && stream) {
+        stream.close()
+        stream = null
+      }
+    }
+  },
+  // Whether the stream is connected and delivered `event` within the last maxAge ms.
+  // Callers keep polling otherwise: the backend refuses the stream when it is not
+  // served through ASGI, and prices only move while ingest_prices is running.
+  isLive: (event, maxAge = Infinity) =>
+    Boolean(stream) &&
+    stream.readyState === EventSource.OPEN &&
+    Date.now() - streamReceivedAt[event] < maxAge,
 }
 
 export default api